@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import importlib.util
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+
+class FxTable:
+    """Исторический курс одной валюты (рублей за единицу) по дням."""
+
+    def __init__(self, code: str, days: list[str], rates: list[float]) -> None:
+        self.code = code
+        self.days = days
+        self.rates = rates
+
+    @classmethod
+    def load(cls, db, code: str) -> FxTable | None:
+        rows = db.fx_rates(code)
+        if not rows:
+            return None
+        return cls(code, [r["date"] for r in rows], [r["rate"] for r in rows])
+
+    def rate_at(self, day: str) -> float:
+        """Последний известный на день курс (до начала истории — самый ранний)."""
+        return self.rates[max(bisect_right(self.days, day[:10]) - 1, 0)]
+
+    def rates_at(self, days):
+        """То же для массива datetime64[D] — один searchsorted на всю колонку."""
+        import numpy as np
+
+        idx = np.searchsorted(np.array(self.days, dtype="datetime64[D]"), days, side="right")
+        return np.asarray(self.rates)[np.maximum(idx - 1, 0)]
+
+    def convert(self, amount: int, day: str) -> int:
+        return round(amount / self.rate_at(day))
+
+
+class PeriodStats:
+    """Агрегаты статистики за период, которые можно править по одной операции.
+
+    Суммы хранятся в копейках вместе с числом операций в корзине, чтобы
+    корзина исчезала ровно тогда, когда её не вернул бы и SQL-запрос. Если
+    задан ``fx``, суммы уже пересчитаны в его валюту по курсу на дату каждой
+    операции (в сотых долях валюты). ``base`` — баланс на начало периода:
+    линия баланса продолжает его, а не начинается с нуля.
+    """
+
+    def __init__(self, since: str | None, code: str = "RUB", fx: FxTable | None = None) -> None:
+        self.since = since
+        self.code = code
+        self.fx = fx
+        self.base = 0
+        self.pie: dict[str, list[int]] = {}
+        self.inc: dict[str, list[int]] = {}
+        self.exp: dict[str, list[int]] = {}
+        self.days: list[str] = []
+        self.bal: list[int] = []
+        self.cnt: list[int] = []
+
+    @classmethod
+    def from_rows(
+        cls, since: str | None, cats, months, daily, code: str = "RUB", base: int = 0
+    ) -> PeriodStats:
+        st = cls(since, code)
+        st.base = base
+        for r in cats:
+            b = st.pie.setdefault(r["category_name"] or "—", [0, 0])
+            b[0] += r["total"]
+            b[1] += r["n"]
+        for r in months:
+            (st.inc if r["type"] else st.exp)[r["month"]] = [r["total"], r["n"]]
+        for r in daily:
+            st.days.append(r["day"])
+            st.bal.append(r["balance"])
+            st.cnt.append(r["n"])
+        return st
+
+    @staticmethod
+    def _bump(buckets: dict[str, list[int]], key: str, amount: int, sign: int) -> None:
+        b = buckets.setdefault(key, [0, 0])
+        b[0] += sign * amount
+        b[1] += sign
+        if not b[1]:
+            del buckets[key]
+
+    def apply(self, op, sign: int) -> None:
+        """Учесть добавленную (sign=1) или удалённую (sign=-1) операцию."""
+        day = op["date"][:10]
+        amount = op["amount"] if self.fx is None else self.fx.convert(op["amount"], day)
+        delta = sign * (amount if op["type"] else -amount)
+        if self.since and day < self.since:
+            # операция до начала периода меняет только баланс на его начало
+            self.base += delta
+            self.bal = [b + delta for b in self.bal]
+            return
+
+        self._bump(self.inc if op["type"] else self.exp, day[:7], amount, sign)
+        if not op["type"]:
+            self._bump(self.pie, op["category_name"] or "—", amount, sign)
+
+        # нарастающий итог меняется только начиная с дня операции
+        i = bisect_left(self.days, day)
+        if i == len(self.days) or self.days[i] != day:
+            self.days.insert(i, day)
+            self.bal.insert(i, self.bal[i - 1] if i else self.base)
+            self.cnt.insert(i, 0)
+        self.cnt[i] += sign
+        for j in range(i, len(self.bal)):
+            self.bal[j] += delta
+        if not self.cnt[i]:
+            del self.days[i], self.bal[i], self.cnt[i]
+
+    def result(self, k: float = 1.0):
+        """Итоги в единицах валюты; рублёвые суммы делятся на текущий курс ``k``."""
+        k = 100 * (1.0 if self.fx is not None else k)
+        pie = defaultdict(float, {n: v[0] / k for n, v in self.pie.items()})
+        inc = defaultdict(float, {m: v[0] / k for m, v in self.inc.items()})
+        exp = defaultdict(float, {m: v[0] / k for m, v in self.exp.items()})
+        line = [
+            (datetime.fromisoformat(d), b / k) for d, b in zip(self.days, self.bal)
+        ]
+        return pie, inc, exp, line
+
+    def snapshot(self) -> tuple:
+        return self.base, self.pie, self.inc, self.exp, list(zip(self.days, self.bal, self.cnt))
+
+
+class ColumnarOps:
+    """Операции счёта в колонках NumPy: копейки int64, даты datetime64[D],
+    тип int8 и коды категорий. Все агрегаты считаются векторно."""
+
+    def __init__(self, amount, day, op_type, cat, cat_names: dict[int, str]) -> None:
+        self.amount, self.day, self.type, self.cat = amount, day, op_type, cat
+        self.cat_names = cat_names
+
+    @classmethod
+    def load(cls, db, account_id: int, cat_names: dict[int, str]) -> ColumnarOps:
+        import numpy as np
+
+        rows = db.operation_columns(account_id)
+        arr = np.array(
+            rows, dtype=[("amount", "i8"), ("day", "U10"), ("type", "i1"), ("cat", "i8")]
+        )
+        return cls(
+            arr["amount"], arr["day"].astype("datetime64[D]"), arr["type"], arr["cat"], cat_names
+        )
+
+    @staticmethod
+    def _group(keys, weights):
+        import numpy as np
+
+        uniq, inv = np.unique(keys, return_inverse=True)
+        return uniq, np.bincount(inv, weights=weights).astype("i8"), np.bincount(inv)
+
+    def period_stats(
+        self, since: str | None, code: str = "RUB", fx: FxTable | None = None
+    ) -> PeriodStats:
+        import numpy as np
+
+        amount, day, op_type, cat = self.amount, self.day, self.type, self.cat
+        if fx is not None and len(amount):
+            amount = np.rint(amount / fx.rates_at(day)).astype("i8")
+
+        st = PeriodStats(since, code, fx)
+        if since:
+            mask = day >= np.datetime64(since)
+            st.base = int(np.where(op_type == 1, amount, -amount)[~mask].sum())
+            amount, day, op_type, cat = amount[mask], day[mask], op_type[mask], cat[mask]
+        if not len(amount):
+            return st
+
+        exp = op_type == 0
+        for cat_id, total, n in zip(*self._group(cat[exp], amount[exp])):
+            b = st.pie.setdefault(self.cat_names.get(int(cat_id)) or "—", [0, 0])
+            b[0] += int(total)
+            b[1] += int(n)
+
+        month = day.astype("datetime64[M]")
+        key = month.astype("i8") * 2 + op_type
+        for k, total, n in zip(*self._group(key, amount)):
+            m = str(np.datetime64(int(k) // 2, "M"))
+            (st.inc if k % 2 else st.exp)[m] = [int(total), int(n)]
+
+        signed = np.where(op_type == 1, amount, -amount)
+        days, totals, counts = self._group(day, signed)
+        st.days = [str(d) for d in days]
+        st.bal = (st.base + np.cumsum(totals)).tolist()
+        st.cnt = counts.tolist()
+        return st
@@ -0,0 +1,503 @@
+"""Замеры горячих путей на синтетических данных.
+
+    python bench.py stats --rows 1000000
+    python bench.py rates --delay 3
+    python bench.py startup --runs 5 --history startup.jsonl
+    python bench.py db --rows 1000000
+    python bench.py search --rows 1000000
+    python bench.py suite --sizes 10k 100k --json after.json
+    python bench.py compare before.json after.json
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import sqlite3
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from analytics import HAS_NUMPY, ColumnarOps, PeriodStats
+from dataBase import PRAGMAS, DataBase
+from datagen import PRESETS, generate
+
+# настройки соединения до перехода на WAL — значения SQLite по умолчанию
+LEGACY_PRAGMAS = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "cache_size": -2000,
+    "mmap_size": 0,
+    "temp_store": "DEFAULT",
+}
+
+
+def _timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+NOTE_WORDS = (
+    "продукты пятёрочка такси метро кофе аптека зарплата подарок кино бензин "
+    "ёлка обед кафе café связь аренда"
+).split()
+
+
+def _fill(db: DataBase, rows: int, seed: int = 42, notes: bool = False) -> tuple[int, int]:
+    rnd = random.Random(seed)
+    user_id = db.ensure_default_user()
+    account_id = db.ensure_default_account(user_id)
+    cats = [db.add_category(user_id, f"cat{i}", i % 2) for i in range(12)]
+    today = date.today()
+
+    def ops():
+        for _ in range(rows):
+            d = today - timedelta(days=rnd.randrange(3650))
+            yield (
+                account_id,
+                rnd.random() < 0.3,
+                rnd.randrange(100, 500_000) / 100,
+                rnd.choice(cats),
+                datetime.combine(d, datetime.min.time()),
+                " ".join(rnd.sample(NOTE_WORDS, 2)) + f" #{rnd.randrange(100_000)}"
+                if notes else None,
+            )
+
+    db.add_operations_bulk(ops())
+    return user_id, account_id
+
+
+def _loop_stats(db: DataBase, account_id: int, since: str | None, names: dict[int, str]):
+    """Прежняя реализация FinanceCore.stats: построчный цикл в Python."""
+    ops = sorted(db.list_operations(account_id), key=lambda o: o["date"])
+    if since is not None:
+        border = datetime.fromisoformat(since)
+        ops = [o for o in ops if datetime.fromisoformat(o["date"]) >= border]
+
+    pie, inc, exp = defaultdict(float), defaultdict(float), defaultdict(float)
+    bal = 0
+    line = []
+    for o in ops:
+        sign = 1 if o["type"] else -1
+        v = sign * o["amount"] / 100
+        dt = datetime.fromisoformat(o["date"])
+        bal += v
+        line.append((dt, bal))
+        (inc if o["type"] else exp)[dt.strftime("%Y-%m")] += abs(v)
+        if not o["type"]:
+            pie[names.get(o["category_id"]) or "—"] += abs(v)
+    return pie, inc, exp, line
+
+
+def bench_stats(rows: int) -> dict[str, dict[str, float]]:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DataBase(Path(tmp) / "bench.db")
+        user_id, account_id = _fill(db, rows)
+
+        names = {c["id"]: c["name"] for c in db.get_categories(user_id)}
+        res: dict[str, dict[str, float]] = {}
+        for label, days in (("year", 365), ("all", None)):
+            since = None if days is None else (date.today() - timedelta(days=days - 1)).isoformat()
+            r = {
+                "loop": _timed(lambda: _loop_stats(db, account_id, since, names), repeat=1),
+                "sql": _timed(
+                    lambda: PeriodStats.from_rows(
+                        since,
+                        db.category_sums(account_id, 0, since),
+                        db.monthly_sums(account_id, since),
+                        db.daily_balance(account_id, since),
+                        base=db.balance_at(account_id, since) if since else 0,
+                    ).result()
+                ),
+            }
+            if HAS_NUMPY:
+                r["numpy_load"] = _timed(lambda: ColumnarOps.load(db, account_id, names))
+                cols = ColumnarOps.load(db, account_id, names)
+                r["numpy"] = _timed(lambda: cols.period_stats(since).result())
+            res[label] = r
+        db.conn.close()
+    return res
+
+
+def _concurrent(db: DataBase, account_id: int, seconds: float = 2.0) -> dict[str, float]:
+    """Запись по одной операции на фоне непрерывного чтения из пула."""
+    stop = threading.Event()
+    reads = [0]
+
+    def read_loop():
+        with db.reader() as r:
+            while not stop.is_set():
+                r.operation_totals(account_id)
+                reads[0] += 1
+
+    th = threading.Thread(target=read_loop)
+    th.start()
+    writes = errors = 0
+    t = time.perf_counter()
+    while time.perf_counter() - t < seconds:
+        try:
+            db.add_operation(account_id, 0, 1.0, None, datetime.now())
+            writes += 1
+        except Exception:
+            errors += 1
+    elapsed = time.perf_counter() - t
+    stop.set()
+    th.join()
+    return {"write_ops_s": writes / elapsed, "read_q_s": reads[0] / elapsed, "write_errors": errors}
+
+
+def bench_db(rows: int) -> dict[str, dict[str, float]]:
+    """Пропускная способность записи и чтения: прежние настройки против WAL."""
+    res: dict[str, dict[str, float]] = {}
+    for label, pragmas in (("before", LEGACY_PRAGMAS), ("after", PRAGMAS)):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DataBase(Path(tmp) / "bench.db", pragmas=pragmas)
+            t = time.perf_counter()
+            _, account_id = _fill(db, rows)
+            r = {"bulk_rows_s": rows / (time.perf_counter() - t)}
+
+            n = 300
+            t = time.perf_counter()
+            for _ in range(n):
+                db.add_operation(account_id, 0, 1.0, None, datetime.now())
+            r["single_ops_s"] = n / (time.perf_counter() - t)
+
+            with db.reader() as rd:
+                r["page_q_s"] = 1 / _timed(
+                    lambda: rd.list_operations(account_id, limit=500, offset=rows // 2)
+                )
+                r["daily_balance_s"] = _timed(lambda: rd.daily_balance(account_id))
+                r["export_rows_s"] = rows / _timed(
+                    lambda: sum(len(c) for c in rd.iter_operations(account_id)), repeat=1
+                )
+            r.update(_concurrent(db, account_id))
+            db.close()
+        res[label] = r
+    return res
+
+
+def bench_search(rows: int) -> dict[str, float]:
+    """Первая страница поиска по описанию: частые, редкие и пустые запросы."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DataBase(Path(tmp) / "bench.db")
+        _, account_id = _fill(db, rows, notes=True)
+        res = {
+            q: _timed(lambda q=q: db.search_operations(account_id, q, limit=500), repeat=5)
+            for q in ("прод", "ПЯТЕРОЧКА", "кофе апт", "cafe", "#4242", "#99999", "zzz")
+        }
+        db.close()
+    return res
+
+
+def bench_rates(delay: float, fail: bool) -> dict[str, float]:
+    """Сколько ждёт старт приложения и когда приходят свежие курсы.
+
+    Оба провайдера подменены: отвечают через ``delay`` секунд или падают.
+    """
+    from exchange import RateProvider
+
+    def fetch(self, key: str = "") -> dict[str, float]:
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError("503")
+        return {"RUB": 1.0, "USD": 90.0, "EUR": 100.0}
+
+    class Provider(RateProvider):
+        _fetch_xhost = fetch
+        _fetch_open_er = fetch
+
+    with tempfile.TemporaryDirectory() as tmp:
+        arrived = threading.Event()
+        t = time.perf_counter()
+        fx = Provider(Path(tmp) / "settings.json")
+        fx.subscribe(lambda rates: arrived.set())
+        fx.refresh_async(force=True)
+        startup = time.perf_counter() - t
+        arrived.wait(delay + 10)
+        res = {"startup": startup}
+        if arrived.is_set():
+            res["rates_ready"] = time.perf_counter() - t
+        return res
+
+
+# бюджет холодного старта, с: импорт core и первая отрисовка окна
+STARTUP_BUDGET = {"import_core": 0.25, "first_paint": 1.5}
+APP_DIR = Path(__file__).parent
+
+
+def _importtime(module: str) -> tuple[float, list[tuple[str, float]]]:
+    """Время импорта ``module`` и самые тяжёлые его прямые зависимости по -X importtime."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR, capture_output=True, text=True, check=True,
+    ).stderr
+    total = 0.0
+    top: list[tuple[str, float]] = []
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = line.split("|")
+        if not cum.strip().isdigit():
+            continue
+        depth = len(name) - len(name.lstrip())
+        if name.strip() == module:
+            total = int(cum) / 1e6
+        elif depth <= 3:
+            top.append((name.strip(), int(cum) / 1e6))
+    top.sort(key=lambda x: x[1], reverse=True)
+    return total, top
+
+
+def _first_paint() -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            FINANCE_DB=str(Path(tmp) / "startup.db"),
+            QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"),
+            FINANCE_STARTUP_PROBE=repr(time.time()),
+        )
+        out = subprocess.run(
+            [sys.executable, "main.py"],
+            cwd=APP_DIR, env=env, capture_output=True, text=True, timeout=60,
+        ).stdout
+    for line in out.splitlines():
+        if line.startswith("first_paint="):
+            return float(line.split("=", 1)[1])
+    raise RuntimeError("окно не отрисовалось")
+
+
+def bench_startup(runs: int) -> dict:
+    imports = [_importtime("core") for _ in range(runs)]
+    paints = [_first_paint() for _ in range(runs)]
+    return {
+        "import_core": min(t for t, _ in imports),
+        "first_paint": min(paints),
+        "top_imports": imports[0][1][:8],
+    }
+
+
+def _suite_db(db: DataBase, account_id: int, rows: int) -> dict[str, float]:
+    n = 200
+    t = time.perf_counter()
+    for _ in range(n):
+        db.add_operation(account_id, 0, 1.0, None, datetime.now())
+    return {
+        "db.insert_one": (time.perf_counter() - t) / n,
+        "db.list_page": _timed(lambda: db.list_operations(account_id, limit=500, offset=rows // 2)),
+        "db.count": _timed(lambda: db.count_operations(account_id)),
+        "db.search": _timed(lambda: db.search_operations(account_id, "кофе", limit=500)),
+    }
+
+
+def _suite_core(core) -> dict[str, float]:
+    r = {"core.totals": _timed(core.totals)}
+    for backend in ("sql", "numpy") if HAS_NUMPY else ("sql",):
+        core.stats_backend = backend
+        for label, days in (("month", 30), ("all", None)):
+            since = core.border(days)
+            r[f"core.stats.{backend}.{label}"] = _timed(
+                lambda: core.compute_stats(since).result(core.fx["RUB"])
+            )
+    core.stats_backend = "sql"
+    return r
+
+
+def _suite_ui(core) -> dict[str, float]:
+    """Лента и графики под offscreen Qt; графики рисуются через Agg."""
+    from PySide6.QtWidgets import QTableView, QVBoxLayout, QWidget
+    from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as Canvas
+    from matplotlib.figure import Figure
+
+    from charts import BarChart, LineChart, PieChart
+    from models import OperationsModel
+
+    def money(v: float, rate: float | None = None) -> str:
+        return f"{v / (rate or 1):,.2f} ₽"
+
+    model = OperationsModel(core, money)
+    model.set_headers(("Дата", "Сумма", "Категория", "Описание"))
+    view = QTableView()
+    view.setModel(model)
+    view.resize(1000, 700)
+    view.show()
+
+    def fill_table():
+        model.reload()
+        view.grab()
+
+    pie, inc, exp, line = core.stats(None)
+    months = sorted(set(inc) | set(exp))
+    data = (
+        (PieChart, tuple(pie.items())),
+        (BarChart, tuple((m, inc.get(m, 0), exp.get(m, 0)) for m in months)),
+        (LineChart, tuple(line)),
+    )
+    host = QWidget()
+    QVBoxLayout(host)
+    host.resize(800, 1800)
+    host.show()
+
+    def draw_charts():
+        for cls, d in data:
+            canvas = Canvas(Figure())
+            canvas.figure.subplots()
+            host.layout().addWidget(canvas)
+            cls(canvas).update(d)
+            canvas.draw()
+            host.layout().removeWidget(canvas)
+            canvas.deleteLater()
+
+    r = {"ui.fill_table": _timed(fill_table), "ui.draw_charts": _timed(draw_charts)}
+    view.close()
+    host.close()
+    return r
+
+
+def _suite_export(core, tmp: str) -> dict[str, float]:
+    need = {".xlsx": ("xlsxwriter", "openpyxl"), ".csv": (), ".parquet": ("pyarrow",)}
+    r = {}
+    for ext, mods in need.items():
+        if mods and not any(importlib.util.find_spec(m) for m in mods):
+            continue
+        path = str(Path(tmp) / f"export{ext}")
+        headers = ("Дата", "Сумма", "Категория", "Описание")
+        r[f"export{ext}"] = _timed(lambda: core.export_operations(path, headers), repeat=1)
+    return r
+
+
+def bench_suite(sizes: list[str], seed: int = 42) -> dict:
+    """Горячие пути на базах из datagen разного размера; все значения — секунды."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+    from fincore import FinanceCore
+
+    res: dict[str, dict[str, float]] = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DataBase(Path(tmp) / "bench.db")
+            t = time.perf_counter()
+            generate(db, PRESETS[size], seed)
+            r = {"generate": time.perf_counter() - t}
+            core = FinanceCore(db)
+            # результаты не должны зависеть от настроек пользователя
+            core.currency, core.stats_backend = "RUB", "sql"
+            r.update(_suite_db(db, core.account_id, PRESETS[size]))
+            r.update(_suite_core(core))
+            r.update(_suite_ui(core))
+            r.update(_suite_export(core, tmp))
+            core.close()
+        res[size] = r
+    app.processEvents()
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=APP_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "at": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPU",
+        "results": res,
+    }
+
+
+def compare(old: dict, new: dict, threshold: float) -> bool:
+    """Напечатать изменения new относительно old; True — есть замедления больше threshold."""
+    slower = False
+    for size, metrics in new["results"].items():
+        base = old["results"].get(size, {})
+        for name, t in metrics.items():
+            if name not in base:
+                continue
+            ratio = t / base[name] if base[name] else float("inf")
+            bad = ratio > 1 + threshold
+            slower |= bad
+            print(f"{size:>5} {name:28} {base[name] * 1000:10.2f}ms -> {t * 1000:10.2f}ms  "
+                  f"x{ratio:5.2f}{'  SLOWER' if bad else ''}")
+    return slower
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("stats", help="FinanceCore.stats: цикл vs SQL vs NumPy")
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p = sub.add_parser("rates", help="RateProvider: старт без ожидания сети")
+    p.add_argument("--delay", type=float, default=3.0, help="задержка ответа заглушки, с")
+    p.add_argument("--fail", action="store_true", help="заглушка отвечает 503")
+    p = sub.add_parser("db", help="DataBase: прежние настройки vs WAL и пул читателей")
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p = sub.add_parser("search", help="поиск по описаниям (FTS5)")
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p = sub.add_parser("startup", help="холодный старт: импорт и первая отрисовка")
+    p.add_argument("--runs", type=int, default=3)
+    p.add_argument("--history", type=Path, help="дописать результат в JSONL-файл")
+    p = sub.add_parser("suite", help="все горячие пути на базах 10k / 100k / 1M")
+    p.add_argument("--sizes", nargs="+", choices=PRESETS, default=list(PRESETS))
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--json", type=Path, help="сохранить результат в JSON")
+    p = sub.add_parser("compare", help="сравнить два JSON-результата suite")
+    p.add_argument("old", type=Path)
+    p.add_argument("new", type=Path)
+    p.add_argument("--threshold", type=float, default=0.2, help="допустимое замедление, доля")
+    args = ap.parse_args()
+
+    if args.cmd == "stats":
+        for period, r in bench_stats(args.rows).items():
+            print(period, "  ".join(f"{k}={v * 1000:.1f}ms" for k, v in r.items()))
+    elif args.cmd == "rates":
+        r = bench_rates(args.delay, args.fail)
+        print("  ".join(f"{k}={v * 1000:.1f}ms" for k, v in r.items()))
+    elif args.cmd == "db":
+        for label, r in bench_db(args.rows).items():
+            print(label, "  ".join(f"{k}={v:,.3f}" if v < 10 else f"{k}={v:,.0f}" for k, v in r.items()))
+    elif args.cmd == "search":
+        for q, t in bench_search(args.rows).items():
+            print(f"{q!r:14} {t * 1000:.1f}ms")
+    elif args.cmd == "startup":
+        r = bench_startup(args.runs)
+        for name, t in r["top_imports"]:
+            print(f"  {t * 1000:8.1f}ms  {name}")
+        over = False
+        for k, budget in STARTUP_BUDGET.items():
+            ok = r[k] <= budget
+            over |= not ok
+            print(f"{k}={r[k] * 1000:.1f}ms  budget={budget * 1000:.0f}ms  {'ok' if ok else 'OVER'}")
+        if args.history:
+            with args.history.open("a", encoding="utf-8") as f:
+                f.write(json.dumps({"at": datetime.now().isoformat(timespec="seconds"), **r}) + "\n")
+        if over:
+            sys.exit(1)
+    elif args.cmd == "suite":
+        r = bench_suite(args.sizes, args.seed)
+        for size, metrics in r["results"].items():
+            for name, t in metrics.items():
+                print(f"{size:>5} {name:28} {t * 1000:10.2f}ms")
+        if args.json:
+            args.json.write_text(json.dumps(r, indent=2, ensure_ascii=False), encoding="utf-8")
+    elif args.cmd == "compare":
+        old, new = (json.loads(p.read_text(encoding="utf-8")) for p in (args.old, args.new))
+        if compare(old, new, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
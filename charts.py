@@ -0,0 +1,385 @@
+from __future__ import annotations
+
+import math
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+import matplotlib.dates as mdates
+from matplotlib.colors import LogNorm
+from PySide6.QtCore import QEvent, QObject, QPoint, QRect, QTimer
+
+NO_DATA = "Нет данных"
+
+
+class _Chart:
+    """Один холст аналитики с постоянными артистами.
+
+    ``update`` запоминает входные данные и перерисовывает холст, только если
+    они изменились и холст виден в области прокрутки; иначе перерисовка
+    откладывается до ``flush``.
+    """
+
+    def __init__(self, canvas, viewport=None) -> None:
+        self.canvas = canvas
+        self.ax = canvas.figure.axes[0]
+        self._viewport = viewport
+        self._data = None
+        self._dirty = False
+        self._empty = None
+
+    def update(self, data) -> None:
+        if data == self._data and not self._dirty:
+            return
+        self._data = data
+        self._dirty = True
+        self.flush()
+
+    def flush(self) -> None:
+        if not self._dirty or not self.visible():
+            return
+        self._dirty = False
+        if self._data_empty(self._data):
+            if self._empty is not True:
+                self.ax.clear()
+                self.ax.text(0.5, 0.5, NO_DATA, ha="center", va="center")
+                self._after_rebuild()
+            self._empty = True
+        else:
+            if self._empty is not False or not self._patch(self._data):
+                self.ax.clear()
+                self._build(self._data)
+                self._after_rebuild()
+            self._empty = False
+        self.canvas.draw_idle()
+
+    def visible(self) -> bool:
+        if not self.canvas.isVisible():
+            return False
+        if self._viewport is None:
+            return True
+        top_left = self.canvas.mapTo(self._viewport, QPoint(0, 0))
+        return self._viewport.rect().intersects(QRect(top_left, self.canvas.size()))
+
+    def _after_rebuild(self) -> None:
+        self.canvas.figure.tight_layout()
+
+    def _data_empty(self, data) -> bool:
+        return not data
+
+    def _build(self, data) -> None:
+        raise NotImplementedError
+
+    def _patch(self, data) -> bool:
+        """Обновить существующих артистов; False — нужна полная пересборка."""
+        return False
+
+
+class PieChart(_Chart):
+    LABEL_R, PCT_R = 1.1, 0.6
+
+    def __init__(self, canvas, viewport=None, donut: bool = False) -> None:
+        super().__init__(canvas, viewport)
+        self._donut = donut
+        self._labels_key: tuple = ()
+        self._wedges: list = []
+        self._texts: list = []
+        self._pcts: list = []
+
+    def _data_empty(self, data) -> bool:
+        return not data or not any(v for _, v in data)
+
+    def _build(self, data) -> None:
+        labels, values = zip(*data)
+        kw = dict(wedgeprops=dict(width=0.4)) if self._donut else {}
+        self._wedges, self._texts, self._pcts = self.ax.pie(
+            values, labels=labels, autopct="%1.1f%%", **kw
+        )
+        if self._donut:
+            self.ax.set(aspect="equal")
+        self._labels_key = labels
+
+    def _patch(self, data) -> bool:
+        labels, values = zip(*data)
+        if labels != self._labels_key:
+            return False
+        total = sum(values)
+        theta = 0.0
+        for w, t, p, v in zip(self._wedges, self._texts, self._pcts, values):
+            frac = v / total
+            w.set_theta1(theta)
+            w.set_theta2(theta + 360 * frac)
+            mid = math.radians(theta + 180 * frac)
+            x, y = math.cos(mid), math.sin(mid)
+            t.set_position((self.LABEL_R * x, self.LABEL_R * y))
+            t.set_horizontalalignment("left" if x > 0 else "right")
+            p.set_position((self.PCT_R * x, self.PCT_R * y))
+            p.set_text(f"{100 * frac:1.1f}%")
+            theta += 360 * frac
+        return True
+
+
+class BarChart(_Chart):
+    def __init__(self, canvas, viewport=None) -> None:
+        super().__init__(canvas, viewport)
+        self._months: tuple = ()
+        self._inc_bars = self._exp_bars = None
+
+    def _build(self, data) -> None:
+        months, iv, ev = zip(*data)
+        idx = range(len(months))
+        self._inc_bars = self.ax.bar(idx, iv, width=0.4, label="Inc")
+        self._exp_bars = self.ax.bar(idx, ev, width=0.4, bottom=iv, color="#D86969", label="Exp")
+        sameY = all(m.startswith(datetime.now().strftime("%Y")) for m in months)
+        self.ax.set_xticks(idx)
+        self.ax.set_xticklabels(
+            [m[5:] if sameY else m for m in months], rotation=45, ha="right"
+        )
+        self.ax.set_xlim(-0.5, len(months) - 0.5)
+        self.ax.legend()
+        self._months = months
+
+    def _patch(self, data) -> bool:
+        months, iv, ev = zip(*data)
+        if months != self._months:
+            return False
+        for ri, re, i, e in zip(self._inc_bars, self._exp_bars, iv, ev):
+            ri.set_height(i)
+            re.set_y(i)
+            re.set_height(e)
+        self.ax.relim()
+        self.ax.autoscale_view(scalex=False)
+        return True
+
+
+def minmax_downsample(points, buckets: int):
+    """Сжать ряд (x, y) до <= 2 * buckets точек: в каждой корзине по оси X
+    остаются минимум и максимум (в исходном порядке), так что пики и провалы
+    не теряются. Крайние точки ряда сохраняются всегда."""
+    n = len(points)
+    if n <= 2 * buckets or buckets < 1:
+        return list(points)
+    x0, x1 = points[0][0], points[-1][0]
+    span = (x1 - x0).total_seconds() or 1.0
+
+    out = [points[0]]
+    cur = None
+    lo = hi = None
+    for p in points[1:-1]:
+        b = min(int((p[0] - x0).total_seconds() / span * buckets), buckets - 1)
+        if b != cur:
+            if lo is not None:
+                out.extend((lo, hi) if lo[0] <= hi[0] else (hi, lo))
+            cur, lo, hi = b, p, p
+        elif p[1] < lo[1]:
+            lo = p
+        elif p[1] > hi[1]:
+            hi = p
+    if lo is not None:
+        out.extend((lo, hi) if lo[0] <= hi[0] else (hi, lo))
+    out.append(points[-1])
+    # lo и hi могут совпасть — убираем повтор
+    return [p for i, p in enumerate(out) if i == 0 or p is not out[i - 1]]
+
+
+class LineChart(_Chart):
+    """Баланс со временем. На холст попадает не больше двух точек на пиксель
+    ширины; колесо мыши масштабирует ось X и пересчитывает видимый участок
+    по полному ряду, двойной щелчок возвращает весь период. ``set_forecast``
+    добавляет после истории полосы перцентилей прогноза."""
+
+    MARKER_LIMIT = 200
+    ZOOM_STEP = 1.25
+
+    def __init__(self, canvas, viewport=None) -> None:
+        super().__init__(canvas, viewport)
+        self._line = None
+        self._full: tuple = ()
+        self._xs: list[datetime] = []
+        self._fc = None
+        self._fc_artists: list = []
+        canvas.mpl_connect("scroll_event", self._on_scroll)
+        canvas.mpl_connect("button_press_event", self._on_press)
+
+    def set_forecast(self, fc) -> None:
+        """``fc`` — (даты, перцентили 5/25/50/75/95 по датам) или None."""
+        if fc == self._fc:
+            return
+        self._fc = fc
+        self._dirty = True
+        self.flush()
+
+    def _x_end(self) -> datetime:
+        return self._fc[0][-1] if self._fc else self._xs[-1]
+
+    def _draw_forecast(self) -> None:
+        for a in self._fc_artists:
+            a.remove()
+        self._fc_artists = []
+        if not self._fc:
+            return
+        days, bands = self._fc
+        # полосы начинаются от последней точки истории
+        x = (self._xs[-1], *days)
+        p5, p25, p50, p75, p95 = ((self._full[-1][1], *b) for b in bands)
+        color = self._line.get_color()
+        self._fc_artists = [
+            self.ax.fill_between(x, p5, p95, color=color, alpha=0.15, lw=0),
+            self.ax.fill_between(x, p25, p75, color=color, alpha=0.3, lw=0),
+            self.ax.plot(x, p50, "--", color=color)[0],
+        ]
+        self._forecast_datalim()
+
+    def _forecast_datalim(self) -> None:
+        # relim не учитывает полосы fill_between
+        if self._fc:
+            days, bands = self._fc
+            self.ax.update_datalim([
+                (mdates.date2num(days[0]), min(bands[0])),
+                (mdates.date2num(days[-1]), max(bands[-1])),
+            ])
+
+    def _set_xlim(self, dt) -> None:
+        if self._fc:
+            self.ax.set_xlim(dt[0], self._x_end())
+        elif dt[0] == dt[-1]:
+            self.ax.set_xlim(dt[0] - timedelta(days=1), dt[0] + timedelta(days=1))
+        else:
+            self.ax.set_xlim(dt[0], dt[-1])
+
+    def _sample(self, lo: datetime | None = None, hi: datetime | None = None):
+        i = 0 if lo is None else max(bisect_left(self._xs, lo) - 1, 0)
+        j = len(self._xs) if hi is None else bisect_right(self._xs, hi) + 1
+        pts = minmax_downsample(self._full[i:j], max(self.canvas.width(), 1))
+        return zip(*pts) if pts else ((), ())
+
+    def _show(self, dt, b) -> None:
+        self._line.set_data(dt, b)
+        self._line.set_marker("." if len(dt) <= self.MARKER_LIMIT else "")
+
+    def _build(self, data) -> None:
+        self._full, self._xs = data, [p[0] for p in data]
+        (self._line,) = self.ax.plot([], [])
+        self._fc_artists = []  # ax.clear() уже убрал прежние полосы
+        self._show(*self._sample())
+        self.ax.xaxis.set_major_formatter(mdates.DateFormatter("%d.%m"))
+        self._set_xlim(self._xs)
+        self.ax.relim()
+        self._draw_forecast()
+        self.ax.autoscale_view(scalex=False)
+        self.ax.figure.autofmt_xdate()
+
+    def _patch(self, data) -> bool:
+        self._full, self._xs = data, [p[0] for p in data]
+        self._show(*self._sample())
+        self._set_xlim(self._xs)
+        self.ax.relim()
+        self._draw_forecast()
+        self.ax.autoscale_view(scalex=False)
+        return True
+
+    def _zoom_to(self, lo: datetime, hi: datetime) -> None:
+        self.ax.set_xlim(lo, hi)
+        self._show(*self._sample(lo, hi))
+        self.ax.relim(visible_only=True)
+        self._forecast_datalim()
+        self.ax.autoscale_view(scalex=False)
+        self.canvas.draw_idle()
+
+    def _on_scroll(self, event) -> None:
+        if self._empty is not False or event.xdata is None:
+            return
+        x = mdates.num2date(event.xdata).replace(tzinfo=None)
+        lo, hi = (mdates.num2date(v).replace(tzinfo=None) for v in self.ax.get_xlim())
+        f = 1 / self.ZOOM_STEP if event.button == "up" else self.ZOOM_STEP
+        lo, hi = x - (x - lo) * f, x + (hi - x) * f
+        lo, hi = max(lo, self._xs[0]), min(hi, self._x_end())
+        if hi - lo >= timedelta(days=1):
+            self._zoom_to(lo, hi)
+
+    def _on_press(self, event) -> None:
+        if self._empty is False and event.dblclick and self._xs[0] != self._x_end():
+            self._zoom_to(self._xs[0], self._x_end())
+
+
+class HeatmapChart(_Chart):
+    """Итог вклада по сетке ставка × срок; точка — выбранный сценарий.
+
+    ``data`` — (ставки, сроки, строки итогов по ставкам, (ставка, срок)).
+    """
+
+    def __init__(self, canvas, viewport=None) -> None:
+        super().__init__(canvas, viewport)
+        self._im = None
+        self._mark = None
+        self._cbar = None
+        self._axes_key: tuple = ()
+
+    def _data_empty(self, data) -> bool:
+        return not data or max(map(max, data[2])) <= 0
+
+    def _build(self, data) -> None:
+        rates, terms, grid, (r, n) = data
+        # итог растёт экспоненциально по сроку — логарифмическая шкала цвета
+        self._im = self.ax.imshow(
+            grid, origin="lower", aspect="auto", cmap="viridis", norm=LogNorm(),
+            extent=(terms[0], terms[-1], rates[0], rates[-1]),
+        )
+        # шкала цвета живёт на своей оси и переживает ax.clear()
+        if self._cbar is None:
+            self._cbar = self.canvas.figure.colorbar(self._im, ax=self.ax)
+        else:
+            self._cbar.update_normal(self._im)
+        (self._mark,) = self.ax.plot([n], [r], "o", color="#D86969")
+        self.ax.set_xlim(terms[0], terms[-1])
+        self.ax.set_ylim(rates[0], rates[-1])
+        self._axes_key = (rates, terms)
+
+    def _patch(self, data) -> bool:
+        rates, terms, grid, (r, n) = data
+        if (rates, terms) != self._axes_key:
+            return False
+        self._im.set_data(grid)
+        self._im.autoscale()
+        self._cbar.update_normal(self._im)
+        self._mark.set_data([n], [r])
+        return True
+
+
+class _ViewportWatcher(QObject):
+    """Вызывает ``callback``, когда область прокрутки показана или сменила
+    размер: холсты могли стать видимыми без прокрутки."""
+
+    def __init__(self, viewport, callback) -> None:
+        super().__init__(viewport)
+        self._callback = callback
+        viewport.installEventFilter(self)
+
+    def eventFilter(self, obj, event) -> bool:
+        if event.type() in (QEvent.Resize, QEvent.Show):
+            # раскладка холстов пересчитывается после события — проверяем потом
+            QTimer.singleShot(0, self._callback)
+        return False
+
+
+class AnalyticsCharts:
+    """Четыре графика вкладки «Аналитика»."""
+
+    def __init__(self, ui) -> None:
+        viewport = ui.scrollAnalytics.viewport()
+        self._watcher = _ViewportWatcher(viewport, self.flush)
+        self.pie = PieChart(ui.canvas_pie, viewport)
+        self.bar = BarChart(ui.canvas_bar, viewport)
+        self.line = LineChart(ui.canvas_line, viewport)
+        self.donut = PieChart(ui.canvas_donut, viewport, donut=True)
+        for bar in (
+            ui.scrollAnalytics.verticalScrollBar(),
+            ui.scrollAnalytics.horizontalScrollBar(),
+        ):
+            bar.valueChanged.connect(self.flush)
+
+    def all(self) -> tuple[_Chart, ...]:
+        return self.pie, self.bar, self.line, self.donut
+
+    def flush(self) -> None:
+        for c in self.all():
+            c.flush()
@@ -0,0 +1,207 @@
+"""Консольный режим: отчёты, импорт и экспорт без запуска GUI.
+
+    python main.py report --period month
+    python main.py stats --period year --currency USD > stats.json
+    python main.py import bank.csv
+    python main.py export ops.csv --from 2024-01-01 --to 2024-12-31 --category Еда
+    python main.py import-fx rates.csv
+    python main.py rebuild-rollup
+
+Без команды запускается GUI (``--profile`` — под cProfile).
+
+Работает с той же базой (``--db``, по умолчанию finance.db или FINANCE_DB),
+но без Qt: настройки и кэш курсов хранятся в JSON-файле ``--settings``
+(по умолчанию FINANCE_SETTINGS или settings.json рядом с базой). Курсы
+валют берутся из этого кэша и истории курсов в базе, сеть не опрашивается —
+режим подходит для cron.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+from dataBase import DB_FILE, DataBase
+from dataLoad import EXPORT_FORMATS, SettingsManager
+from exchange import RateProvider
+from fincore import FinanceCore
+from variables import CURRENCY_SIGN, LANG
+
+# порядок совпадает с period_box и LANG["periods"]
+PERIODS = {"week": 7, "month": 30, "year": 365, "all": None}
+
+
+def _open(args) -> FinanceCore:
+    settings = args.settings or os.environ.get("FINANCE_SETTINGS") or args.db.with_name(
+        "settings.json"
+    )
+    core = FinanceCore(DataBase(args.db), SettingsManager(settings), RateProvider(settings))
+    if getattr(args, "currency", None):
+        core.currency = args.currency
+    return core
+
+
+def _lang(core: FinanceCore) -> dict:
+    return LANG.get(core.settings.get("lang"), LANG["ru"])
+
+
+def _stats(core: FinanceCore, period: str) -> dict:
+    days = PERIODS[period]
+    pie, inc, exp, line = core.stats(days)
+    months = sorted({*inc, *exp})
+    return {
+        "period": period,
+        "since": core.border(days),
+        "currency": core.currency,
+        "balance": round(core.balance() / core.fx[core.currency], 2),
+        "income": round(sum(inc.values()), 2),
+        "expense": round(sum(exp.values()), 2),
+        "categories": {
+            n: round(v, 2) for n, v in sorted(pie.items(), key=lambda kv: -kv[1])
+        },
+        "months": {m: {"income": round(inc[m], 2), "expense": round(exp[m], 2)} for m in months},
+        "balance_line": [[d.date().isoformat(), round(b, 2)] for d, b in line],
+    }
+
+
+def cmd_stats(core: FinanceCore, args) -> None:
+    json.dump(_stats(core, args.period), sys.stdout, ensure_ascii=False, indent=1)
+    sys.stdout.write("\n")
+
+
+def cmd_report(core: FinanceCore, args) -> None:
+    L = _lang(core)
+    s = _stats(core, args.period)
+    sign = CURRENCY_SIGN.get(core.currency, core.currency)
+
+    def money(v: float) -> str:
+        return f"{v:,.2f} {sign}"
+
+    print(f"{L['periods'][list(PERIODS).index(args.period)]} ({s['since'] or '…'} — "
+          f"{date.today().isoformat()})")
+    print(f"{L['balance']} {money(s['balance'])}")
+    print(f"{L['income']} {money(s['income'])}")
+    print(f"{L['expense']} {money(s['expense'])}")
+    if s["categories"]:
+        print(f"\n{L['g_pie']}:")
+        width = max(len(n) for n in s["categories"])
+        for n, v in list(s["categories"].items())[: args.top]:
+            share = v / s["expense"] * 100 if s["expense"] else 0
+            print(f"  {n:{width}}  {money(v):>16}  {share:5.1f}%")
+    if s["months"]:
+        print(f"\n{L['g_bar']}:")
+        for m, v in s["months"].items():
+            print(f"  {m}  {money(v['income']):>16}  {money(v['expense']):>16}")
+
+
+def cmd_import(core: FinanceCore, args) -> None:
+    n = core.import_operations(str(args.file))
+    print(_lang(core)["msg_imported"].format(n=n))
+
+
+def cmd_export(core: FinanceCore, args) -> None:
+    L = _lang(core)
+    if args.file.suffix.lower() not in EXPORT_FORMATS:
+        raise SystemExit(f"unsupported format: {args.file.suffix} ({', '.join(EXPORT_FORMATS)})")
+    cats = None
+    if args.category:
+        ids = {n.lower(): cid for cid, n in core.cat_names().items()}
+        missing = [c for c in args.category if c.lower() not in ids]
+        if missing:
+            raise SystemExit(f"unknown category: {', '.join(missing)}")
+        cats = [ids[c.lower()] for c in args.category]
+    # --to включительно, как в диалоге экспорта
+    start = args.date_from.isoformat() if args.date_from else None
+    end = (args.date_to + timedelta(days=1)).isoformat() if args.date_to else None
+    cols = (L["col_date"], L["col_sum"], L["col_cat"], L["col_note"])
+    n = core.export_operations(str(args.file), cols, start, end, cats)
+    print(L["msg_exported"].format(n=n, path=args.file))
+
+
+def cmd_import_fx(core: FinanceCore, args) -> None:
+    from dataLoad import read_fx_csv
+
+    n = core.add_fx_rates(read_fx_csv(args.file))
+    print(f"FX rates imported: {n}")
+
+
+def cmd_rebuild_rollup(core: FinanceCore, args) -> None:
+    core.db.rebuild_rollup()
+    core.db.rebuild_checkpoints()
+
+
+def run_gui(args) -> None:
+    from core import run_app
+
+    if args.profile is None:
+        run_app()
+        return
+    from profiling import run_profiled
+
+    run_profiled(run_app, args.profile)
+
+
+def parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(
+        prog="main.py", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    ap.add_argument("--db", type=Path, default=DB_FILE, help="база консольных команд")
+    ap.add_argument("--settings", type=Path, help="JSON-файл настроек консольных команд")
+    ap.add_argument(
+        "--profile", type=Path, nargs="?", const=Path("finance.prof"), metavar="FILE",
+        help="запустить GUI под cProfile (по умолчанию finance.prof)",
+    )
+    sub = ap.add_subparsers(dest="cmd", metavar="command")
+
+    for name, fn, help_ in (
+        ("report", cmd_report, "итоги за период текстом"),
+        ("stats", cmd_stats, "статистика за период в JSON"),
+    ):
+        p = sub.add_parser(name, help=help_)
+        p.add_argument("--period", choices=PERIODS, default="month")
+        p.add_argument("--currency", choices=CURRENCY_SIGN)
+        p.set_defaults(fn=fn)
+        if name == "report":
+            p.add_argument("--top", type=int, default=10, help="сколько категорий показать")
+
+    p = sub.add_parser("import", help="загрузить операции из CSV / OFX")
+    p.add_argument("file", type=Path)
+    p.set_defaults(fn=cmd_import)
+
+    p = sub.add_parser("export", help="выгрузить операции в " + " / ".join(EXPORT_FORMATS))
+    p.add_argument("file", type=Path)
+    p.add_argument("--from", dest="date_from", type=date.fromisoformat)
+    p.add_argument("--to", dest="date_to", type=date.fromisoformat)
+    p.add_argument("--category", action="append", help="можно повторять")
+    p.add_argument("--currency", choices=CURRENCY_SIGN)
+    p.set_defaults(fn=cmd_export)
+
+    p = sub.add_parser("import-fx", help="загрузить историю курсов из CSV")
+    p.add_argument("file", type=Path)
+    p.set_defaults(fn=cmd_import_fx)
+
+    p = sub.add_parser("rebuild-rollup", help="пересчитать MonthlyRollup и остатки на начало месяцев")
+    p.set_defaults(fn=cmd_rebuild_rollup)
+    return ap
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = parser()
+    args = ap.parse_args(argv)
+    if args.cmd is None:
+        run_gui(args)
+        return
+    if args.profile is not None:
+        ap.error("--profile запускает GUI и не сочетается с командами")
+    core = _open(args)
+    try:
+        args.fn(core, args)
+    finally:
+        core.close()
+
+
+if __name__ == "__main__":
+    main()
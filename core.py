@@ -1,35 +1,49 @@
 from __future__ import annotations
 
+import os
 import sys
+import time
 import logging
-from collections import defaultdict
-from datetime import datetime, timedelta
+import threading
+from datetime import date, datetime, timedelta
 from pathlib import Path
 
-import matplotlib.dates as mdates
-from PySide6.QtCore import Qt, QDate
+from PySide6.QtCore import Qt, QDate, QEvent, QObject, QTimer, Signal
+from PySide6.QtGui import QFontDatabase, QKeySequence, QShortcut
 from PySide6.QtWidgets import (
     QApplication,
     QComboBox,
+    QCheckBox,
+    QDateEdit,
     QDialog,
     QDialogButtonBox,
     QFileDialog,
+    QFormLayout,
     QLabel,
     QLineEdit,
     QMainWindow,
     QMessageBox,
-    QTableWidgetItem,
+    QPlainTextEdit,
+    QProgressBar,
+    QProgressDialog,
     QVBoxLayout,
 )
 
+import profiling
+from analytics import HAS_NUMPY
 from ui import Ui_MainWindow
+from models import ArrayTableModel, OperationsModel
+from workers import DbWorkers
 from dataBase import DataBase
-from dataLoad import SettingsManager, export_to_excel
-from exchange import RateProvider
+from dataLoad import EXPORT_FORMATS, SettingsManager
+from fincore import FinanceCore
 from variables import CURRENCY_SIGN, LANG
 
 logger = logging.getLogger(__name__)
 
+# порядок пунктов cmbDepCap
+DEPOSIT_CAPS = ("none", "daily", "monthly", "quarterly")
+
 
 class CategoryDialog(QDialog):
     def __init__(self, L: dict[str, str], income: bool = False, parent=None) -> None:
@@ -55,109 +69,89 @@ class CategoryDialog(QDialog):
         bb.rejected.connect(self.reject)
         v.addWidget(bb)
 
-class FinanceCore:
-    def __init__(self, db: DataBase) -> None:
-        self.db = db
-        self.settings = SettingsManager()
-        self.fx = RateProvider()
-
-        self.user_id = self.db.ensure_default_user()
-        self.account_id = self.db.ensure_default_account(self.user_id)
-        self._ensure_categories()
-
-    def add(self, date: QDate, amount_rub: float, cat: int, income: bool, note: str = ""):
-        self.db.add_operation(
-            self.account_id,
-            1 if income else 0,
-            abs(amount_rub),
-            cat,
-            datetime.combine(date.toPython(), datetime.min.time()),
-            note,
-        )
 
-    def delete(self, op_id: int) -> None:
-        self.db.delete_operation(op_id)
+class ExportDialog(QDialog):
+    """Фильтры экспорта: период и категория."""
+
+    def __init__(self, L: dict[str, str], categories, parent=None) -> None:
+        super().__init__(parent)
+        self.setWindowTitle(L["dlg_export_title"])
+
+        form = QFormLayout(self)
+        self.chkAll = QCheckBox(L["exp_all_time"], self)
+        self.chkAll.setChecked(True)
+        form.addRow(self.chkAll)
+
+        today = QDate.currentDate()
+        self.edFrom = QDateEdit(today.addMonths(-1), self)
+        self.edTo = QDateEdit(today, self)
+        for ed in (self.edFrom, self.edTo):
+            ed.setCalendarPopup(True)
+            ed.setEnabled(False)
+            self.chkAll.toggled.connect(lambda on, ed=ed: ed.setEnabled(not on))
+        form.addRow(L["exp_from"], self.edFrom)
+        form.addRow(L["exp_to"], self.edTo)
+
+        self.cmbCat = QComboBox(self)
+        self.cmbCat.addItem(L["exp_all_cats"], None)
+        for cid, name in categories:
+            self.cmbCat.addItem(name, cid)
+        form.addRow(L["exp_cat"], self.cmbCat)
+
+        bb = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, self)
+        bb.button(QDialogButtonBox.Ok).setText(L.get("btn_ok", "OK"))
+        bb.button(QDialogButtonBox.Cancel).setText(L.get("btn_cancel", "Cancel"))
+        bb.accepted.connect(self.accept)
+        bb.rejected.connect(self.reject)
+        form.addRow(bb)
+
+    def filters(self) -> tuple[str | None, str | None, list[int] | None]:
+        """(начало, конец не включительно, категории) для DataBase.iter_operations."""
+        cid = self.cmbCat.currentData()
+        cats = None if cid is None else [cid]
+        if self.chkAll.isChecked():
+            return None, None, cats
+        start = self.edFrom.date().toPython()
+        end = self.edTo.date().toPython() + timedelta(days=1)
+        return start.isoformat(), end.isoformat(), cats
+
 
-    def ops(self):
-        return self.db.list_operations(self.account_id)
+class DiagnosticsDialog(QDialog):
+    """Скрытая панель (Ctrl+Shift+D): сводка замеров из ``profiling``."""
 
-    def balance(self) -> float:
-        return self.db.get_account_balance(self.account_id) / 100
+    def __init__(self, L: dict[str, str], parent=None) -> None:
+        super().__init__(parent)
+        self.setWindowTitle(L["diag_title"])
+        self.resize(900, 500)
+        self._L = L
 
-    def totals(self) -> tuple[float, float]:
-        inc = exp = 0
-        for o in self.ops():
-            v = o["amount"] / 100
-            inc += v if o["type"] else 0
-            exp += v if not o["type"] else 0
-        return inc, exp
+        v = QVBoxLayout(self)
+        self.text = QPlainTextEdit(self)
+        self.text.setReadOnly(True)
+        self.text.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        v.addWidget(self.text)
+
+        bb = QDialogButtonBox(QDialogButtonBox.Close, self)
+        self.btnRefresh = bb.addButton(L["diag_refresh"], QDialogButtonBox.ActionRole)
+        self.btnReset = bb.addButton(L["diag_reset"], QDialogButtonBox.ResetRole)
+        self.btnRefresh.clicked.connect(self.refresh)
+        self.btnReset.clicked.connect(lambda: (profiling.reset(), self.refresh()))
+        bb.rejected.connect(self.reject)
+        v.addWidget(bb)
+        self.refresh()
 
-    def _ensure_categories(self):
-        if self.db.get_categories(self.user_id):
+    def refresh(self) -> None:
+        if not profiling.enabled():
+            self.text.setPlainText(self._L["diag_off"])
             return
-        for n in ("Еда", "Транспорт", "Развлечения"):
-            self.db.add_category(self.user_id, n, 0)
-        for n in ("Зарплата", "Подарок"):
-            self.db.add_category(self.user_id, n, 1)
-
-    def cats(self, income: bool):
-        cat_type = 1 if income else 0
-        return [
-            (c["id"], c["name"]) for c in self.db.get_categories(self.user_id, cat_type)
-        ]
-
-    def stats(self, days: int | None):
-        ops = sorted(self.ops(), key=lambda o: o["date"])
-        if days is not None:
-            border = datetime.now() - timedelta(days=days)
-            ops = [o for o in ops if datetime.fromisoformat(o["date"]) >= border]
-
-        pie, inc, exp = defaultdict(float), defaultdict(float), defaultdict(float)
-        bal = 0
-        line: list[tuple[datetime, float]] = []
-
-        for o in ops:
-            sign = 1 if o["type"] else -1
-            v = sign * o["amount"] / 100
-            dt = datetime.fromisoformat(o["date"])
-
-            bal += v
-            line.append((dt, bal))
-
-            m = dt.strftime("%Y-%m")
-            (inc if o["type"] else exp)[m] += abs(v)
-
-            if not o["type"]:
-                pie[o["category_name"] or "—"] += abs(v)
-
-        return pie, inc, exp, line
-
-    def cv(self, amount: float, frm: str, to: str) -> float:
-        return amount * self.fx[frm] / self.fx[to]
-
-    def credit(self, p, r, n):
-        return (
-            0
-            if n == 0
-            else (
-                p
-                * ((r / 12 / 100) * (1 + r / 12 / 100) ** n)
-                / (((1 + r / 12 / 100) ** n) - 1)
-                if r
-                else p / n
-            )
-        )
+        self.text.setPlainText(profiling.summary())
+
+
+class _RatesBridge(QObject):
+    """Переносит уведомление RateProvider из фонового потока в GUI-поток."""
+
+    updated = Signal(dict)
 
-    def deposit(self, i, r, n, m, cap=True):
-        if n == 0:
-            return i
-        if cap:
-            s = i
-            r = r / 12 / 100
-            for _ in range(n):
-                s = (s + m) * (1 + r)
-            return round(s, 2)
-        return round(i + i * r / 100 * (n / 12) + m * n, 2)
 
 class FinanceApp(QMainWindow):
     def __init__(self):
@@ -165,10 +159,46 @@ class FinanceApp(QMainWindow):
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
 
-        self.core = FinanceCore(DataBase())
+        conf = SettingsManager()
+        self.core = FinanceCore(DataBase(pragmas={
+            "cache_size": -1024 * int(conf.get("db_cache_mb")),
+            "mmap_size": int(conf.get("db_mmap_mb")) << 20,
+        }), conf)
         self.conf = self.core.settings.all()
         self.k = self.core.fx[self.conf["currency"]]
 
+        self.workers = DbWorkers(self.core.db, self)
+        self.busy = QProgressBar(self)
+        self.busy.setRange(0, 0)
+        self.busy.setMaximumWidth(120)
+        self.busy.hide()
+        self.statusBar().addPermanentWidget(self.busy)
+        self.workers.busy_changed.connect(self.busy.setVisible)
+        self.workers.progress.connect(self._worker_progress)
+        self._export_prog: QProgressDialog | None = None
+        self._import_prog: QProgressDialog | None = None
+
+        self.model = OperationsModel(self.core, self._money, self, self.workers)
+        self.ui.table.setModel(self.model)
+        self.schedule_model = ArrayTableModel(self._amount, self)
+        self.scenario_model = ArrayTableModel(self._amount, self)
+        self.deposit_model = ArrayTableModel(self._amount, self)
+        self.dep_heatmap = None  # создаётся при первом расчёте вклада
+        self.ui.tableSchedule.setModel(self.schedule_model)
+        self.ui.tableScenarios.setModel(self.scenario_model)
+        self.ui.tableDeposit.setModel(self.deposit_model)
+        self.ui.chkForecast.setEnabled(HAS_NUMPY)
+        # поиск запускается, когда пользователь перестал печатать
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(200)
+        self._search_timer.timeout.connect(
+            lambda: self.model.set_query(self.ui.editSearch.text())
+        )
+        self.charts = None  # см. _ensure_charts
+        self._fc = None  # ((версия операций, горизонт), прогноз)
+        self._cats_shown: tuple[bool, int] | None = None
+
         self._apply_lang()
         self._apply_theme()
         self._sync_settings_ui()
@@ -178,8 +208,25 @@ class FinanceApp(QMainWindow):
         self._ind()
         self._sig()
 
-    def _money(self, r: float) -> str:
-        return f"{r / self.k:,.2f} {CURRENCY_SIGN[self.conf['currency']]}"
+        self._rates = _RatesBridge(self)
+        self._rates.updated.connect(self._rates_updated)
+        self.core.fx.subscribe(self._rates.updated.emit)
+        self.core.fx.refresh_async()
+
+    def _rates_updated(self, rates: dict):
+        self.core.add_fx_rates((date.today(), code, rate) for code, rate in rates.items())
+        self.k = rates[self.conf["currency"]]
+        self.model.refresh()
+        self._ind()
+        self._charts()
+
+    def _money(self, r: float, rate: float | None = None) -> str:
+        """Рубли в валюте отображения: по курсу rate (на дату операции) или текущему."""
+        return f"{r / (rate or self.k):,.2f} {CURRENCY_SIGN[self.conf['currency']]}"
+
+    def _amount(self, r: float) -> str:
+        """Как _money, но без знака валюты — в таблицах кредита он в заголовках."""
+        return f"{r / self.k:,.2f}"
 
     def _sync_settings_ui(self):
         self.ui.cmbLang.setCurrentIndex(0 if self.conf["lang"] == "ru" else 1)
@@ -207,6 +254,8 @@ class FinanceApp(QMainWindow):
         self.ui.btnDelete.setText(L["btn_del"])
         self.ui.btnAddCat.setText(L["btn_add_cat"])
         self.ui.btnExport.setText(L["btn_export"])
+        self.ui.btnImport.setText(L["btn_import"])
+        self.ui.editSearch.setPlaceholderText(L["search_ph"])
         self.ui.btnConvert.setText(L["btn_convert"])
         self.ui.btnCreditCalc.setText(L["btn_credit"])
         self.ui.btnDepCalc.setText(L["btn_deposit"])
@@ -225,15 +274,26 @@ class FinanceApp(QMainWindow):
         self.ui.formCredit.labelForField(self.ui.spinCreditSum).setText(L["loan_sum"])
         self.ui.formCredit.labelForField(self.ui.spinCreditRate).setText(L["loan_rate"])
         self.ui.formCredit.labelForField(self.ui.spinCreditTerm).setText(L["loan_term"])
+        self.ui.formCredit.labelForField(self.ui.cmbCreditKind).setText(L["loan_kind"])
+        self.ui.formCredit.labelForField(self.ui.wCreditExtra).setText(L["loan_extra"])
+        self.ui.formCredit.labelForField(self.ui.cmbCreditReduce).setText(L["loan_reduce"])
+        for cmb, key in ((self.ui.cmbCreditKind, "loan_kinds"), (self.ui.cmbCreditReduce, "loan_reduces")):
+            for i, text in enumerate(L[key]):
+                cmb.setItemText(i, text)
+        self.ui.tabsCalc.setTabText(0, L["tab_schedule"])
+        self.ui.tabsCalc.setTabText(1, L["tab_scenarios"])
+        self.ui.tabsCalc.setTabText(2, L["tab_dep_growth"])
+        self.ui.tabsCalc.setTabText(3, L["tab_dep_grid"])
 
         self.ui.formDeposit.labelForField(self.ui.spinDepInit).setText(L["dep_init"])
         self.ui.formDeposit.labelForField(self.ui.spinDepRate).setText(L["dep_rate"])
         self.ui.formDeposit.labelForField(self.ui.spinDepTerm).setText(L["dep_term"])
         self.ui.formDeposit.labelForField(self.ui.spinDepMonthly).setText(L["dep_month"])
-        self.ui.formDeposit.labelForField(self.ui.chkDepCap).setText(L["lbl_cap"])
+        self.ui.formDeposit.labelForField(self.ui.cmbDepCap).setText(L["lbl_cap"])
+        for i, text in enumerate(L["dep_caps"]):
+            self.ui.cmbDepCap.setItemText(i, text)
 
-        for i, h in enumerate((L["col_date"], L["col_sum"], L["col_cat"], L["col_note"])):
-            self.ui.table.horizontalHeaderItem(i).setText(h)
+        self.model.set_headers((L["col_date"], L["col_sum"], L["col_cat"], L["col_note"]))
 
         self.ui.grpPie.setTitle(L["g_pie"])
         self.ui.grpBar.setTitle(L["g_bar"])
@@ -244,6 +304,7 @@ class FinanceApp(QMainWindow):
         self.ui.period_box.clear()
         self.ui.period_box.addItems(L["periods"])
         self.ui.period_box.blockSignals(False)
+        self.ui.chkForecast.setText(L["chk_forecast"])
 
         self.ui.formSettings.labelForField(self.ui.cmbLang).setText(L["set_lang"])
         self.ui.formSettings.labelForField(self.ui.cmbTheme).setText(L["set_theme"])
@@ -275,6 +336,11 @@ class FinanceApp(QMainWindow):
         self._fill_cats()
 
     def _fill_cats(self):
+        # комбобокс пересобирается, только если сменился тип или справочник
+        key = (self._is_income(), self.core.cat_version)
+        if key == self._cats_shown:
+            return
+        self._cats_shown = key
         self.ui.cmbCategory.clear()
         for cid, name in self.core.cats(self._is_income()):
             self.ui.cmbCategory.addItem(name, cid)
@@ -287,82 +353,159 @@ class FinanceApp(QMainWindow):
         if not name:
             return
         income = dlg.cmbType.currentIndex() == 1
-        self.core.db.add_category(self.core.user_id, name, 1 if income else 0)
-        if income == self._is_income():
-            self._fill_cats()
+        self.core.add_category(name, 1 if income else 0)
+        self._fill_cats()
 
     def _fill_table(self):
-        tab = self.ui.table
-        ops = self.core.ops()
-        tab.clearContents()
-        tab.setRowCount(len(ops))
-        for r, o in enumerate(ops):
-            dt_text = datetime.fromisoformat(o["date"]).strftime("%d.%m.%Y")
-            sign = 1 if o["type"] else -1
-            value = sign * o["amount"] / 100
-            items = [
-                QTableWidgetItem(dt_text),
-                QTableWidgetItem(self._money(value)),
-                QTableWidgetItem(o["category_name"] or "—"),
-                QTableWidgetItem(o["note"] or ""),
-            ]
-            for c, it in enumerate(items):
-                it.setFlags(it.flags() & ~Qt.ItemIsEditable)
-                tab.setItem(r, c, it)
-            tab.item(r, 0).setData(Qt.UserRole, o["id"])
+        self.model.reload()
 
     def _ind(self):
-        bal = self.core.balance()
-        inc, exp = self.core.totals()
-        self.ui.lblBalance.setText(self._money(bal))
+        self.ui.lblBalance.setText(self._money(self.core.balance()))
+        self.workers.submit(
+            "totals", lambda db: self.core.totals(db), on_done=self._show_totals
+        )
+
+    def _show_totals(self, totals: tuple[float, float]):
+        inc, exp = totals
         self.ui.lblIncome.setText(self._money(inc))
         self.ui.lblExpense.setText(self._money(exp))
 
-    def _export_excel(self):
-        path, _ = QFileDialog.getSaveFileName(
-            self, self._L["btn_export"], "operations.xlsx", "Excel (*.xlsx)"
+    def _export(self):
+        cats = sorted(self.core.cat_names().items(), key=lambda c: c[1])
+        dlg = ExportDialog(self._L, cats, self)
+        if dlg.exec() != QDialog.Accepted:
+            return
+        start, end, cats = dlg.filters()
+
+        path, flt = QFileDialog.getSaveFileName(
+            self, self._L["btn_export"], "operations.xlsx", ";;".join(EXPORT_FORMATS.values())
         )
         if not path:
             return
+        if Path(path).suffix.lower() not in EXPORT_FORMATS:
+            path += next((s for s, f in EXPORT_FORMATS.items() if f == flt), ".xlsx")
 
-        rows = []
-        for r in range(self.ui.table.rowCount()):
-            rows.append(
-                {
-                    self._L["col_date"]: self.ui.table.item(r, 0).text(),
-                    self._L["col_sum"]: self.ui.table.item(r, 1).text(),
-                    self._L["col_cat"]: self.ui.table.item(r, 2).text(),
-                    self._L["col_note"]: self.ui.table.item(r, 3).text(),
-                }
-            )
-
-        if not rows:
+        total = self.core.ops_count(start, end, cats)
+        if not total:
             QMessageBox.information(self, "", self._msg_no_data)
             return
 
-        try:
-            export_to_excel(rows, path)
-            QMessageBox.information(self, "", self._msg_saved)
-        except Exception as e:
-            logger.exception("Save Excel error")
-            QMessageBox.critical(self, "Error", f"{self._msg_err_save}\n{e}")
+        prog = QProgressDialog(self._L["export_progress"], self._L["btn_cancel"], 0, total, self)
+        prog.setWindowModality(Qt.WindowModal)
+        prog.setMinimumDuration(300)
+        cancel = threading.Event()
+        prog.canceled.connect(cancel.set)
+        self._export_prog = prog
+
+        def report(n: int):
+            if cancel.is_set():
+                raise InterruptedError("cancelled")
+            self.workers.progress.emit("export", n)
+
+        def done(n: int):
+            self._export_prog = None
+            prog.close()
+            QMessageBox.information(self, "", self._L["msg_exported"].format(n=n, path=path))
+
+        def failed(err: str):
+            # close() тоже шлёт canceled — запоминаем отмену до закрытия
+            cancelled = cancel.is_set()
+            self._export_prog = None
+            prog.close()
+            if cancelled:
+                Path(path).unlink(missing_ok=True)
+                return
+            logger.error("Export error: %s", err)
+            QMessageBox.critical(self, "Error", f"{self._msg_err_save}\n{err}")
+
+        cols = (self._L["col_date"], self._L["col_sum"], self._L["col_cat"], self._L["col_note"])
+        self.workers.submit(
+            "export",
+            lambda db: self.core.export_operations(path, cols, start, end, cats, report, db),
+            on_done=done,
+            on_error=failed,
+        )
+
+    def _worker_progress(self, channel: str, n: int):
+        if channel == "export" and self._export_prog is not None:
+            self._export_prog.setValue(min(n, self._export_prog.maximum()))
+        elif channel == "import" and self._import_prog is not None:
+            self._import_prog.setLabelText(f"{self._L['import_progress']} {n:,}")
+
+    def _import_file(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, self._L["btn_import"], "", "CSV / OFX (*.csv *.ofx *.qfx)"
+        )
+        if not path:
+            return
+
+        # запись идёт в фоне на своём соединении; окно заблокировано диалогом,
+        # так что операции в это время никто не добавляет
+        dlg = QProgressDialog(self._L["import_progress"], self._L["btn_cancel"], 0, 0, self)
+        dlg.setWindowModality(Qt.WindowModal)
+        dlg.setMinimumDuration(300)
+        cancel = threading.Event()
+        dlg.canceled.connect(cancel.set)
+        self._import_prog = dlg
+
+        def report(n: int):
+            if cancel.is_set():
+                raise InterruptedError("cancelled")
+            self.workers.progress.emit("import", n)
+
+        def finish() -> bool:
+            # close() тоже шлёт canceled — запоминаем отмену до закрытия
+            cancelled = cancel.is_set()
+            self._import_prog = None
+            dlg.close()
+            self._fill_cats()
+            self._fill_table()
+            self._ind()
+            self._charts()
+            return cancelled
+
+        def done(n: int):
+            finish()
+            QMessageBox.information(self, "", self._L["msg_imported"].format(n=n))
+
+        def failed(err: str):
+            if finish():
+                return
+            logger.error("Import error: %s", err)
+            QMessageBox.critical(self, "Error", f"{self._L['msg_err_import']}\n{err}")
+
+        self.workers.submit(
+            "import",
+            lambda db: self.core.import_operations(path, report, db),
+            on_done=done,
+            on_error=failed,
+            write=True,
+        )
 
     def _sig(self):
         u = self.ui
         u.btnAdd.clicked.connect(self._add)
         u.btnDelete.clicked.connect(self._del)
         u.btnAddCat.clicked.connect(self._add_category)
-        u.btnExport.clicked.connect(self._export_excel)
+        u.btnExport.clicked.connect(self._export)
+        u.btnImport.clicked.connect(self._import_file)
         u.cmbType.currentIndexChanged.connect(self._type_changed)
-        u.table.cellDoubleClicked.connect(self._show_note)
+        u.table.doubleClicked.connect(self._show_note)
+        u.editSearch.textChanged.connect(self._search_timer.start)
 
         u.btnConvert.clicked.connect(self._conv)
         u.btnCreditCalc.clicked.connect(self._loan)
         u.btnDepCalc.clicked.connect(self._dep)
+        u.tabsCalc.currentChanged.connect(
+            lambda i: self.dep_heatmap.flush() if self.dep_heatmap is not None else None
+        )
 
         u.btnSaveSettings.clicked.connect(self._save)
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self, self._diagnostics)
 
         u.period_box.currentIndexChanged.connect(self._charts)
+        u.chkForecast.toggled.connect(self._forecast)
+        u.spinForecast.valueChanged.connect(self._forecast)
         u.tabs.currentChanged.connect(
             lambda i: self._charts()
             if u.tabs.widget(i) is u.tab_analytics
@@ -376,35 +519,35 @@ class FinanceApp(QMainWindow):
 
         amount_rub = self.core.cv(raw_amt, self.conf["currency"], "RUB")
 
-        self.core.add(
-            self.ui.dateEdit.date(),
+        op_id = self.core.add(
+            self.ui.dateEdit.date().toPython(),
             amount_rub,
             self.ui.cmbCategory.currentData(),
             self._is_income(),
             self.ui.lineNote.text(),
         )
-        self._fill_table()
+        self.model.insert_op(op_id)
         self._ind()
         self._charts()
         self.ui.spinAmount.setValue(0)
         self.ui.lineNote.clear()
 
     def _del(self):
-        row = self.ui.table.currentRow()
-        if row == -1:
+        index = self.ui.table.currentIndex()
+        if not index.isValid():
             return
         if QMessageBox.question(self, "", self._msg_del) == QMessageBox.Yes:
-            self.core.delete(self.ui.table.item(row, 0).data(Qt.UserRole))
-            self._fill_table()
+            self.core.delete(self.model.op_id(index.row()))
+            self.model.remove_row(index.row())
             self._ind()
             self._charts()
 
-    def _show_note(self, row: int, col: int):
-        if col != 3:
+    def _show_note(self, index):
+        if index.column() != 3:
             return
-        item = self.ui.table.item(row, col)
-        if item and item.text().strip():
-            QMessageBox.information(self, self._note_title, item.text(), QMessageBox.Ok)
+        text = index.data()
+        if text and text.strip():
+            QMessageBox.information(self, self._note_title, text, QMessageBox.Ok)
 
     def _conv(self):
         a = self.ui.spinConvAmount.value()
@@ -416,22 +559,58 @@ class FinanceApp(QMainWindow):
         )
 
     def _loan(self):
-        pay = self.core.credit(
-            self.ui.spinCreditSum.value(),
-            self.ui.spinCreditRate.value(),
-            self.ui.spinCreditTerm.value(),
-        )
-        self.ui.lblCreditResult.setText(self._money(pay))
+        u = self.ui
+        p, r, n = u.spinCreditSum.value(), u.spinCreditRate.value(), u.spinCreditTerm.value()
+        if not HAS_NUMPY:
+            u.lblCreditResult.setText(self._money(self.core.credit(p, r, n)))
+            return
+        L = LANG[self.conf["lang"]]
+        kind = "differentiated" if u.cmbCreditKind.currentIndex() else "annuity"
+        reduce = "payment" if u.cmbCreditReduce.currentIndex() else "term"
+        extra = {u.spinCreditExtraMonth.value(): u.spinCreditExtra.value()}
+        s = self.core.credit_schedule(p, r, n, kind, extra, reduce)
+        if not s.months:
+            u.lblCreditResult.setText("—")
+        elif kind == "annuity" and not s.extra.any():
+            u.lblCreditResult.setText(L["loan_result"].format(
+                pay=self._money(s.payment[0]), over=self._money(s.total_paid - p)))
+        else:
+            u.lblCreditResult.setText(L["loan_result_diff"].format(
+                first=self._money(s.payment[0]), last=self._money(s.payment[-1]),
+                over=self._money(s.total_paid - p)))
+        sign = CURRENCY_SIGN[self.conf["currency"]]
+        self.schedule_model.set_data(
+            (s.payment, s.interest, s.principal, s.extra, s.balance),
+            [f"{c}, {sign}" for c in L["schedule_cols"]])
+
+        rates, terms, pay, over = self.core.credit_grid(p, r, n, kind)
+        self.scenario_model.set_data(
+            pay.T, [f"{x:g} %" for x in rates],
+            [L["term_months"].format(n=t) for t in terms], over.T)
 
     def _dep(self):
-        tot = self.core.deposit(
-            self.ui.spinDepInit.value(),
-            self.ui.spinDepRate.value(),
-            self.ui.spinDepTerm.value(),
-            self.ui.spinDepMonthly.value(),
-            self.ui.chkDepCap.isChecked(),
+        u = self.ui
+        i, r, n = u.spinDepInit.value(), u.spinDepRate.value(), u.spinDepTerm.value()
+        m = u.spinDepMonthly.value()
+        cap = DEPOSIT_CAPS[u.cmbDepCap.currentIndex()]
+        u.lblDepResult.setText(self._money(self.core.deposit(i, r, n, m, cap)))
+        if not HAS_NUMPY:
+            return
+        L = LANG[self.conf["lang"]]
+        sign = CURRENCY_SIGN[self.conf["currency"]]
+        paid, bal = self.core.deposit_series(i, r, n, m, cap)
+        self.deposit_model.set_data(
+            (paid, bal - paid, bal), [f"{c}, {sign}" for c in L["deposit_cols"]])
+
+        if self.dep_heatmap is None:
+            from charts import HeatmapChart
+
+            u.build_deposit_chart()
+            self.dep_heatmap = HeatmapChart(u.canvas_dep_heat)
+        grid = self.core.deposit_grid(i, m, cap) / self.k
+        self.dep_heatmap.update(
+            (self.core.DEPOSIT_RATES, self.core.DEPOSIT_TERMS, grid.tolist(), (r, n))
         )
-        self.ui.lblDepResult.setText(self._money(tot))
 
     def _save(self):
         lang = "ru" if self.ui.cmbLang.currentIndex() == 0 else "en"
@@ -441,90 +620,149 @@ class FinanceApp(QMainWindow):
             self.core.settings.set(k, v)
             self.conf[k] = v
         self.core.settings.sync()
+        cur_changed = cur != self.core.currency
+        self.core.currency = cur
         self.k = self.core.fx[cur]
         self._apply_lang()
         self._apply_theme()
         self._sync_settings_ui()
-        self._fill_table()
+        if cur_changed:
+            # курс на дату операции приходит вместе со строками ленты
+            self._fill_table()
+        else:
+            self.model.refresh()
+        # заголовки и суммы калькуляторов зависят от языка и валюты
+        if self.schedule_model.rowCount():
+            self._loan()
+        if self.deposit_model.rowCount():
+            self._dep()
         self._ind()
         self._charts()
 
+    def _ensure_charts(self):
+        if self.charts is None:
+            from charts import AnalyticsCharts
+
+            self.ui.build_charts()
+            self.charts = AnalyticsCharts(self.ui)
+        return self.charts
+
     def _charts(self):
         if self.ui.tabs.currentWidget() is not self.ui.tab_analytics:
             return
+        self._ensure_charts()
         dmap = {0: 7, 1: 30, 2: 365, 3: None}
-        pie, inc, exp, ln = self.core.stats(dmap[self.ui.period_box.currentIndex()])
-        k = self.k
+        days = dmap[self.ui.period_box.currentIndex()]
+        cached = self.core.cached_stats(days)
+        if cached is not None:
+            self.workers.cancel("stats")
+            self._draw_charts(*cached)
+            return
 
-        ax = self.ui.canvas_pie.figure.axes[0]
-        ax.clear()
-        if pie:
-            ax.pie([v / k for v in pie.values()], labels=pie.keys(), autopct="%1.1f%%")
-        else:
-            ax.text(0.5, 0.5, "Нет данных", ha="center", va="center")
-        self.ui.canvas_pie.figure.tight_layout()
-        self.ui.canvas_pie.draw()
+        version = self.core.version
+        self.workers.submit(
+            "stats",
+            lambda db, since: self.core.compute_stats(since, db),
+            self.core.border(days),
+            on_done=lambda st: self._stats_ready(days, version, st),
+        )
+
+    def _stats_ready(self, days, version: int, st):
+        # если операции успели измениться, статистика не примется
+        # и _charts запросит пересчёт
+        self.core.install_stats(days, version, st)
+        self._charts()
+
+    def _draw_charts(self, pie, inc, exp, ln):
+        # суммы уже в валюте отображения
+        self.charts.pie.update(tuple(pie.items()))
 
-        ax = self.ui.canvas_bar.figure.axes[0]
-        ax.clear()
         months = sorted(set(inc) | set(exp))
-        if months:
-            idx = range(len(months))
-            iv = [inc.get(m, 0) / k for m in months]
-            ev = [exp.get(m, 0) / k for m in months]
-            ax.bar(idx, iv, width=0.4, label="Inc")
-            ax.bar(idx, ev, width=0.4, bottom=iv, color="#D86969", label="Exp")
-            sameY = all(m.startswith(datetime.now().strftime("%Y")) for m in months)
-            ax.set_xticks(idx)
-            ax.set_xticklabels(
-                [m[5:] if sameY else m for m in months], rotation=45, ha="right"
-            )
-            ax.set_xlim(-0.5, len(months) - 0.5)
-            ax.legend()
-        else:
-            ax.text(0.5, 0.5, "Нет данных", ha="center", va="center")
-        self.ui.canvas_bar.figure.tight_layout()
-        self.ui.canvas_bar.draw()
-
-        ax = self.ui.canvas_line.figure.axes[0]
-        ax.clear()
-        if ln:
-            dt, b = zip(*ln)
-            ax.plot(dt, [x / k for x in b], marker=".")
-            ax.xaxis.set_major_formatter(mdates.DateFormatter("%d.%m"))
-            if dt[0] == dt[-1]:
-                ax.set_xlim(dt[0] - timedelta(days=1), dt[0] + timedelta(days=1))
-            else:
-                ax.set_xlim(dt[0], dt[-1])
-            ax.figure.autofmt_xdate()
-        else:
-            ax.text(0.5, 0.5, "Нет данных", ha="center", va="center")
-        self.ui.canvas_line.figure.tight_layout()
-        self.ui.canvas_line.draw()
+        self.charts.bar.update(
+            tuple((m, inc.get(m, 0), exp.get(m, 0)) for m in months)
+        )
+
+        self.charts.line.update(tuple(ln))
+        self._forecast()
 
-        ax = self.ui.canvas_donut.figure.axes[0]
-        ax.clear()
         inc_total, exp_total = sum(inc.values()), sum(exp.values())
-        if inc_total or exp_total:
-            labels = [
-                self._L["income"].rstrip(":"),
-                self._L["expense"].rstrip(":"),
-            ]
-            ax.pie(
-                [inc_total / k, exp_total / k],
-                labels=labels,
-                wedgeprops=dict(width=0.4),
-                autopct="%1.1f%%",
+        self.charts.donut.update(
+            (
+                (self._L["income"].rstrip(":"), inc_total),
+                (self._L["expense"].rstrip(":"), exp_total),
             )
-            ax.set(aspect="equal")
-        else:
-            ax.text(0.5, 0.5, "Нет данных", ha="center", va="center")
-        self.ui.canvas_donut.figure.tight_layout()
-        self.ui.canvas_donut.draw()
+        )
+
+    def _forecast(self):
+        """Полосы прогноза на графике баланса; результат кешируется до
+        изменения операций или горизонта."""
+        if self.charts is None:
+            return
+        if not self.ui.chkForecast.isChecked():
+            self.workers.cancel("forecast")
+            self.charts.line.set_forecast(None)
+            return
+        key = (self.core.version, self.ui.spinForecast.value())
+        if self._fc is not None and self._fc[0] == key:
+            self._draw_forecast(self._fc[1])
+            return
+        self.workers.submit(
+            "forecast",
+            lambda db, months: self.core.forecast(months, db),
+            key[1],
+            on_done=lambda res: self._forecast_ready(key, res),
+        )
+
+    def _forecast_ready(self, key, res):
+        self._fc = (key, res)
+        self._draw_forecast(res)
+
+    def _draw_forecast(self, res):
+        if res is None or not self.ui.chkForecast.isChecked():
+            self.charts.line.set_forecast(None)
+            return
+        days, bands = res
+        self.charts.line.set_forecast((
+            tuple(datetime(d.year, d.month, d.day) for d in days),
+            tuple(tuple((b / self.k).tolist()) for b in bands),
+        ))
+
+    def _diagnostics(self):
+        DiagnosticsDialog(self._L, self).exec()
+
+    def closeEvent(self, event):
+        self.workers.shutdown()
+        self.core.close()
+        super().closeEvent(event)
+
+
+class _FirstPaintProbe(QObject):
+    """Замер холодного старта: печатает время до первой отрисовки окна и
+    завершает приложение. Включается переменной FINANCE_STARTUP_PROBE со
+    значением time.time() на момент запуска процесса (см. bench.py startup)."""
+
+    def __init__(self, t0: float, app: QApplication) -> None:
+        super().__init__(app)
+        self._t0 = t0
+        self._app = app
+
+    def eventFilter(self, obj, event) -> bool:
+        if event.type() == QEvent.Paint and obj.isWindow():
+            print(f"first_paint={time.time() - self._t0:.4f}", flush=True)
+            self._app.removeEventFilter(self)
+            self._app.quit()
+        return False
 
 
 def run_app():
     app = QApplication(sys.argv)
+    if profiling.requested(SettingsManager()):
+        profiling.install(
+            DataBase, FinanceCore, (FinanceApp, ("_fill_table", "_ind", "_charts"))
+        )
+    probe = os.environ.get("FINANCE_STARTUP_PROBE")
+    if probe:
+        app.installEventFilter(_FirstPaintProbe(float(probe), app))
     app.setStyleSheet((Path(__file__).parent / "styles/light.qss").read_text())
     w = FinanceApp()
     w.show()
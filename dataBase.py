@@ -1,17 +1,234 @@
+import os
+import queue
+import re
 import sqlite3
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
+from typing import Callable, Iterable, Iterator
+
+DB_FILE = Path(os.environ.get("FINANCE_DB") or Path(__file__).with_name("finance.db"))
+
+# cache_size < 0 — в КиБ; mmap_size — в байтах
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64 * 1024,
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+# режим журнала и синхронизация задаются только пишущим соединением
+_WRITER_ONLY = ("journal_mode", "synchronous")
+
+_DATE_MIN, _DATE_MAX = "", "\uffff"
+_OPERATION_STEP = re.compile(r"(SCAN|SEARCH) (Operation|o)\b")
+_SEARCH_TOKEN = re.compile(r"\w+")
+# до скольких совпадений в FTS выгоднее отсортировать их, чем идти по ленте
+_FTS_SORT_LIMIT = 5000
+
+
+def _date_range(start: datetime | str | None, end: datetime | str | None) -> tuple[str, str]:
+    def iso(d, default):
+        if d is None:
+            return default
+        return d if isinstance(d, str) else d.isoformat()
+
+    return iso(start, _DATE_MIN), iso(end, _DATE_MAX)
+
+
+def _fts_query(text: str) -> str:
+    """Строка поиска -> запрос FTS5: все слова обязательны, каждое — как префикс."""
+    text = text.replace("ё", "е").replace("Ё", "Е")
+    return " ".join(f'"{t}"*' for t in _SEARCH_TOKEN.findall(text))
+
+
+# unicode61 не сводит «ё» к «е», поэтому в индекс попадает нормализованный
+# текст; удаление из индекса должно повторять то же выражение
+_FTS_NOTE = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _category_filter(category_ids: Iterable[int] | None, col: str = "category_id") -> tuple[str, tuple]:
+    if category_ids is None:
+        return "", ()
+    ids = tuple(category_ids)
+    return f" AND {col} IN ({', '.join('?' * len(ids)) or 'NULL'})", ids
+
+
+# курс на день операции: последний известный, а для операций раньше всех
+# известных курсов — самый ранний
+_FX_AT_OP = """COALESCE(
+                       (SELECT f.rate FROM FxRate f
+                        WHERE f.code = ? AND f.date <= substr(o.date, 1, 10)
+                        ORDER BY f.date DESC LIMIT 1),
+                       (SELECT f.rate FROM FxRate f
+                        WHERE f.code = ? ORDER BY f.date LIMIT 1))"""
+
+
+def _month_split(since: str | None) -> tuple[str, str]:
+    """(месяц начала окна, начало следующего месяца) для окна с даты since."""
+    if not since:
+        return "", ""
+    y, m = int(since[:4]), int(since[5:7])
+    y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return since[:7], f"{y:04d}-{m:02d}"
+
+
+class _PlanRecorder:
+    """Подменяет соединение и запоминает выполненные запросы."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+        self.calls: list[tuple[str, tuple]] = []
+
+    def execute(self, sql: str, params=()):
+        self.calls.append((sql, tuple(params)))
+        return self._conn.execute(sql, params)
+
+
+def _apply_pragmas(conn: sqlite3.Connection, pragmas: dict, writer: bool) -> None:
+    for key, value in pragmas.items():
+        if writer or key not in _WRITER_ONLY:
+            conn.execute(f"PRAGMA {key} = {value};")
 
-DB_FILE = Path(__file__).with_name("finance.db")
 
 class DataBase:
-    def __init__(self, db_path: Path | str = DB_FILE):
+    """Одно пишущее соединение (``conn``) и пул соединений только для чтения.
+
+    База работает в режиме WAL: читатели из пула не блокируют запись и видят
+    последнее зафиксированное состояние. Фоновые задачи (статистика,
+    экспорт) берут соединение через ``with db.reader() as r``.
+
+    Все изменения идут через ``transaction()``: вызванные внутри открытой
+    транзакции методы записи не фиксируют её сами, а вложенные транзакции
+    становятся точками сохранения.
+
+    ``commit_count`` — число COMMIT пишущего соединения в ``transaction()`` и
+    при создании схемы. Это не число fsync: в WAL с synchronous=NORMAL COMMIT
+    только дописывает журнал, а fsync происходит при checkpoint; с
+    synchronous=FULL каждый COMMIT — один fsync журнала.
+    """
+
+    def __init__(
+        self, db_path: Path | str = DB_FILE, pragmas: dict | None = None, readers: int = 2
+    ):
+        self.path = db_path
+        self.pragmas = {**PRAGMAS, **(pragmas or {})}
         self.conn = sqlite3.connect(db_path)
         self.conn.row_factory = sqlite3.Row
+        _apply_pragmas(self.conn, self.pragmas, writer=True)
+        self._tx_depth = 0
+        self.commit_count = 0
         self._create_schema()
+        self._readers: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._reader_slots = threading.Semaphore(readers)
+        self._opened: list[sqlite3.Connection] = []
+
+    def _open_reader(self) -> sqlite3.Connection:
+        uri = f"{Path(self.path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        _apply_pragmas(conn, self.pragmas, writer=False)
+        self._opened.append(conn)
+        return conn
+
+    @contextmanager
+    def reader(self) -> Iterator["DataBase"]:
+        """Представление базы на соединении только для чтения из пула.
+
+        Методы чтения работают как обычно, запись завершится ошибкой
+        ``sqlite3.OperationalError``. Для базы в памяти отдаёт саму базу.
+        """
+        if str(self.path) == ":memory:":
+            yield self
+            return
+        with self._reader_slots:
+            try:
+                conn = self._readers.get_nowait()
+            except queue.Empty:
+                conn = self._open_reader()
+            view = object.__new__(DataBase)
+            view.path, view.pragmas, view.conn = self.path, self.pragmas, conn
+            view.has_fts = self.has_fts
+            try:
+                yield view
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._readers.put(conn)
+
+    @contextmanager
+    def writer(self) -> Iterator["DataBase"]:
+        """Представление базы на отдельном пишущем соединении — для долгой
+        записи из фонового потока (импорт).
+
+        Пока его транзакция открыта, запись через ``conn`` ждёт её конца.
+        Соединение закрывается на выходе. Для базы в памяти отдаёт саму базу.
+        """
+        if str(self.path) == ":memory:":
+            yield self
+            return
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        _apply_pragmas(conn, self.pragmas, writer=True)
+        view = object.__new__(DataBase)
+        view.path, view.pragmas, view.conn = self.path, self.pragmas, conn
+        view.has_fts = self.has_fts
+        view._tx_depth = 0
+        view.commit_count = 0
+        try:
+            yield view
+        finally:
+            conn.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Единица работы: всё внутри фиксируется одним COMMIT или откатывается.
+
+        Вложенный вызов открывает SAVEPOINT: ошибка внутри него откатывает
+        только его изменения, внешняя транзакция продолжается.
+        """
+        depth = self._tx_depth
+        if depth == 0:
+            if self.conn.in_transaction:
+                self._commit()
+            self.conn.execute("BEGIN IMMEDIATE;")
+        else:
+            self.conn.execute(f"SAVEPOINT sp{depth};")
+        self._tx_depth += 1
+        try:
+            yield self.conn
+        except BaseException:
+            self._tx_depth -= 1
+            if depth == 0:
+                self.conn.rollback()
+            else:
+                self.conn.execute(f"ROLLBACK TO sp{depth};")
+                self.conn.execute(f"RELEASE sp{depth};")
+            raise
+        self._tx_depth -= 1
+        if depth == 0:
+            self._commit()
+        else:
+            self.conn.execute(f"RELEASE sp{depth};")
+
+    def _commit(self) -> None:
+        self.conn.commit()
+        self.commit_count += 1
+
+    def close(self) -> None:
+        for conn in self._opened:
+            conn.close()
+        self._opened.clear()
+        self.conn.close()
 
     def _create_schema(self) -> None:
         cur = self.conn.cursor()
+        tables = {
+            r[0] for r in cur.execute("SELECT name FROM sqlite_master WHERE type = 'table';")
+        }
         cur.executescript(
             """
             PRAGMA foreign_keys = ON;
@@ -49,9 +266,200 @@ class DataBase:
                 FOREIGN KEY (account_id)  REFERENCES Account(id)  ON DELETE CASCADE,
                 FOREIGN KEY (category_id) REFERENCES Category(id) ON DELETE SET NULL
             );
+
+            -- лента операций и фильтры по периоду
+            CREATE INDEX IF NOT EXISTS idx_operation_account_date
+                ON Operation (account_id, date);
+            -- покрывающий индекс для сумм по категориям
+            CREATE INDEX IF NOT EXISTS idx_operation_account_type_cat_date
+                ON Operation (account_id, type, category_id, date, amount);
+
+            -- исторические курсы: сколько рублей стоит единица валюты на дату
+            CREATE TABLE IF NOT EXISTS FxRate (
+                date  TEXT NOT NULL,                -- YYYY-MM-DD
+                code  TEXT NOT NULL,
+                rate  REAL NOT NULL,
+                PRIMARY KEY (code, date)
+            ) WITHOUT ROWID;
+
+            -- помесячные итоги, которые ведут триггеры на Operation
+            CREATE TABLE IF NOT EXISTS MonthlyRollup (
+                account_id  INTEGER NOT NULL,
+                month       TEXT    NOT NULL,           -- YYYY-MM
+                category_id INTEGER NOT NULL DEFAULT 0, -- 0 = без категории
+                type        INTEGER NOT NULL,
+                sum         INTEGER NOT NULL DEFAULT 0,
+                count       INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (account_id, month, category_id, type)
+            ) WITHOUT ROWID;
+
+            -- баланс счёта на начало месяца, в котором есть операции;
+            -- ведётся методами записи (см. _shift_checkpoints)
+            CREATE TABLE IF NOT EXISTS BalanceCheckpoint (
+                account_id  INTEGER NOT NULL,
+                month       TEXT    NOT NULL,           -- YYYY-MM
+                balance     INTEGER NOT NULL,
+                PRIMARY KEY (account_id, month)
+            ) WITHOUT ROWID;
+
+            CREATE TRIGGER IF NOT EXISTS trg_rollup_insert AFTER INSERT ON Operation
+            BEGIN
+                INSERT INTO MonthlyRollup (account_id, month, category_id, type, sum, count)
+                VALUES (NEW.account_id, substr(NEW.date, 1, 7),
+                        IFNULL(NEW.category_id, 0), NEW.type, NEW.amount, 1)
+                ON CONFLICT DO UPDATE SET sum = sum + excluded.sum, count = count + 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_rollup_delete AFTER DELETE ON Operation
+            BEGIN
+                UPDATE MonthlyRollup SET sum = sum - OLD.amount, count = count - 1
+                WHERE account_id = OLD.account_id AND month = substr(OLD.date, 1, 7)
+                  AND category_id = IFNULL(OLD.category_id, 0) AND type = OLD.type;
+                DELETE FROM MonthlyRollup
+                WHERE account_id = OLD.account_id AND month = substr(OLD.date, 1, 7)
+                  AND category_id = IFNULL(OLD.category_id, 0) AND type = OLD.type
+                  AND count = 0;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_rollup_update
+            AFTER UPDATE OF account_id, type, amount, category_id, date ON Operation
+            BEGIN
+                UPDATE MonthlyRollup SET sum = sum - OLD.amount, count = count - 1
+                WHERE account_id = OLD.account_id AND month = substr(OLD.date, 1, 7)
+                  AND category_id = IFNULL(OLD.category_id, 0) AND type = OLD.type;
+                DELETE FROM MonthlyRollup
+                WHERE account_id = OLD.account_id AND month = substr(OLD.date, 1, 7)
+                  AND category_id = IFNULL(OLD.category_id, 0) AND type = OLD.type
+                  AND count = 0;
+                INSERT INTO MonthlyRollup (account_id, month, category_id, type, sum, count)
+                VALUES (NEW.account_id, substr(NEW.date, 1, 7),
+                        IFNULL(NEW.category_id, 0), NEW.type, NEW.amount, 1)
+                ON CONFLICT DO UPDATE SET sum = sum + excluded.sum, count = count + 1;
+            END;
             """
         )
-        self.conn.commit()
+        self._commit()
+        self.has_fts = self._create_fts("OperationFts" in tables)
+        if "MonthlyRollup" not in tables:
+            self.rebuild_rollup()
+        if "BalanceCheckpoint" not in tables:
+            self.rebuild_checkpoints()
+
+    def _create_fts(self, exists: bool) -> bool:
+        """Полнотекстовый индекс описаний; False — SQLite собран без FTS5."""
+        new, old = _FTS_NOTE.format("NEW.note"), _FTS_NOTE.format("OLD.note")
+        try:
+            self.conn.executescript(
+                f"""
+                -- внешний контент: в индексе только токены, текст берётся из Operation
+                CREATE VIRTUAL TABLE IF NOT EXISTS OperationFts USING fts5(
+                    note, content = 'Operation', content_rowid = 'id',
+                    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+                );
+
+                CREATE TRIGGER IF NOT EXISTS trg_fts_insert AFTER INSERT ON Operation
+                WHEN NEW.note IS NOT NULL
+                BEGIN
+                    INSERT INTO OperationFts (rowid, note) VALUES (NEW.id, {new});
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS trg_fts_delete AFTER DELETE ON Operation
+                WHEN OLD.note IS NOT NULL
+                BEGIN
+                    INSERT INTO OperationFts (OperationFts, rowid, note)
+                    VALUES ('delete', OLD.id, {old});
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS trg_fts_update AFTER UPDATE OF note ON Operation
+                BEGIN
+                    INSERT INTO OperationFts (OperationFts, rowid, note)
+                    SELECT 'delete', OLD.id, {old} WHERE OLD.note IS NOT NULL;
+                    INSERT INTO OperationFts (rowid, note)
+                    SELECT NEW.id, {new} WHERE NEW.note IS NOT NULL;
+                END;
+                """
+            )
+        except sqlite3.OperationalError:
+            return False
+        if not exists:
+            with self.transaction():
+                self.conn.execute(
+                    f"""
+                    INSERT INTO OperationFts (rowid, note)
+                    SELECT id, {_FTS_NOTE.format("note")} FROM Operation WHERE note IS NOT NULL;
+                    """
+                )
+        return True
+
+    def rebuild_rollup(self) -> None:
+        """Пересчитать MonthlyRollup по всей таблице Operation."""
+        with self.transaction():
+            self.conn.execute("DELETE FROM MonthlyRollup;")
+            self.conn.execute(
+                """
+                INSERT INTO MonthlyRollup (account_id, month, category_id, type, sum, count)
+                SELECT account_id, substr(date, 1, 7), IFNULL(category_id, 0), type,
+                       SUM(amount), COUNT(*)
+                FROM Operation
+                GROUP BY 1, 2, 3, 4;
+                """
+            )
+
+    def rebuild_checkpoints(self) -> None:
+        """Пересчитать BalanceCheckpoint по месячным итогам из MonthlyRollup."""
+        with self.transaction():
+            self.conn.execute("DELETE FROM BalanceCheckpoint;")
+            self.conn.execute(
+                """
+                INSERT INTO BalanceCheckpoint (account_id, month, balance)
+                SELECT account_id, month,
+                       SUM(delta) OVER (PARTITION BY account_id ORDER BY month) - delta
+                FROM (
+                    SELECT account_id, month,
+                           SUM(CASE WHEN type = 1 THEN sum ELSE -sum END) AS delta
+                    FROM MonthlyRollup
+                    GROUP BY account_id, month
+                );
+                """
+            )
+
+    def _shift_checkpoints(self, account_id: int, day: str, delta: int) -> None:
+        """Учесть операцию на ``delta`` копеек в день ``day`` в контрольных точках:
+        у месяца операции точка появляется, если её не было, а балансы на начало
+        всех следующих месяцев сдвигаются на ``delta``."""
+        month = day[:7]
+        self.conn.execute(
+            "INSERT OR IGNORE INTO BalanceCheckpoint (account_id, month, balance) VALUES (?, ?, ?);",
+            (account_id, month, self.balance_at(account_id, f"{month}-01")),
+        )
+        self.conn.execute(
+            "UPDATE BalanceCheckpoint SET balance = balance + ? WHERE account_id = ? AND month > ?;",
+            (delta, account_id, month),
+        )
+
+    def balance_at(self, account_id: int, day: datetime | str) -> int:
+        """Баланс счёта (в копейках) на начало дня ``day``: ближайшая контрольная
+        точка не позже месяца ``day`` плюс операции от её начала до ``day``."""
+        day = day if isinstance(day, str) else day.isoformat()
+        row = self.conn.execute(
+            """
+            SELECT month, balance FROM BalanceCheckpoint
+            WHERE account_id = ? AND month <= ?
+            ORDER BY month DESC LIMIT 1;
+            """,
+            (account_id, day[:7]),
+        ).fetchone()
+        if row is None:
+            return 0
+        rest = self.conn.execute(
+            """
+            SELECT IFNULL(SUM(CASE WHEN type = 1 THEN amount ELSE -amount END), 0)
+            FROM Operation
+            WHERE account_id = ? AND date >= ? AND date < ?;
+            """,
+            (account_id, f"{row['month']}-01", day),
+        ).fetchone()[0]
+        return row["balance"] + rest
 
     def ensure_default_user(self) -> int:
         cur = self.conn.cursor()
@@ -60,11 +468,11 @@ class DataBase:
         if row:
             return row["id"]
 
-        cur.execute(
-            "INSERT INTO User (username, password) VALUES (?, ?);",
-            ("local", "local"),
-        )
-        self.conn.commit()
+        with self.transaction():
+            cur.execute(
+                "INSERT INTO User (username, password) VALUES (?, ?);",
+                ("local", "local"),
+            )
         return cur.lastrowid
 
     def ensure_default_account(self, user_id: int) -> int:
@@ -74,11 +482,11 @@ class DataBase:
         if row:
             return row["id"]
 
-        cur.execute(
-            "INSERT INTO Account (user_id, balance) VALUES (?, 0);",
-            (user_id,),
-        )
-        self.conn.commit()
+        with self.transaction():
+            cur.execute(
+                "INSERT INTO Account (user_id, balance) VALUES (?, 0);",
+                (user_id,),
+            )
         return cur.lastrowid
 
     def get_categories(self, user_id: int, cat_type: int | None = None) -> list[sqlite3.Row]:
@@ -91,11 +499,11 @@ class DataBase:
         return cur.fetchall()
 
     def add_category(self, user_id: int, name: str, cat_type: int) -> int:
-        cur = self.conn.execute(
-            "INSERT INTO Category (name, user_id, type) VALUES (?, ?, ?);",
-            (name, user_id, cat_type),
-        )
-        self.conn.commit()
+        with self.transaction():
+            cur = self.conn.execute(
+                "INSERT INTO Category (name, user_id, type) VALUES (?, ?, ?);",
+                (name, user_id, cat_type),
+            )
         return cur.lastrowid
 
     def add_operation(
@@ -108,57 +516,419 @@ class DataBase:
         note: str | None = None,
     ) -> int:
         amount_int = int(round(amount * 100))
-        cur = self.conn.execute(
+        sign = 1 if op_type else -1
+        with self.transaction():
+            cur = self.conn.execute(
+                """
+                INSERT INTO Operation (account_id, type, amount, category_id, date, note)
+                VALUES (?, ?, ?, ?, ?, ?);
+                """,
+                (account_id, op_type, amount_int, category_id, date.isoformat(), note),
+            )
+            self.conn.execute(
+                "UPDATE Account SET balance = balance + ? WHERE id = ?;",
+                (sign * amount_int, account_id),
+            )
+            self._shift_checkpoints(account_id, date.isoformat(), sign * amount_int)
+        return cur.lastrowid
+
+    def add_operations_bulk(
+        self,
+        ops: Iterable[tuple],
+        progress: Callable[[int], None] | None = None,
+        chunk: int = 5000,
+    ) -> int:
+        """Массовая вставка операций одной транзакцией.
+
+        ``ops`` — кортежи с теми же полями, что и у ``add_operation``:
+        (account_id, op_type, amount, category_id, date, note). Баланс счёта
+        обновляется один раз на счёт суммарной дельтой.
+        """
+        deltas: dict[int, int] = defaultdict(int)
+        done = 0
+        it = iter(ops)
+        with self.transaction():
+            while batch := list(islice(it, chunk)):
+                params = []
+                for account_id, op_type, amount, category_id, date, note in batch:
+                    amount_int = int(round(amount * 100))
+                    deltas[account_id] += amount_int if op_type else -amount_int
+                    params.append(
+                        (account_id, op_type, amount_int, category_id, date.isoformat(), note)
+                    )
+                self.conn.executemany(
+                    """
+                    INSERT INTO Operation (account_id, type, amount, category_id, date, note)
+                    VALUES (?, ?, ?, ?, ?, ?);
+                    """,
+                    params,
+                )
+                done += len(params)
+                if progress:
+                    progress(done)
+
+            self.conn.executemany(
+                "UPDATE Account SET balance = balance + ? WHERE id = ?;",
+                [(delta, account_id) for account_id, delta in deltas.items()],
+            )
+            # после массовой вставки дешевле пересчитать точки по MonthlyRollup
+            self.rebuild_checkpoints()
+        return done
+
+    def delete_operation(self, op_id: int) -> None:
+        with self.transaction():
+            row = self.conn.execute(
+                "SELECT account_id, type, amount, date FROM Operation WHERE id = ?;", (op_id,)
+            ).fetchone()
+            if not row:
+                return
+            sign = 1 if row["type"] else -1
+            self.conn.execute(
+                "UPDATE Account SET balance = balance - ? WHERE id = ?;",
+                (sign * row["amount"], row["account_id"]),
+            )
+            self.conn.execute("DELETE FROM Operation WHERE id = ?;", (op_id,))
+            self._shift_checkpoints(row["account_id"], row["date"], -sign * row["amount"])
+
+    def list_operations(
+        self,
+        account_id: int,
+        start: datetime | str | None = None,
+        end: datetime | str | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+        fx_code: str | None = None,
+    ) -> list[sqlite3.Row]:
+        """Операции счёта за [start, end), от новых к старым, постранично.
+
+        С ``fx_code`` в колонке ``fx`` — курс этой валюты на дату операции
+        (последний известный на тот день), иначе NULL. Названия категорий
+        не подтягиваются: их берут из кэша FinanceCore по ``category_id``.
+        """
+        return self.conn.execute(
+            f"""
+            SELECT o.id,
+                   o.date,
+                   o.amount,
+                   o.type,
+                   o.note,
+                   o.category_id,
+                   {_FX_AT_OP if fx_code else "NULL"} AS fx
+            FROM Operation o
+            WHERE o.account_id = ? AND o.date >= ? AND o.date < ?
+            ORDER BY o.date DESC, o.id DESC
+            LIMIT ? OFFSET ?;
+            """,
+            (
+                *((fx_code, fx_code) if fx_code else ()),
+                account_id,
+                *_date_range(start, end),
+                -1 if limit is None else limit,
+                offset,
+            ),
+        ).fetchall()
+
+    def operation_columns(self, account_id: int) -> list[tuple]:
+        """(amount, day, type, category_id) всех операций счёта — для NumPy."""
+        cur = self.conn.cursor()
+        cur.row_factory = None
+        return cur.execute(
             """
-            INSERT INTO Operation (account_id, type, amount, category_id, date, note)
-            VALUES (?, ?, ?, ?, ?, ?);
+            SELECT amount, substr(date, 1, 10), type, IFNULL(category_id, 0)
+            FROM Operation
+            WHERE account_id = ?;
             """,
-            (account_id, op_type, amount_int, category_id, date.isoformat(), note),
-        )
-        self.conn.commit()
+            (account_id,),
+        ).fetchall()
 
-        sign = 1 if op_type else -1
-        self.conn.execute(
-            "UPDATE Account SET balance = balance + ? WHERE id = ?;",
-            (sign * amount_int, account_id),
+    def count_operations(
+        self,
+        account_id: int,
+        start: datetime | str | None = None,
+        end: datetime | str | None = None,
+        category_ids: Iterable[int] | None = None,
+    ) -> int:
+        cat_sql, cat_params = _category_filter(category_ids)
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM Operation WHERE account_id = ? AND date >= ? AND date < ?"
+            f"{cat_sql};",
+            (account_id, *_date_range(start, end), *cat_params),
+        ).fetchone()[0]
+
+    def _search_filter(self, query: str) -> tuple[str, str, tuple]:
+        """(FROM, условие WHERE, параметры) для операций, найденных по описанию."""
+        if self.has_fts:
+            fq = _fts_query(query)
+            hits = self.conn.execute(
+                "SELECT COUNT(*) FROM OperationFts WHERE OperationFts MATCH ?;", (fq,)
+            ).fetchone()[0]
+            if hits <= _FTS_SORT_LIMIT:
+                # совпадений мало: берём их из индекса (CROSS JOIN фиксирует
+                # порядок соединения) и сортируем
+                return (
+                    "OperationFts CROSS JOIN Operation o ON o.id = OperationFts.rowid",
+                    "OperationFts MATCH ?",
+                    (fq,),
+                )
+            # совпадений много: идём по ленте счёта от новых к старым, пока
+            # не наберётся страница
+            return (
+                "Operation o",
+                "o.id IN (SELECT rowid FROM OperationFts WHERE OperationFts MATCH ?)",
+                (fq,),
+            )
+        # без FTS5 — медленный, но работающий LIKE по всем словам
+        words = _SEARCH_TOKEN.findall(query)
+        return (
+            "Operation o",
+            " AND ".join("o.note LIKE ?" for _ in words),
+            tuple(f"%{w}%" for w in words),
         )
-        self.conn.commit()
 
-        return cur.lastrowid
+    def search_operations(
+        self,
+        account_id: int,
+        query: str,
+        limit: int | None = None,
+        offset: int = 0,
+        fx_code: str | None = None,
+    ) -> list[sqlite3.Row]:
+        """Операции счёта, в описании которых есть все слова ``query`` (по
+        префиксу, без учёта регистра). Колонки и порядок — как у list_operations."""
+        if not _SEARCH_TOKEN.search(query):
+            return self.list_operations(account_id, limit=limit, offset=offset, fx_code=fx_code)
+        source, where, params = self._search_filter(query)
+        return self.conn.execute(
+            f"""
+            SELECT o.id,
+                   o.date,
+                   o.amount,
+                   o.type,
+                   o.note,
+                   o.category_id,
+                   {_FX_AT_OP if fx_code else "NULL"} AS fx
+            FROM {source}
+            WHERE {where} AND o.account_id = ?
+            ORDER BY o.date DESC, o.id DESC
+            LIMIT ? OFFSET ?;
+            """,
+            (
+                *((fx_code, fx_code) if fx_code else ()),
+                *params,
+                account_id,
+                -1 if limit is None else limit,
+                offset,
+            ),
+        ).fetchall()
 
-    def delete_operation(self, op_id: int) -> None:
-        row = self.conn.execute(
-            "SELECT account_id, type, amount FROM Operation WHERE id = ?;", (op_id,)
-        ).fetchone()
-        if not row:
-            return
-        sign = 1 if row["type"] else -1
-        self.conn.execute(
-            "UPDATE Account SET balance = balance - ? WHERE id = ?;",
-            (sign * row["amount"], row["account_id"]),
+    def iter_operations(
+        self,
+        account_id: int,
+        start: datetime | str | None = None,
+        end: datetime | str | None = None,
+        category_ids: Iterable[int] | None = None,
+        fx_code: str | None = None,
+        chunk: int = 5000,
+    ) -> Iterator[list[tuple]]:
+        """Операции счёта пачками по ``chunk`` строк прямо из курсора, без
+        загрузки всей выборки в память. Строки — кортежи
+        (date, amount, type, category_id, note, fx) в порядке ленты."""
+        cat_sql, cat_params = _category_filter(category_ids, "o.category_id")
+        cur = self.conn.cursor()
+        cur.row_factory = None
+        cur.execute(
+            f"""
+            SELECT o.date, o.amount, o.type, o.category_id, o.note,
+                   {_FX_AT_OP if fx_code else "NULL"}
+            FROM Operation o
+            WHERE o.account_id = ? AND o.date >= ? AND o.date < ?{cat_sql}
+            ORDER BY o.date DESC, o.id DESC;
+            """,
+            (
+                *((fx_code, fx_code) if fx_code else ()),
+                account_id,
+                *_date_range(start, end),
+                *cat_params,
+            ),
         )
-        self.conn.execute("DELETE FROM Operation WHERE id = ?;", (op_id,))
-        self.conn.commit()
+        try:
+            while rows := cur.fetchmany(chunk):
+                yield rows
+        finally:
+            cur.close()
 
-    def list_operations(self, account_id: int) -> list[sqlite3.Row]:
+    def get_operation(self, op_id: int, fx_code: str | None = None) -> sqlite3.Row | None:
         return self.conn.execute(
-            """
+            f"""
             SELECT o.id,
                    o.date,
                    o.amount,
                    o.type,
                    o.note,
-                   c.name  AS category_name
+                   o.category_id,
+                   {_FX_AT_OP if fx_code else "NULL"} AS fx
             FROM Operation o
-            LEFT JOIN Category c ON c.id = o.category_id
-            WHERE o.account_id = ?
-            ORDER BY o.date DESC;
+            WHERE o.id = ?;
             """,
-            (account_id,),
+            (*((fx_code, fx_code) if fx_code else ()), op_id),
+        ).fetchone()
+
+    # Суммы за период: целые месяцы берутся из MonthlyRollup, и только
+    # неполный первый месяц окна считается по сырым операциям.
+    def operation_totals(self, account_id: int, since: str | None = None) -> tuple[int, int]:
+        month, upper = _month_split(since)
+        row = self.conn.execute(
+            """
+            SELECT COALESCE(SUM(CASE WHEN type = 1 THEN total END), 0) AS inc,
+                   COALESCE(SUM(CASE WHEN type = 0 THEN total END), 0) AS exp
+            FROM (
+                SELECT type, sum AS total FROM MonthlyRollup
+                WHERE account_id = ? AND month > ?
+                UNION ALL
+                SELECT type, amount FROM Operation
+                WHERE account_id = ? AND date >= ? AND date < ?
+            );
+            """,
+            (account_id, month, account_id, since or "", upper),
+        ).fetchone()
+        return row["inc"], row["exp"]
+
+    def category_sums(
+        self, account_id: int, op_type: int, since: str | None = None
+    ) -> list[sqlite3.Row]:
+        month, upper = _month_split(since)
+        return self.conn.execute(
+            """
+            SELECT c.name       AS category_name,
+                   SUM(t.total) AS total,
+                   SUM(t.n)     AS n
+            FROM (
+                SELECT NULLIF(category_id, 0) AS category_id, sum AS total, count AS n
+                FROM MonthlyRollup
+                WHERE account_id = ? AND type = ? AND month > ?
+                UNION ALL
+                SELECT category_id, amount, 1 FROM Operation
+                WHERE account_id = ? AND type = ? AND date >= ? AND date < ?
+            ) t
+            LEFT JOIN Category c ON c.id = t.category_id
+            GROUP BY t.category_id;
+            """,
+            (account_id, op_type, month, account_id, op_type, since or "", upper),
+        ).fetchall()
+
+    def monthly_sums(self, account_id: int, since: str | None = None) -> list[sqlite3.Row]:
+        month, upper = _month_split(since)
+        return self.conn.execute(
+            """
+            SELECT month, type, SUM(sum) AS total, SUM(count) AS n
+            FROM MonthlyRollup
+            WHERE account_id = ? AND month > ?
+            GROUP BY month, type
+            UNION ALL
+            SELECT substr(date, 1, 7) AS month,
+                   type,
+                   SUM(amount)        AS total,
+                   COUNT(*)           AS n
+            FROM Operation
+            WHERE account_id = ? AND date >= ? AND date < ?
+            GROUP BY month, type;
+            """,
+            (account_id, month, account_id, since or "", upper),
+        ).fetchall()
+
+    def category_month_sums(self, account_id: int, first: str, last: str) -> list[tuple]:
+        """Итоги (month, category_id, type, sum) по месяцам YYYY-MM с first по last."""
+        return self.conn.execute(
+            """
+            SELECT month, category_id, type, sum FROM MonthlyRollup
+            WHERE account_id = ? AND month BETWEEN ? AND ? AND count > 0;
+            """,
+            (account_id, first, last),
+        ).fetchall()
+
+    def daily_balance(self, account_id: int, since: str | None = None) -> list[sqlite3.Row]:
+        """Баланс на конец каждого дня окна; отсчёт — от баланса на его начало."""
+        base = self.balance_at(account_id, since) if since else 0
+        return self.conn.execute(
+            """
+            SELECT substr(date, 1, 10) AS day,
+                   ? + SUM(SUM(CASE WHEN type = 1 THEN amount ELSE -amount END))
+                       OVER (ORDER BY substr(date, 1, 10)) AS balance,
+                   COUNT(*) AS n
+            FROM Operation
+            WHERE account_id = ? AND date >= ?
+            GROUP BY day
+            ORDER BY day;
+            """,
+            (base, account_id, since or ""),
+        ).fetchall()
+
+    def add_fx_rates_bulk(self, rates: Iterable[tuple]) -> int:
+        """Загрузить курсы (date, code, rate) одной транзакцией; даты — date или ISO."""
+        params = (
+            (d if isinstance(d, str) else d.isoformat(), code, float(rate))
+            for d, code, rate in rates
+        )
+        with self.transaction():
+            cur = self.conn.executemany(
+                "INSERT OR REPLACE INTO FxRate (date, code, rate) VALUES (?, ?, ?);",
+                params,
+            )
+        return cur.rowcount
+
+    def fx_rates(self, code: str) -> list[sqlite3.Row]:
+        return self.conn.execute(
+            "SELECT date, rate FROM FxRate WHERE code = ? ORDER BY date;", (code,)
         ).fetchall()
 
     def get_account_balance(self, account_id: int) -> int:
         cur = self.conn.execute(
             "SELECT balance FROM Account WHERE id = ?;", (account_id,)
         ).fetchone()
-        return cur["balance"] if cur else 0
\ No newline at end of file
+        return cur["balance"] if cur else 0
+
+    def query_plan(self, sql: str, params=()) -> list[str]:
+        return [
+            r["detail"]
+            for r in self.conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        ]
+
+    def check_query_plans(self, account_id: int) -> dict[str, list[str]]:
+        """Проверяет через EXPLAIN QUERY PLAN, что горячие запросы идут по индексам.
+
+        Возвращает планы по именам методов; если какой-то запрос сканирует
+        Operation целиком или сортирует ленту во временном B-дереве, бросает
+        RuntimeError со списком таких запросов.
+        """
+        since = "2000-01-01"
+        hot = {
+            "list_operations": lambda: self.list_operations(account_id, since, None, 50),
+            "operation_totals": lambda: self.operation_totals(account_id, since),
+            "category_sums": lambda: self.category_sums(account_id, 0, since),
+            "monthly_sums": lambda: self.monthly_sums(account_id, since),
+            "daily_balance": lambda: self.daily_balance(account_id, since),
+        }
+        plans: dict[str, list[str]] = {}
+        failures: list[str] = []
+        conn = self.conn
+        for name, call in hot.items():
+            rec = _PlanRecorder(conn)
+            self.conn = rec
+            try:
+                call()
+            finally:
+                self.conn = conn
+            plan = [d for sql, params in rec.calls for d in self.query_plan(sql, params)]
+            plans[name] = plan
+
+            on_operation = [d for d in plan if _OPERATION_STEP.match(d)]
+            if not on_operation or not all(
+                "USING INDEX idx_operation_" in d or "USING COVERING INDEX idx_operation_" in d
+                for d in on_operation
+            ):
+                failures.append(f"{name}: запрос не использует индекс Operation: {plan}")
+            if any("TEMP B-TREE FOR ORDER BY" in d for d in plan):
+                failures.append(f"{name}: сортировка без индекса: {plan}")
+        if failures:
+            raise RuntimeError("\n".join(failures))
+        return plans
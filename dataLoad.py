@@ -1,18 +1,70 @@
 from __future__ import annotations
+import csv
 import json
-import importlib
-from typing import Any, Dict, List
+import importlib.util
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-import pandas as pd
-from PySide6.QtCore import QSettings
+
+class JsonSettings:
+    """Хранилище настроек в JSON-файле с интерфейсом QSettings (value,
+    setValue, sync) — для запуска без Qt. ``sync`` перечитывает файл и
+    дописывает в него только изменённые ключи, так что несколько
+    экземпляров (в том числе из разных потоков) не затирают чужие значения."""
+
+    _lock = threading.Lock()
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._changed: Dict[str, Any] = {}
+        self._data = self._read()
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def value(self, key: str, default: Any = None) -> Any:
+        return self._data.get(key, default)
+
+    def setValue(self, key: str, value: Any) -> None:
+        self._data[key] = self._changed[key] = value
+
+    def sync(self) -> None:
+        if not self._changed:
+            return
+        with self._lock:
+            data = {**self._read(), **self._changed}
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+            os.replace(tmp, self.path)
+        self._data = data
+        self._changed.clear()
 
 
 class SettingsManager:
     ORG, APP = "MintBalance", "FinanceApp"
-    _DEFAULTS = {"lang": "ru", "theme": "light", "currency": "RUB"}
+    _DEFAULTS = {
+        "lang": "ru", "theme": "light", "currency": "RUB", "stats_backend": "sql",
+        "db_cache_mb": 64, "db_mmap_mb": 256,
+        "forecast_paths": 20000, "forecast_seed": 0, "forecast_workers": 0,
+        "profiling": False,
+    }
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        """``path`` — JSON-файл настроек (``JsonSettings``); без него —
+        QSettings, общие с GUI."""
+        if path is None:
+            from PySide6.QtCore import QSettings
 
-    def __init__(self) -> None:
-        self._s = QSettings(self.ORG, self.APP)
+            self._s = QSettings(self.ORG, self.APP)
+        else:
+            self._s = JsonSettings(path)
 
     def get(self, key: str) -> Any:
         return self._s.value(key, self._DEFAULTS[key])
@@ -34,20 +86,249 @@ class SettingsManager:
         self._s.setValue(key, json.dumps(value))
 
 
-def export_to_excel(rows: List[dict[str, str]], path: str) -> None:
-    if not rows:
-        raise ValueError("No data to export")
+ExportRow = Tuple[datetime, float, str, str]
+EXPORT_FORMATS = {".xlsx": "Excel (*.xlsx)", ".csv": "CSV (*.csv)", ".parquet": "Parquet (*.parquet)"}
 
 
-    engine = None
-    if importlib.util.find_spec("openpyxl") is None:
-        if importlib.util.find_spec("xlsxwriter") is not None:
-            engine = "xlsxwriter"
-        else:
-            raise ImportError(
-                "Для экспорта нужен пакет «openpyxl» или «xlsxwriter».\n"
-                "Установите один из них, например:\n"
-                "   pip install openpyxl"
+def _write_xlsx(chunks: Iterable[List[ExportRow]], path: str, headers: Sequence[str], progress) -> int:
+    if importlib.util.find_spec("xlsxwriter") is not None:
+        import xlsxwriter
+
+        # constant_memory: строка сбрасывается на диск, как только начата следующая
+        wb = xlsxwriter.Workbook(path, {"constant_memory": True})
+        ws = wb.add_worksheet()
+        fmt_date = wb.add_format({"num_format": "dd.mm.yyyy"})
+        fmt_money = wb.add_format({"num_format": "#,##0.00"})
+        ws.set_column(0, 0, 12)
+        ws.set_column(1, 1, 14)
+        ws.set_column(2, 3, 24)
+        ws.write_row(0, 0, headers)
+        n = 0
+        try:
+            for chunk in chunks:
+                for day, amount, cat, note in chunk:
+                    n += 1
+                    ws.write_datetime(n, 0, day, fmt_date)
+                    ws.write_number(n, 1, amount, fmt_money)
+                    ws.write_string(n, 2, cat)
+                    ws.write_string(n, 3, note)
+                progress(n)
+        finally:
+            wb.close()
+        return n
+
+    if importlib.util.find_spec("openpyxl") is not None:
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(list(headers))
+        n = 0
+        for chunk in chunks:
+            for row in chunk:
+                ws.append(row)
+            n += len(chunk)
+            progress(n)
+        wb.save(path)
+        return n
+
+    raise ImportError(
+        "Для экспорта нужен пакет «xlsxwriter» или «openpyxl».\n"
+        "Установите один из них, например:\n"
+        "   pip install xlsxwriter"
+    )
+
+
+def _write_csv(chunks: Iterable[List[ExportRow]], path: str, headers: Sequence[str], progress) -> int:
+    n = 0
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        w = csv.writer(f, delimiter=";")
+        w.writerow(headers)
+        for chunk in chunks:
+            w.writerows(
+                (day.strftime("%d.%m.%Y"), f"{amount:.2f}", cat, note)
+                for day, amount, cat, note in chunk
             )
+            n += len(chunk)
+            progress(n)
+    return n
+
+
+def _write_parquet(chunks: Iterable[List[ExportRow]], path: str, headers: Sequence[str], progress) -> int:
+    if importlib.util.find_spec("pyarrow") is None:
+        raise ImportError("Для экспорта в Parquet нужен пакет «pyarrow»:\n   pip install pyarrow")
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [(headers[0], pa.timestamp("s")), (headers[1], pa.float64()),
+         (headers[2], pa.string()), (headers[3], pa.string())]
+    )
+    n = 0
+    with pq.ParquetWriter(path, schema) as w:
+        for chunk in chunks:
+            days, amounts, cats, notes = zip(*chunk)
+            # суммы до копеек, как в CSV и в формате ячеек XLSX
+            cols = (days, [round(a, 2) for a in amounts], cats, notes)
+            w.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(col, type=t) for col, t in zip(cols, schema.types)],
+                schema=schema,
+            ))
+            n += len(chunk)
+            progress(n)
+    return n
+
+
+_WRITERS = {".xlsx": _write_xlsx, ".csv": _write_csv, ".parquet": _write_parquet}
+
+
+def export_operations(
+    chunks: Iterable[List[ExportRow]],
+    path: str | Path,
+    headers: Sequence[str],
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """Записать операции потоково: пачки строк (дата, сумма, категория,
+    описание) уходят в файл по мере чтения, формат — по расширению ``path``.
+    Возвращает число записанных строк."""
+    suffix = Path(path).suffix.lower()
+    if suffix not in _WRITERS:
+        raise ValueError(f"Неизвестный формат экспорта: {suffix or path}")
+    return _WRITERS[suffix](chunks, str(path), headers, progress or (lambda n: None))
+
+
+_CSV_COLUMNS = {
+    "date": ("date", "дата"),
+    "amount": ("amount", "sum", "сумма"),
+    "category": ("category", "категория"),
+    "note": ("note", "description", "memo", "описание"),
+}
+_DATE_FORMATS = ("%d.%m.%Y", "%Y-%m-%d", "%d/%m/%Y", "%d.%m.%y")
+
+
+def _parse_date(text: str) -> datetime:
+    text = text.strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    return datetime.fromisoformat(text)
+
+
+_AMOUNT = re.compile(r"\d[\d\s.,]*\d|\d")
+
+
+def _parse_amount(text: str) -> float:
+    """Сумма в любом из банковских форматов: «1 234,56», «1,234.56»,
+    «1.234,56», «-50,00 р.», «$1,234.56». Число берётся от первой до
+    последней цифры, текст вокруг него (знак валюты, «руб.») отбрасывается,
+    минус перед числом учитывается. Если есть и точка, и запятая, десятичный —
+    последний из них; знак, встретившийся несколько раз, разделяет только разряды."""
+    m = _AMOUNT.search(text)
+    if m is None:
+        raise ValueError(f"не число: {text!r}")
+    clean = re.sub(r"\s", "", m.group())
+    seps = [c for c in ",." if c in clean]
+    if len(seps) == 2:
+        point = max(seps, key=clean.rindex)
+        clean = clean.replace("," if point == "." else ".", "")
+    elif seps and clean.count(seps[0]) > 1:
+        clean = clean.replace(seps[0], "")
+    value = float(clean.replace(",", "."))
+    return -value if re.search(r"[-\u2212]", text[: m.start()]) else value
+
+
+def read_operations_csv(path: str | Path) -> Iterator[Dict[str, Any]]:
+    """Операции из CSV: дата, сумма со знаком (минус — расход), категория, описание."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(f, dialect)
+
+        header = [h.strip().lower() for h in next(reader, [])]
+        cols: Dict[str, Optional[int]] = {}
+        for key, aliases in _CSV_COLUMNS.items():
+            cols[key] = next((i for i, h in enumerate(header) if h in aliases), None)
+        if cols["date"] is None or cols["amount"] is None:
+            raise ValueError("CSV: нужны колонки «Дата» и «Сумма»")
+
+        def cell(row: List[str], key: str) -> Optional[str]:
+            i = cols[key]
+            return row[i].strip() or None if i is not None and i < len(row) else None
+
+        for row in reader:
+            if not any(row):
+                continue
+            try:
+                day = _parse_date(row[cols["date"]])
+                amount = _parse_amount(row[cols["amount"]])
+            except (ValueError, IndexError) as e:
+                raise ValueError(f"CSV, строка {reader.line_num}: {e}") from e
+            yield {
+                "date": day,
+                "amount": amount,
+                "category": cell(row, "category"),
+                "note": cell(row, "note"),
+            }
+
+
+def read_fx_csv(path: str | Path) -> Iterator[tuple]:
+    """Курсы (date, code, rate) из CSV.
+
+    Понимает «длинный» формат с колонками date, code, rate и «широкий»:
+    date и по колонке на валюту (USD, EUR, …). Курс — рублей за единицу.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(f, dialect)
+        header = [h.strip() for h in next(reader, [])]
+        lower = [h.lower() for h in header]
+        if "date" not in lower and "дата" not in lower:
+            raise ValueError("CSV курсов: нужна колонка «date»")
+        i_date = lower.index("date") if "date" in lower else lower.index("дата")
+
+        for row in reader:
+            if not any(row):
+                continue
+            day = _parse_date(row[i_date]).date()
+            if "code" in lower and "rate" in lower:
+                code = row[lower.index("code")].strip().upper()
+                yield day, code, _parse_amount(row[lower.index("rate")])
+                continue
+            for i, code in enumerate(header):
+                if i != i_date and i < len(row) and row[i].strip():
+                    yield day, code.upper(), _parse_amount(row[i])
+
+
+_OFX_TRN = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.S | re.I)
+_OFX_TAG = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+
+def read_operations_ofx(path: str | Path) -> Iterator[Dict[str, Any]]:
+    """Операции из банковской выписки OFX/QFX (блоки STMTTRN)."""
+    text = Path(path).read_text(encoding="utf-8", errors="replace")
+    for block in _OFX_TRN.findall(text):
+        tags = {k.upper(): v.strip() for k, v in _OFX_TAG.findall(block)}
+        yield {
+            "date": datetime.strptime(tags["DTPOSTED"][:8], "%Y%m%d"),
+            "amount": _parse_amount(tags["TRNAMT"]),
+            "category": None,
+            "note": tags.get("MEMO") or tags.get("NAME") or None,
+        }
+
 
-    pd.DataFrame(rows).to_excel(path, index=False, engine=engine)
+def read_operations(path: str | Path) -> Iterator[Dict[str, Any]]:
+    suffix = Path(path).suffix.lower()
+    if suffix in (".ofx", ".qfx"):
+        return read_operations_ofx(path)
+    return read_operations_csv(path)
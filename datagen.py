@@ -0,0 +1,115 @@
+"""Синтетическая история операций для замеров и ручной проверки.
+
+    python datagen.py --preset 100k                 # в finance.db (или FINANCE_DB)
+    python datagen.py --rows 250000 --db /tmp/big.db --seed 7
+
+Операции похожи на настоящие: зарплата и аренда приходят раз в месяц,
+повседневные траты чаще случаются в выходные, суммы по категориям
+распределены логнормально, у большинства операций есть описание.
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from dataBase import DB_FILE, DataBase
+
+PRESETS = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+
+# (название, тип, медиана суммы в рублях, разброс, вес среди повседневных операций,
+#  описания); вес 0 — операция раз в месяц в указанный день
+CATEGORIES = (
+    ("Еда", 0, 650, 0.8, 40, ("Пятёрочка", "Перекрёсток", "ВкусВилл", "рынок", "пекарня")),
+    ("Транспорт", 0, 120, 0.9, 22, ("метро", "автобус", "такси", "бензин", "каршеринг")),
+    ("Кафе", 0, 900, 0.6, 12, ("кофе", "обед", "бизнес-ланч", "кафе «Ёлка»", "café Mozart")),
+    ("Развлечения", 0, 1500, 0.7, 6, ("кино", "театр", "концерт", "боулинг", "подписка")),
+    ("Здоровье", 0, 1100, 0.8, 4, ("аптека", "анализы", "стоматолог", "витамины")),
+    ("Одежда", 0, 3500, 0.7, 3, ("куртка", "кроссовки", "джинсы", "рубашка")),
+    ("Подарки", 0, 2500, 0.8, 2, ("подарок маме", "цветы", "день рождения")),
+    ("Подработка", 1, 8000, 0.6, 1, ("фриланс", "консультация", "перевод текста")),
+    ("Аренда", 0, 35000, 0.02, 0, ("аренда квартиры",), 3),
+    ("Связь", 0, 650, 0.05, 0, ("мобильная связь", "интернет"), 12),
+    ("Зарплата", 1, 55000, 0.1, 0, ("зарплата", "аванс"), 10, 25),
+)
+
+
+def _amount(rnd: random.Random, median: float, spread: float) -> float:
+    return round(median * math.exp(rnd.gauss(0, spread)), 2)
+
+
+def generate(db: DataBase, rows: int, seed: int = 42, years: int = 5, progress=None) -> int:
+    """Дописать в базу около ``rows`` операций за последние ``years`` лет."""
+    rnd = random.Random(seed)
+    user_id = db.ensure_default_user()
+    account_id = db.ensure_default_account(user_id)
+    known = {(c["name"], c["type"]): c["id"] for c in db.get_categories(user_id)}
+    cats = []
+    for name, op_type, *spec in CATEGORIES:
+        cid = known.get((name, op_type)) or db.add_category(user_id, name, op_type)
+        cats.append((cid, op_type, *spec))
+
+    today = date.today()
+    start = today - timedelta(days=365 * years)
+    monthly = [c for c in cats if not c[4]]
+    daily = [c for c in cats if c[4]]
+    weights = [c[4] for c in daily]
+    n_months = years * 12
+    per_day = max(rows - n_months * sum(len(c[6:]) for c in monthly), 0) / (today - start).days
+
+    # доходы растут вместе с числом трат, чтобы баланс не уходил в минус
+    def mean(c):
+        return (1 if c[1] else -1) * c[2] * math.exp(c[3] ** 2 / 2) * len(c[6:] or (1,))
+
+    flow = per_day * 30.4 * sum(w * mean(c) for c, w in zip(daily, weights)) / sum(weights)
+    flow += sum(mean(c) for c in monthly)
+    if flow < 0:
+        income = sum(mean(c) for c in monthly if c[1])
+        k = 1 - 1.05 * flow / income
+        monthly = [(c[0], c[1], c[2] * k, *c[3:]) if c[1] else c for c in monthly]
+
+    def ops():
+        d = start
+        while d <= today:
+            # приложение хранит операции с точностью до дня
+            at = datetime.combine(d, datetime.min.time())
+            for cid, op_type, median, spread, _, notes, *days in monthly:
+                if d.day in days:
+                    amount = _amount(rnd, median, spread)
+                    yield account_id, op_type, amount, cid, at, rnd.choice(notes)
+            # в выходные тратят примерно в полтора раза чаще
+            lam = per_day * (1.4 if d.weekday() >= 5 else 0.84)
+            n = int(lam) + (rnd.random() < lam - int(lam))
+            for cid, op_type, median, spread, _, notes in rnd.choices(daily, weights, k=n):
+                note = rnd.choice(notes) if rnd.random() < 0.85 else None
+                yield account_id, op_type, _amount(rnd, median, spread), cid, at, note
+            d += timedelta(days=1)
+
+    return db.add_operations_bulk(ops(), progress)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    size = ap.add_mutually_exclusive_group(required=True)
+    size.add_argument("--preset", choices=PRESETS)
+    size.add_argument("--rows", type=int)
+    ap.add_argument("--db", type=Path, default=DB_FILE)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--years", type=int, default=5)
+    args = ap.parse_args()
+
+    rows = args.rows or PRESETS[args.preset]
+    db = DataBase(args.db)
+    t = time.perf_counter()
+    n = generate(db, rows, args.seed, args.years)
+    db.close()
+    print(f"{n} operations -> {args.db} in {time.perf_counter() - t:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
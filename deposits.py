@@ -0,0 +1,63 @@
+"""Калькулятор вклада на NumPy: итог и помесячный рост без цикла по месяцам.
+
+Ставка — годовая в процентах, срок — в месяцах, взнос вносится в начале
+каждого месяца (как и первоначальная сумма в начале срока). Проценты
+капитализируются раз в период; внутри периода они начисляются простые и
+прибавляются в его конце, а за неполный последний период — при закрытии
+вклада. Все аргументы могут быть массивами и транслируются друг с другом.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+CAP_NONE, CAP_DAILY, CAP_MONTHLY, CAP_QUARTERLY = "none", "daily", "monthly", "quarterly"
+CAPITALIZATION = (CAP_NONE, CAP_DAILY, CAP_MONTHLY, CAP_QUARTERLY)
+
+
+def _value(initial, rate, months, monthly, cap: str, close):
+    """Сумма на счёте после ``months`` месяцев; ``close`` — добавить ещё не
+    капитализированные проценты (закрытие вклада)."""
+    p = np.asarray(initial, dtype=float)
+    j = np.asarray(rate, dtype=float) / 12 / 100
+    k = np.asarray(months, dtype=float)
+    m = np.asarray(monthly, dtype=float)
+    if cap == CAP_NONE:
+        # простые проценты на первоначальную сумму в конце срока
+        return p + m * k + np.where(close, p * j * k, 0.0)
+    if cap == CAP_DAILY:
+        # ежедневная капитализация — эффективная месячная ставка
+        j = (1 + j / (365 / 12)) ** (365 / 12) - 1
+        per = 1
+    else:
+        per = 3 if cap == CAP_QUARTERLY else 1
+    q = per * j
+    full, rest = k // per, k % per
+    # за период: B -> B·(1 + q) + m·(per + j·per·(per + 1)/2) — аннуитет пренумерандо
+    add = m * (per + j * per * (per + 1) / 2)
+    growth = (1 + q) ** full
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annuity = np.where(q > 0, (growth - 1) / q, full)
+    bal = p * growth + add * annuity
+    # неполный период: взносы уже на счёте, проценты по ним ещё не начислены
+    accrued = j * (bal * rest + m * rest * (rest + 1) / 2)
+    return bal + m * rest + np.where(close, accrued, 0.0)
+
+
+def deposit_total(initial, rate, term, monthly=0.0, cap: str = CAP_MONTHLY):
+    """Итог вклада к концу срока по замкнутой формуле."""
+    return _value(initial, rate, term, monthly, cap, True)
+
+
+def deposit_balance(initial: float, rate: float, term: int, monthly: float = 0.0,
+                    cap: str = CAP_MONTHLY):
+    """Помесячный ряд: (внесено, сумма на счёте) на конец каждого месяца 1..term."""
+    k = np.arange(1, term + 1)
+    balance = _value(initial, rate, k, monthly, cap, k == term)
+    return initial + monthly * k, balance
+
+
+def deposit_grid(initial, rates, terms, monthly=0.0, cap: str = CAP_MONTHLY):
+    """Итоги для всех пар ставка × срок: массив (len(rates), len(terms))."""
+    r = np.atleast_1d(np.asarray(rates, dtype=float))[:, None]
+    n = np.atleast_1d(np.asarray(terms, dtype=float))[None, :]
+    return deposit_total(initial, r, n, monthly, cap)
@@ -1,11 +1,11 @@
 from __future__ import annotations
-import json, os, logging
+import json, os, logging, threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, Optional
-
-import requests
-from PySide6.QtCore import QSettings
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
 
+from dataLoad import JsonSettings
 from variables import DEFAULT_CURRENCY_RATES
 
 _LOG = logging.getLogger(__name__)
@@ -22,12 +22,14 @@ class RateProvider:
 
     _URL_FALL  = "https://open.er-api.com/v6/latest/USD"
 
-    def __init__(self) -> None:
-        self._s = QSettings(self.ORG, self.APP)
-        self._rates: Dict[str, float] = (
-            self._load_cached() or DEFAULT_CURRENCY_RATES.copy()
-        )
-        self._update_once_per_day()
+    def __init__(self, path: Optional[Path] = None) -> None:
+        # path — JSON-файл настроек для работы без Qt, иначе QSettings
+        self._path = path
+        self._s = self._settings()
+        cached, self._fresh = self._load_cached()
+        self._rates: Dict[str, float] = cached or DEFAULT_CURRENCY_RATES.copy()
+        self._listeners: List[Callable[[Dict[str, float]], None]] = []
+        self._thread: Optional[threading.Thread] = None
 
     def __getitem__(self, code: str) -> float:
         return self._rates[code]
@@ -35,27 +37,44 @@ class RateProvider:
     def all(self) -> Dict[str, float]:
         return self._rates.copy()
 
-    def _load_cached(self) -> Optional[Dict[str, float]]:
+    def subscribe(self, callback: Callable[[Dict[str, float]], None]) -> None:
+        """callback(rates) вызывается из фонового потока после обновления курсов."""
+        self._listeners.append(callback)
+
+    def _load_cached(self) -> Tuple[Optional[Dict[str, float]], bool]:
+        """(курсы из кэша любой давности, обновлялись ли они сегодня)."""
         try:
+            rates = json.loads(self._s.value(self._KEY_RATES, ""))
             date_iso = self._s.value(self._KEY_DATE, "")
-            if date_iso and datetime.fromisoformat(date_iso).date() == datetime.utcnow().date():
-                return json.loads(self._s.value(self._KEY_RATES, ""))
+            fresh = bool(date_iso) and (
+                datetime.fromisoformat(date_iso).date() == datetime.utcnow().date()
+            )
+            return rates, fresh
         except Exception:
-            pass
-        return None
+            return None, False
+
+    def _settings(self):
+        if self._path is not None:
+            return JsonSettings(self._path)
+        from PySide6.QtCore import QSettings
+
+        return QSettings(self.ORG, self.APP)
 
     def _save_cache(self):
-        self._s.setValue(self._KEY_RATES, json.dumps(self._rates))
-        self._s.setValue(self._KEY_DATE, datetime.utcnow().isoformat())
-        self._s.sync()
+        # QSettings не потокобезопасен — у фонового потока свой экземпляр
+        s = self._settings()
+        s.setValue(self._KEY_RATES, json.dumps(self._rates))
+        s.setValue(self._KEY_DATE, datetime.utcnow().isoformat())
+        s.sync()
 
-    def _fetch_xhost(self) -> Dict[str, float]:
+    def _fetch_xhost(self, key: str = "") -> Dict[str, float]:
         """Первый источник — exchangerate.host (apilayer)."""
         params = self._PARAMS_X.copy()
-        key = os.getenv(self._ENV_KEY) or self._s.value(self._ENV_KEY, "")
         if key:
             params["access_key"] = key
 
+        import requests
+
         resp = requests.get(self._URL_XHOST, params=params, timeout=5)
         resp.raise_for_status()
         data = resp.json()
@@ -73,6 +92,8 @@ class RateProvider:
         }
 
     def _fetch_open_er(self) -> Dict[str, float]:
+        import requests
+
         resp = requests.get(self._URL_FALL, timeout=5)
         resp.raise_for_status()
         data = resp.json()
@@ -89,20 +110,44 @@ class RateProvider:
             "EUR": usd_rub / usd_eur,
         }
 
-    def _update_once_per_day(self):
-        if self._load_cached():
-            return
-
+    def _fetch_any(self, key: str) -> Tuple[str, Dict[str, float]]:
+        """Опрашивает оба источника одновременно, берёт первый удачный ответ."""
+        ex = ThreadPoolExecutor(max_workers=2)
+        futures = {
+            ex.submit(self._fetch_xhost, key): "exchangerate.host",
+            ex.submit(self._fetch_open_er): "open.er-api.com",
+        }
+        errors = []
         try:
-            self._rates = self._fetch_xhost()
-            _LOG.info("Курсы обновлены через exchangerate.host")
-        except Exception as e_x:
-            _LOG.warning("exchangerate.host недоступен (%s) — пытаемся fallback", e_x)
-            try:
-                self._rates = self._fetch_open_er()
-                _LOG.info("Курсы обновлены через open.er-api.com")
-            except Exception as e_f:
-                _LOG.error("оба провайдера недоступны (%s) — остаёмся на кэше", e_f)
-
+            for f in as_completed(futures):
+                try:
+                    return futures[f], f.result()
+                except Exception as e:
+                    _LOG.warning("%s недоступен (%s)", futures[f], e)
+                    errors.append(e)
         finally:
-            self._save_cache()
+            ex.shutdown(wait=False, cancel_futures=True)
+        raise RuntimeError(f"оба провайдера недоступны: {errors}")
+
+    def _update(self, key: str) -> None:
+        try:
+            source, self._rates = self._fetch_any(key)
+        except Exception as e:
+            _LOG.error("%s — остаёмся на кэше", e)
+            return
+        _LOG.info("Курсы обновлены через %s", source)
+        self._fresh = True
+        self._save_cache()
+        for cb in self._listeners:
+            cb(self.all())
+
+    def refresh_async(self, force: bool = False) -> Optional[threading.Thread]:
+        """Обновить курсы в фоне (не чаще раза в день), не блокируя вызывающего."""
+        if (self._fresh and not force) or (self._thread and self._thread.is_alive()):
+            return None
+        key = os.getenv(self._ENV_KEY) or self._s.value(self._ENV_KEY, "")
+        self._thread = threading.Thread(
+            target=self._update, args=(key,), name="fx-refresh", daemon=True
+        )
+        self._thread.start()
+        return self._thread
@@ -0,0 +1,413 @@
+"""Логика приложения без Qt: операции, статистика, калькуляторы, прогноз.
+
+Модуль не импортирует PySide6 и matplotlib, поэтому ``FinanceCore``
+работает и в GUI (``core.FinanceApp``), и в консольном режиме (``cli``).
+"""
+from __future__ import annotations
+
+import os
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from analytics import HAS_NUMPY, ColumnarOps, FxTable, PeriodStats
+from dataBase import DataBase
+from dataLoad import SettingsManager, export_operations, read_operations
+from exchange import RateProvider
+
+logger = logging.getLogger(__name__)
+
+
+def _add_months(d: date, k: int) -> date:
+    """Первое число месяца, отстоящего от ``d`` на ``k`` месяцев."""
+    y, m = divmod(d.year * 12 + d.month - 1 + k, 12)
+    return date(y, m + 1, 1)
+
+
+class FinanceCore:
+    def __init__(
+        self, db: DataBase, settings: SettingsManager | None = None,
+        fx: RateProvider | None = None,
+    ) -> None:
+        # по умолчанию — настройки и кэш курсов GUI (QSettings)
+        self.db = db
+        self.settings = settings or SettingsManager()
+        self.fx = fx or RateProvider()
+        self._stats: dict[tuple[int | None, str], PeriodStats] = {}
+        self._fx_tables: dict[str, FxTable | None] = {}
+        self.currency = self.settings.get("currency")
+        self.version = 0
+        self._fc_pool = None  # см. _forecast_pool
+        # справочник категорий: (id -> название, (user_id, type) -> [(id, название)]);
+        # сбрасывается только при изменении категорий, cat_version растёт
+        self._cats: tuple[dict[int, str], dict[tuple[int, int], list]] | None = None
+        self.cat_version = 0
+        self.stats_backend = self.settings.get("stats_backend")
+        if self.stats_backend == "numpy" and not HAS_NUMPY:
+            logger.warning("numpy не установлен — статистика считается в SQLite")
+            self.stats_backend = "sql"
+
+        self.user_id = self.db.ensure_default_user()
+        self.account_id = self.db.ensure_default_account(self.user_id)
+        self._ensure_categories()
+
+    def add(self, day: date, amount_rub: float, cat: int, income: bool, note: str = "") -> int:
+        op_id = self.db.add_operation(
+            self.account_id,
+            1 if income else 0,
+            abs(amount_rub),
+            cat,
+            datetime.combine(day, datetime.min.time()),
+            note,
+        )
+        self._patch_stats(self.db.get_operation(op_id), 1)
+        return op_id
+
+    def delete(self, op_id: int) -> None:
+        self._patch_stats(self.db.get_operation(op_id), -1)
+        self.db.delete_operation(op_id)
+
+    def _patch_stats(self, op, sign: int) -> None:
+        self.version += 1
+        if op is None:
+            return
+        op = dict(op, category_name=self.cat_name(op["category_id"]))
+        for st in self._stats.values():
+            st.apply(op, sign)
+
+    def import_operations(self, path: str, progress=None, db: DataBase | None = None) -> int:
+        """Загрузить операции из CSV / OFX одной транзакцией; новые категории
+        создаются в ней же. ``db`` — пишущее соединение фонового потока."""
+        db = db or self.db
+        known = {
+            (cat_type, name.lower()): cid
+            for (_, cat_type), items in self._cat_cache(db)[1].items()
+            for cid, name in items
+        }
+
+        def rows():
+            for r in read_operations(path):
+                op_type = 1 if r["amount"] > 0 else 0
+                cat = None
+                if r["category"]:
+                    key = (op_type, r["category"].lower())
+                    if key not in known:
+                        known[key] = self.add_category(r["category"], op_type, db)
+                    cat = known[key]
+                yield self.account_id, op_type, abs(r["amount"]), cat, r["date"], r["note"]
+
+        try:
+            return db.add_operations_bulk(rows(), progress)
+        finally:
+            # только после COMMIT (или отката): статистика, посчитанная во время
+            # вставки, получила старую версию и не будет принята
+            self._stats.clear()
+            self.version += 1
+
+    # методы чтения принимают db, чтобы их можно было вызвать из рабочего
+    # потока с его собственным соединением
+    def ops(
+        self, limit: int | None = None, offset: int = 0, db: DataBase | None = None,
+        query: str = "",
+    ):
+        """Лента операций; с ``query`` — только найденные по описанию."""
+        fx_code = None if self.currency == "RUB" else self.currency
+        if query:
+            return (db or self.db).search_operations(
+                self.account_id, query, limit=limit, offset=offset, fx_code=fx_code
+            )
+        return (db or self.db).list_operations(
+            self.account_id, limit=limit, offset=offset, fx_code=fx_code
+        )
+
+    def ops_count(
+        self, start=None, end=None, category_ids=None, db: DataBase | None = None
+    ) -> int:
+        return (db or self.db).count_operations(self.account_id, start, end, category_ids)
+
+    def export_operations(
+        self, path: str, headers, start=None, end=None, category_ids=None,
+        progress=None, db: DataBase | None = None,
+    ) -> int:
+        """Выгрузить операции в файл потоково, суммы — в валюте отображения."""
+        fx_code = None if self.currency == "RUB" else self.currency
+        k = self.fx[self.currency]
+        names = self.cat_names(db)
+
+        def rows():
+            for chunk in (db or self.db).iter_operations(
+                self.account_id, start, end, category_ids, fx_code
+            ):
+                yield [
+                    (
+                        datetime.fromisoformat(d),
+                        (a if t else -a) / 100 / (fx or k),
+                        names.get(c) or "—",
+                        n or "",
+                    )
+                    for d, a, t, c, n, fx in chunk
+                ]
+
+        return export_operations(rows(), path, headers, progress)
+
+    def op(self, op_id: int):
+        return self.db.get_operation(op_id, None if self.currency == "RUB" else self.currency)
+
+    def balance(self) -> float:
+        return self.db.get_account_balance(self.account_id) / 100
+
+    def totals(self, db: DataBase | None = None) -> tuple[float, float]:
+        inc, exp = (db or self.db).operation_totals(self.account_id)
+        return inc / 100, exp / 100
+
+    def _ensure_categories(self):
+        if self.cat_names():
+            return
+        with self.db.transaction():
+            for n in ("Еда", "Транспорт", "Развлечения"):
+                self.add_category(n, 0)
+            for n in ("Зарплата", "Подарок"):
+                self.add_category(n, 1)
+
+    def _cat_cache(self, db: DataBase | None = None):
+        cache = self._cats
+        if cache is None:
+            version = self.cat_version
+            names: dict[int, str] = {}
+            by_type: dict[tuple[int, int], list[tuple[int, str]]] = defaultdict(list)
+            for c in (db or self.db).get_categories(self.user_id):
+                names[c["id"]] = c["name"]
+                by_type[self.user_id, c["type"]].append((c["id"], c["name"]))
+            cache = (names, dict(by_type))
+            # пока читали, категории могли измениться — такой снимок не сохраняем
+            if version == self.cat_version:
+                self._cats = cache
+        return cache
+
+    def cats(self, income: bool) -> list[tuple[int, str]]:
+        return self._cat_cache()[1].get((self.user_id, 1 if income else 0), [])
+
+    def cat_names(self, db: DataBase | None = None) -> dict[int, str]:
+        return self._cat_cache(db)[0]
+
+    def cat_name(self, cat_id: int | None) -> str | None:
+        return None if cat_id is None else self.cat_names().get(cat_id)
+
+    def add_category(self, name: str, cat_type: int, db: DataBase | None = None) -> int:
+        cat_id = (db or self.db).add_category(self.user_id, name, cat_type)
+        self._cats = None
+        self.cat_version += 1
+        return cat_id
+
+    @staticmethod
+    def border(days: int | None) -> str | None:
+        """Первый день периода «последние ``days`` дней» (ISO); None — всё время."""
+        # операции хранятся с точностью до дня: "последние N дней" —
+        # это сегодня и N - 1 предыдущих дней
+        if days is None:
+            return None
+        return (date.today() - timedelta(days=days - 1)).isoformat()
+
+    def stats(self, days: int | None):
+        """Статистика за период в валюте ``self.currency``."""
+        since = self.border(days)
+        st = self._stats.get((days, self.currency))
+        if st is None or st.since != since:
+            st = self._stats[days, self.currency] = self.compute_stats(since)
+        return st.result(self.fx[self.currency])
+
+    def cached_stats(self, days: int | None):
+        st = self._stats.get((days, self.currency))
+        if st is None or st.since != self.border(days):
+            return None
+        return st.result(self.fx[self.currency])
+
+    def install_stats(self, days: int | None, version: int, st: PeriodStats) -> bool:
+        """Принять статистику, посчитанную в фоне; False — данные успели измениться."""
+        if (
+            version != self.version
+            or st.since != self.border(days)
+            or st.code != self.currency
+        ):
+            return False
+        self._stats[days, st.code] = st
+        return True
+
+    def fx_table(self, code: str, db: DataBase | None = None) -> FxTable | None:
+        if code == "RUB":
+            return None
+        if code not in self._fx_tables:
+            self._fx_tables[code] = FxTable.load(db or self.db, code)
+        return self._fx_tables[code]
+
+    def add_fx_rates(self, rates) -> int:
+        n = self.db.add_fx_rates_bulk(rates)
+        self._fx_tables.clear()
+        self._stats = {key: st for key, st in self._stats.items() if key[1] == "RUB"}
+        self.version += 1
+        return n
+
+    def compute_stats(
+        self, since: str | None, db: DataBase | None = None, code: str | None = None
+    ) -> PeriodStats:
+        """Статистика с даты since. Суммы пересчитываются по курсу на дату операции,
+        если для валюты есть история курсов и установлен numpy; иначе остаются
+        в рублях и делятся на текущий курс в ``result``."""
+        db = db or self.db
+        code = code or self.currency
+        fx = self.fx_table(code, db) if HAS_NUMPY else None
+        if fx is not None or self.stats_backend == "numpy":
+            cols = ColumnarOps.load(db, self.account_id, self.cat_names(db))
+            return cols.period_stats(since, code, fx)
+        return PeriodStats.from_rows(
+            since,
+            db.category_sums(self.account_id, 0, since),
+            db.monthly_sums(self.account_id, since),
+            db.daily_balance(self.account_id, since),
+            code,
+            db.balance_at(self.account_id, since) if since else 0,
+        )
+
+    def check_stats_cache(self) -> list[tuple[int | None, str]]:
+        """Ключи закэшированной статистики, расходящейся с полным пересчётом."""
+        return [
+            key for key, st in self._stats.items()
+            if st.snapshot() != self.compute_stats(st.since, code=st.code).snapshot()
+        ]
+
+    def cv(self, amount: float, frm: str, to: str) -> float:
+        return amount * self.fx[frm] / self.fx[to]
+
+    # сколько последних полных месяцев берётся для подгонки прогноза
+    FORECAST_FIT_MONTHS = 24
+
+    def _forecast_pool(self):
+        """Пул процессов для прогноза; None — считать в текущем процессе."""
+        workers = int(self.settings.get("forecast_workers")) or os.cpu_count() or 1
+        if workers < 2:
+            return None
+        if self._fc_pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # spawn: форк процесса с потоками Qt небезопасен
+            self._fc_pool = ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._fc_pool
+
+    def forecast(self, months: int, db: DataBase | None = None):
+        """Прогноз баланса на ``months`` месяцев вперёд.
+
+        Возвращает (даты начала месяцев, перцентили forecast.PERCENTILES в
+        рублях по месяцам) или None, если операций для подгонки нет.
+        """
+        from forecast import CashflowModel, simulate
+
+        db = db or self.db
+        first_day = date.today().replace(day=1)
+        fit = [
+            _add_months(first_day, k).strftime("%Y-%m")
+            for k in range(-self.FORECAST_FIT_MONTHS, 0)
+        ]
+        rows = db.category_month_sums(self.account_id, fit[0], fit[-1])
+        if not rows:
+            return None
+        # окно подгонки начинается с первого месяца, где были операции
+        fit = fit[fit.index(min(r[0] for r in rows)):]
+        model = CashflowModel.fit(rows, fit)
+        bands = simulate(
+            model,
+            db.get_account_balance(self.account_id),
+            months,
+            int(self.settings.get("forecast_paths")),
+            int(self.settings.get("forecast_seed")),
+            self._forecast_pool(),
+        )
+        days = [_add_months(first_day, k) for k in range(1, months + 1)]
+        return days, bands / 100
+
+    def close(self) -> None:
+        if self._fc_pool is not None:
+            self._fc_pool.shutdown(cancel_futures=True)
+            self._fc_pool = None
+        self.db.close()
+
+    def credit(self, p, r, n):
+        return (
+            0
+            if n == 0
+            else (
+                p
+                * ((r / 12 / 100) * (1 + r / 12 / 100) ** n)
+                / (((1 + r / 12 / 100) ** n) - 1)
+                if r
+                else p / n
+            )
+        )
+
+    # сравнение кредита: сдвиги ставки (п.п.) × типовые сроки (мес)
+    CREDIT_RATE_STEPS = (-2, -1, 0, 1, 2)
+    CREDIT_TERMS = (12, 24, 36, 60, 120, 180, 240, 360)
+
+    def credit_schedule(self, p, r, n, kind="annuity", extra=None, reduce="term"):
+        """Помесячный график кредита (``loans.Schedule``), нужен NumPy."""
+        from loans import amortization
+
+        return amortization(p, r, n, kind, extra, reduce)
+
+    def credit_grid(self, p, r, n, kind="annuity"):
+        """Платёж и переплата для соседних ставок и сроков одним вызовом.
+
+        Возвращает (ставки, сроки, первый платёж, переплата); массивы
+        результата — строки по срокам, колонки по ставкам.
+        """
+        import numpy as np
+        from loans import scenario_grid
+
+        rates = np.unique(np.clip(r + np.array(self.CREDIT_RATE_STEPS, dtype=float), 0, None))
+        terms = sorted({*self.CREDIT_TERMS, n} - {0})
+        g = scenario_grid(p, rates, terms, kind)
+        return rates, terms, g["first"][0].T, g["overpay"][0].T
+
+    # сетка для сравнения вкладов: 100 ставок × 100 сроков
+    DEPOSIT_RATES = tuple(round(0.25 * k, 2) for k in range(1, 101))
+    DEPOSIT_TERMS = tuple(range(3, 303, 3))
+
+    def deposit(self, i, r, n, m, cap=True):
+        """Итог вклада. ``cap`` — режим капитализации из ``deposits``
+        или, как раньше, True/False (ежемесячная / без капитализации)."""
+        cap = cap if isinstance(cap, str) else ("monthly" if cap else "none")
+        if HAS_NUMPY:
+            from deposits import deposit_total
+
+            return round(float(deposit_total(i, r, n, m, cap)), 2)
+        if n == 0:
+            return i
+        if cap == "none":
+            return round(i + i * r / 100 * (n / 12) + m * n, 2)
+        # та же модель, что в deposits: взнос в начале месяца, проценты
+        # копятся простые и прибавляются в конце периода капитализации
+        j = r / 12 / 100
+        if cap == "daily":
+            j = (1 + j / (365 / 12)) ** (365 / 12) - 1
+        per = 3 if cap == "quarterly" else 1
+        s, accrued = i, 0.0
+        for month in range(1, n + 1):
+            s += m
+            accrued += s * j
+            if month % per == 0:
+                s, accrued = s + accrued, 0.0
+        return round(s + accrued, 2)
+
+    def deposit_series(self, i, r, n, m, cap="monthly"):
+        """Помесячно: (внесено, сумма на счёте), массивы NumPy длиной ``n``."""
+        from deposits import deposit_balance
+
+        return deposit_balance(i, r, n, m, cap)
+
+    def deposit_grid(self, i, m, cap="monthly"):
+        """Итоги по сетке DEPOSIT_RATES × DEPOSIT_TERMS одним вызовом."""
+        from deposits import deposit_grid
+
+        return deposit_grid(i, self.DEPOSIT_RATES, self.DEPOSIT_TERMS, m, cap)
@@ -0,0 +1,83 @@
+"""Прогноз баланса методом Монте-Карло.
+
+По помесячным итогам каждой категории (``MonthlyRollup``) оцениваются
+вероятность того, что в месяце по ней будут операции, и логнормальное
+распределение суммы за месяц. Траектории баланса моделируются пачками,
+каждая пачка — одна векторная операция NumPy; пачки можно раздать по
+процессам ``ProcessPoolExecutor``. Зерно каждой пачки выводится из общего
+``seed`` через ``SeedSequence.spawn``, поэтому результат не зависит от
+числа процессов и порядка их завершения.
+
+Модуль не зависит от Qt: в процессы пула импортируется только он.
+"""
+from __future__ import annotations
+
+from concurrent.futures import Executor
+
+import numpy as np
+
+PERCENTILES = (5, 25, 50, 75, 95)
+BATCH = 2000
+
+
+class CashflowModel:
+    """Параметры по статьям: знак (+1 доход, -1 расход), вероятность
+    операций в месяце, mu и sigma логарифма месячной суммы (в копейках)."""
+
+    def __init__(self, sign, p, mu, sigma) -> None:
+        self.sign = np.asarray(sign, dtype=np.float32)
+        self.p = np.asarray(p, dtype=np.float32)
+        self.mu = np.asarray(mu, dtype=np.float32)
+        self.sigma = np.asarray(sigma, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.sign)
+
+    @classmethod
+    def fit(cls, rows, months: list[str]) -> CashflowModel:
+        """``rows`` — (month, category_id, type, sum) из MonthlyRollup,
+        ``months`` — все месяцы окна подгонки (месяцы без операций
+        по статье считаются нулевыми)."""
+        col = {m: i for i, m in enumerate(months)}
+        series: dict[tuple[int, int], np.ndarray] = {}
+        for month, cat, op_type, total in rows:
+            if month in col and total > 0:
+                series.setdefault((cat, op_type), np.zeros(len(months)))[col[month]] = total
+        sign, p, mu, sigma = [], [], [], []
+        for (_, op_type), s in series.items():
+            hit = s[s > 0]
+            logs = np.log(hit)
+            sign.append(1 if op_type else -1)
+            p.append(len(hit) / len(months))
+            mu.append(logs.mean())
+            sigma.append(logs.std(ddof=1) if len(hit) > 1 else 0.0)
+        return cls(sign, p, mu, sigma)
+
+
+def simulate_batch(model: CashflowModel, start: float, months: int, n: int, seed) -> np.ndarray:
+    """``n`` траекторий баланса на конец каждого из ``months`` месяцев."""
+    rng = np.random.default_rng(seed)
+    shape = (n, months, len(model))
+    hit = rng.random(shape, dtype=np.float32) < model.p
+    amount = np.exp(model.mu + model.sigma * rng.standard_normal(shape, dtype=np.float32))
+    flow = (np.where(hit, amount, 0) * model.sign).sum(axis=2, dtype=np.float64)
+    return start + np.cumsum(flow, axis=1)
+
+
+def simulate(
+    model: CashflowModel,
+    start: float,
+    months: int,
+    paths: int,
+    seed: int = 0,
+    pool: Executor | None = None,
+    batch: int = BATCH,
+) -> np.ndarray:
+    """Перцентили PERCENTILES баланса по месяцам: массив (len(PERCENTILES), months)."""
+    if not len(model):
+        return np.full((len(PERCENTILES), months), float(start))
+    sizes = [min(batch, paths - i) for i in range(0, paths, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = ([model] * len(sizes), [start] * len(sizes), [months] * len(sizes), sizes, seeds)
+    parts = (pool.map if pool is not None and len(sizes) > 1 else map)(simulate_batch, *args)
+    return np.percentile(np.concatenate(list(parts)), PERCENTILES, axis=0)
@@ -0,0 +1,168 @@
+"""Кредитный калькулятор на NumPy: график платежей и сетки сценариев.
+
+Ставка везде — годовая в процентах, срок — в месяцах, проценты
+начисляются ежемесячно на остаток долга. Внутри одного отрезка графика
+(между досрочными погашениями) остаток считается по замкнутой формуле
+сразу для всех месяцев, циклы в Python идут только по отрезкам.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+ANNUITY, DIFFERENTIATED = "annuity", "differentiated"
+# что уменьшает досрочное погашение
+REDUCE_TERM, REDUCE_PAYMENT = "term", "payment"
+
+
+def _monthly(rate):
+    return np.asarray(rate, dtype=float) / 12 / 100
+
+
+def annuity_payment(principal, rate, term):
+    """Аннуитетный платёж; аргументы могут быть массивами и транслируются."""
+    p = np.asarray(principal, dtype=float)
+    i = _monthly(rate)
+    n = np.asarray(term, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = (1 + i) ** n
+        pay = np.where(i > 0, p * i * growth / (growth - 1), p / n)
+    return np.where(n > 0, pay, 0.0)
+
+
+class Schedule:
+    """Помесячный график: массивы одинаковой длины, месяц k — индекс k - 1."""
+
+    def __init__(self, payment, interest, principal, extra, balance) -> None:
+        self.payment = payment
+        self.interest = interest
+        self.principal = principal
+        self.extra = extra
+        self.balance = balance
+
+    @property
+    def months(self) -> int:
+        return len(self.payment)
+
+    @property
+    def total_interest(self) -> float:
+        return float(self.interest.sum())
+
+    @property
+    def total_paid(self) -> float:
+        return float(self.payment.sum() + self.extra.sum())
+
+    def rows(self):
+        """Строки таблицы: (месяц, платёж, проценты, долг, досрочно, остаток)."""
+        return zip(
+            range(1, self.months + 1),
+            self.payment.tolist(), self.interest.tolist(), self.principal.tolist(),
+            self.extra.tolist(), self.balance.tolist(),
+        )
+
+
+def _segment(balance: float, i: float, months: int, kind: str, step: float, last: bool):
+    """Платёж, проценты, долг и остаток для каждого из ``months`` месяцев отрезка.
+
+    ``step`` — аннуитетный платёж или фиксированная часть долга для
+    дифференцированной схемы. Месяцы после полного погашения отбрасываются,
+    а в последнем отрезке (``last``) остаток в конце срока — ровно ноль.
+    """
+    k = np.arange(1, months + 1)
+    if kind == ANNUITY:
+        if i > 0:
+            growth = (1 + i) ** k
+            bal = balance * growth - step * (growth - 1) / i
+        else:
+            bal = balance - step * k
+    else:
+        bal = balance - step * k
+    paid_off = np.flatnonzero(bal <= 1e-6)
+    if len(paid_off):
+        bal = bal[: paid_off[0] + 1]
+        bal[-1] = 0.0
+    elif last:
+        bal[-1] = 0.0
+    prev = np.concatenate(([balance], bal[:-1]))
+    interest = prev * i
+    principal = prev - bal
+    return interest + principal, interest, principal, bal
+
+
+def amortization(
+    principal: float,
+    rate: float,
+    term: int,
+    kind: str = ANNUITY,
+    extra: dict[int, float] | None = None,
+    reduce: str = REDUCE_TERM,
+) -> Schedule:
+    """График погашения кредита.
+
+    ``extra`` — досрочные погашения {номер месяца: сумма}, вносятся после
+    обычного платежа этого месяца. ``reduce`` — что после них меньше:
+    срок (платёж прежний) или платёж (срок прежний).
+    """
+    i = float(_monthly(rate))
+    events = sorted((m, a) for m, a in (extra or {}).items() if 0 < m < term and a > 0)
+    fixed_step = (
+        float(annuity_payment(principal, rate, term)) if kind == ANNUITY else principal / term
+    ) if term > 0 else 0.0
+
+    parts: list[tuple] = []
+    extras: list[np.ndarray] = []
+    balance, done = float(principal), 0
+    for end, amount in [*events, (term, 0.0)]:
+        if balance <= 0 or done >= term:
+            break
+        if reduce == REDUCE_PAYMENT:
+            left = term - done
+            step = float(annuity_payment(balance, rate, left)) if kind == ANNUITY else balance / left
+        else:
+            step = fixed_step
+        # при сокращении срока долг может закончиться раньше конца отрезка
+        seg = _segment(balance, i, end - done, kind, step, end == term)
+        parts.append(seg)
+        ex = np.zeros(len(seg[0]))
+        balance = float(seg[3][-1])
+        done += len(seg[0])
+        if amount and done == end and balance > 0:
+            ex[-1] = min(amount, balance)
+            balance -= ex[-1]
+            seg[3][-1] = balance
+        extras.append(ex)
+
+    if not parts:
+        empty = np.zeros(0)
+        return Schedule(empty, empty, empty, empty, empty)
+    payment, interest, princ, bal = (np.concatenate(c) for c in zip(*parts))
+    return Schedule(payment, interest, princ, np.concatenate(extras), bal)
+
+
+def scenario_grid(principal, rate, term, kind: str = ANNUITY) -> dict[str, np.ndarray]:
+    """Итоги для всех сочетаний сумм, ставок и сроков одним векторным вызовом.
+
+    Аргументы — числа или одномерные массивы; результат — массивы формы
+    (len(principal), len(rate), len(term)): первый и последний платёж,
+    сумма выплат и переплата.
+    """
+    p = np.atleast_1d(np.asarray(principal, dtype=float))[:, None, None]
+    r = np.atleast_1d(np.asarray(rate, dtype=float))[None, :, None]
+    n = np.atleast_1d(np.asarray(term, dtype=float))[None, None, :]
+    i = _monthly(r)
+    if kind == ANNUITY:
+        first = last = annuity_payment(p, r, n)
+        total = first * n
+    else:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            d = np.where(n > 0, p / n, 0.0)
+        first = d + p * i
+        last = d * (1 + i)
+        total = p + i * p * (n + 1) / 2
+    total = np.where(n > 0, total, 0.0)
+    shape = np.broadcast_shapes(p.shape, r.shape, n.shape)
+    return {
+        "first": np.broadcast_to(first, shape),
+        "last": np.broadcast_to(last, shape),
+        "total": np.broadcast_to(total, shape),
+        "overpay": np.broadcast_to(total - np.where(n > 0, p, 0.0), shape),
+    }
@@ -1,4 +1,4 @@
-from core import run_app
+import cli
 
 if __name__ == "__main__":
-    run_app()
+    cli.main()
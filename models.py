@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Callable, Sequence
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+logger = logging.getLogger(__name__)
+
+
+class OperationsModel(QAbstractTableModel):
+    """Лента операций, подгружаемая из БД страницами по мере прокрутки.
+
+    Ячейки форматируются только в ``data()``, т.е. для видимых строк;
+    добавление и удаление одной операции меняют одну строку модели. При
+    поиске по описанию (``set_query``) общее число строк заранее не
+    считается: страницы подгружаются, пока не придёт неполная.
+    """
+
+    PAGE = 500
+
+    def __init__(
+        self, core, money: Callable[[float, float | None], str], parent=None, workers=None
+    ) -> None:
+        super().__init__(parent)
+        self._core = core
+        self._money = money
+        self._workers = workers
+        self._headers: list[str] = ["", "", "", ""]
+        self._rows: list = []
+        self._total = 0
+        self._fetching = False
+        self._query = ""
+
+    # --- Qt API ---------------------------------------------------------
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        o = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return self.cell_text(o, index.column())
+        if role == Qt.UserRole:
+            return o["id"]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        # не через super(): в PySide6 None из базового headerData уменьшает
+        # счётчик ссылок None и со временем роняет интерпретатор
+        if role != Qt.DisplayRole:
+            return None
+        return self._headers[section] if orientation == Qt.Horizontal else str(section + 1)
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self._fetching and len(self._rows) < self._total
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        if parent.isValid() or self._fetching:
+            return
+        offset = len(self._rows)
+        if self._workers is None:
+            self._append(offset, self._core.ops(self.PAGE, offset, query=self._query))
+            return
+        self._fetching = True
+        self._workers.submit(
+            "ops",
+            lambda db, off, q: self._core.ops(self.PAGE, off, db, q),
+            offset,
+            self._query,
+            on_done=lambda page: self._append(offset, page),
+            on_error=self._fetch_failed,
+        )
+
+    def _fetch_failed(self, err: str) -> None:
+        # страница не пришла — следующая прокрутка запросит её снова
+        logger.warning("operations page failed: %s", err)
+        self._fetching = False
+
+    def _append(self, offset: int, page) -> None:
+        self._fetching = False
+        if offset != len(self._rows):
+            # пока страница грузилась, строки добавили или удалили
+            self.fetchMore()
+            return
+        if not page:
+            self._total = len(self._rows)
+            return
+        self.beginInsertRows(QModelIndex(), offset, offset + len(page) - 1)
+        self._rows.extend(page)
+        if self._query:
+            self._total = len(self._rows) + (len(page) == self.PAGE)
+        self.endInsertRows()
+
+    # --- форматирование -------------------------------------------------
+    def cell_text(self, o, col: int) -> str:
+        if col == 0:
+            return datetime.fromisoformat(o["date"]).strftime("%d.%m.%Y")
+        if col == 1:
+            sign = 1 if o["type"] else -1
+            return self._money(sign * o["amount"] / 100, o["fx"])
+        if col == 2:
+            return self._core.cat_name(o["category_id"]) or "—"
+        return o["note"] or ""
+
+    def row_texts(self, o) -> list[str]:
+        return [self.cell_text(o, c) for c in range(len(self._headers))]
+
+    # --- изменения ------------------------------------------------------
+    def set_headers(self, headers: Sequence[str]) -> None:
+        self._headers = list(headers)
+        self.headerDataChanged.emit(Qt.Horizontal, 0, len(self._headers) - 1)
+
+    def set_query(self, query: str) -> None:
+        query = query.strip()
+        if query != self._query:
+            self._query = query
+            self.reload()
+
+    def _load_first(self, db=None, query: str = ""):
+        page = self._core.ops(self.PAGE, 0, db, query)
+        if not query:
+            return self._core.ops_count(db=db), page
+        # при поиске: пока страница полная, считаем, что есть ещё
+        return len(page) + (len(page) == self.PAGE), page
+
+    def reload(self) -> None:
+        if self._workers is None:
+            self._reset(self._load_first(query=self._query))
+            return
+        self._fetching = True
+        self._workers.submit(
+            "ops", self._load_first, self._query, on_done=self._reset, on_error=self._fetch_failed
+        )
+
+    def _reset(self, res) -> None:
+        self.beginResetModel()
+        self._total, page = res
+        self._rows = list(page)
+        self._fetching = False
+        self.endResetModel()
+
+    def refresh(self) -> None:
+        """Перерисовать загруженные строки (сменилась валюта или язык)."""
+        if self._rows:
+            self.dataChanged.emit(
+                self.index(0, 0), self.index(len(self._rows) - 1, len(self._headers) - 1)
+            )
+
+    def op_id(self, row: int) -> int:
+        return self._rows[row]["id"]
+
+    def insert_op(self, op_id: int) -> None:
+        if self._query:
+            # подходит ли новая операция под поиск, решает база
+            self.reload()
+            return
+        o = self._core.op(op_id)
+        if o is None:
+            return
+        self._total += 1
+        key = (o["date"], o["id"])
+        pos = next(
+            (i for i, r in enumerate(self._rows) if (r["date"], r["id"]) < key),
+            len(self._rows),
+        )
+        if pos == len(self._rows) and len(self._rows) < self._total - 1:
+            # строка попадёт в ещё не загруженную страницу
+            return
+        self.beginInsertRows(QModelIndex(), pos, pos)
+        self._rows.insert(pos, o)
+        self.endInsertRows()
+
+    def remove_row(self, row: int) -> None:
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        self._total -= 1
+        self.endRemoveRows()
+
+
+class ArrayTableModel(QAbstractTableModel):
+    """Таблица из колонок одинаковой длины — списков или массивов NumPy.
+
+    Значения форматируются в ``data()`` только для видимых ячеек, так что
+    график на сотни месяцев не превращается заранее в сотни строк текста.
+    ``tips`` — необязательные колонки для всплывающих подсказок.
+    """
+
+    def __init__(self, fmt: Callable[[float], str] = str, parent=None) -> None:
+        super().__init__(parent)
+        self._fmt = fmt
+        self._headers: list[str] = []
+        self._row_headers: list[str] | None = None
+        self._cols: list = []
+        self._tips: list | None = None
+        self._n = 0
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._n
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self._fmt(float(self._cols[index.column()][index.row()]))
+        if role == Qt.ToolTipRole and self._tips is not None:
+            return self._fmt(float(self._tips[index.column()][index.row()]))
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        # см. OperationsModel.headerData: базовый метод не вызываем
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._headers[section]
+        return self._row_headers[section] if self._row_headers else str(section + 1)
+
+    def set_data(
+        self,
+        columns: Sequence,
+        headers: Sequence[str],
+        row_headers: Sequence[str] | None = None,
+        tips: Sequence | None = None,
+    ) -> None:
+        self.beginResetModel()
+        self._cols = list(columns)
+        self._headers = list(headers)
+        self._row_headers = list(row_headers) if row_headers is not None else None
+        self._tips = list(tips) if tips is not None else None
+        self._n = len(self._cols[0]) if self._cols else 0
+        self.endResetModel()
@@ -0,0 +1,173 @@
+"""Замеры горячих путей, включаемые по запросу.
+
+Включается переменной окружения FINANCE_PROFILE=1, настройкой «profiling»
+или запуском ``main.py --profile``. ``install`` оборачивает методы
+классов: для каждого вызова запоминаются время, число строк в результате
+(если это список) и корзина гистограммы задержек. Без включения методы
+не трогаются и ничего не стоят.
+"""
+from __future__ import annotations
+
+import atexit
+import cProfile
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# верхние границы корзин гистограммы, мс; последняя корзина — всё дольше
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class OpStats:
+    """Счётчики одной операции."""
+
+    __slots__ = ("calls", "total", "max", "rows", "hist")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.hist = [0] * (len(BUCKETS) + 1)
+
+    def add(self, seconds: float, rows: int | None) -> None:
+        self.calls += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.rows += rows or 0
+        ms = seconds * 1000
+        self.hist[next((i for i, b in enumerate(BUCKETS) if ms < b), len(BUCKETS))] += 1
+
+    def quantile(self, q: float) -> float:
+        """Верхняя граница корзины, в которую попадает квантиль ``q``, мс."""
+        need, seen = q * self.calls, 0
+        for i, n in enumerate(self.hist):
+            seen += n
+            if seen >= need and n:
+                return BUCKETS[i] if i < len(BUCKETS) else self.max * 1000
+        return 0.0
+
+
+_lock = threading.Lock()
+_stats: dict[str, OpStats] = {}
+_installed = False
+
+
+def requested(settings=None) -> bool:
+    if os.environ.get("FINANCE_PROFILE", "") not in ("", "0"):
+        return True
+    return settings is not None and str(settings.get("profiling")).lower() in ("1", "true")
+
+
+def enabled() -> bool:
+    return _installed
+
+
+def record(name: str, seconds: float, rows: int | None = None) -> None:
+    with _lock:
+        st = _stats.get(name)
+        if st is None:
+            st = _stats[name] = OpStats()
+        st.add(seconds, rows)
+
+
+def reset() -> None:
+    with _lock:
+        _stats.clear()
+
+
+def _wrap(name: str, fn):
+    if inspect.isgeneratorfunction(fn):
+        # считается только время внутри генератора, без работы потребителя
+        @functools.wraps(fn)
+        def gen(*args, **kwargs):
+            it, spent, rows = fn(*args, **kwargs), 0.0, 0
+            try:
+                while True:
+                    t = time.perf_counter()
+                    try:
+                        item = next(it)
+                    except StopIteration:
+                        return
+                    finally:
+                        spent += time.perf_counter() - t
+                    rows += len(item) if isinstance(item, list) else 1
+                    yield item
+            finally:
+                record(name, spent, rows)
+
+        return gen
+
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        t = time.perf_counter()
+        res = None
+        try:
+            res = fn(*args, **kwargs)
+            return res
+        finally:
+            record(name, time.perf_counter() - t, len(res) if isinstance(res, list) else None)
+
+    return timed
+
+
+def instrument(cls, names=None) -> None:
+    """Обернуть методы ``cls``: перечисленные или все публичные, кроме
+    контекстных менеджеров (их время — это время тела with)."""
+    if names is None:
+        names = [
+            n for n, v in vars(cls).items()
+            if not n.startswith("_") and inspect.isfunction(v)
+            and not inspect.isgeneratorfunction(getattr(v, "__wrapped__", None))
+        ]
+    for n in names:
+        fn = vars(cls)[n]
+        if not getattr(fn, "__profiled__", False):
+            w = _wrap(f"{cls.__name__}.{n}", fn)
+            w.__profiled__ = True
+            setattr(cls, n, w)
+
+
+def install(*targets) -> None:
+    """``targets`` — классы или пары (класс, имена методов). Итоги
+    печатаются в stderr при выходе."""
+    global _installed
+    for t in targets:
+        cls, names = t if isinstance(t, tuple) else (t, None)
+        instrument(cls, names)
+    if not _installed:
+        _installed = True
+        atexit.register(lambda: sys.stderr.write(summary()))
+
+
+def summary() -> str:
+    with _lock:
+        items = sorted(_stats.items(), key=lambda kv: kv[1].total, reverse=True)
+        lines = [
+            f"{'операция':40} {'вызовов':>8} {'всего, мс':>10} {'сред.':>8} "
+            f"{'p50≤':>7} {'p95≤':>7} {'макс.':>8} {'строк':>9}"
+        ]
+        for name, st in items:
+            lines.append(
+                f"{name:40} {st.calls:8d} {st.total * 1000:10.1f} "
+                f"{st.total * 1000 / st.calls:8.2f} {st.quantile(0.5):7.0f} "
+                f"{st.quantile(0.95):7.0f} {st.max * 1000:8.1f} {st.rows:9d}"
+            )
+    return "\n".join(lines) + "\n"
+
+
+def run_profiled(target, out: Path) -> None:
+    """Выполнить ``target()`` под cProfile; при выходе записать pstats в
+    ``out`` и сводку по операциям рядом, в ``out`` с суффиксом .txt."""
+    os.environ["FINANCE_PROFILE"] = "1"
+    prof = cProfile.Profile()
+    try:
+        prof.runcall(target)
+    finally:
+        prof.dump_stats(out)
+        out.with_suffix(".txt").write_text(summary(), encoding="utf-8")
+        print(f"profile: {out}, {out.with_suffix('.txt')}", file=sys.stderr)
@@ -0,0 +1,100 @@
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dataBase import DataBase  # noqa: E402
+from dataLoad import SettingsManager  # noqa: E402
+from exchange import RateProvider  # noqa: E402
+from fincore import FinanceCore  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DataBase(tmp_path / "finance.db")
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def core(tmp_path):
+    settings = tmp_path / "settings.json"
+    core = FinanceCore(
+        DataBase(tmp_path / "finance.db"), SettingsManager(settings), RateProvider(settings)
+    )
+    yield core
+    core.close()
+
+
+class StubRates:
+    """Поведение заглушек провайдеров курсов: задержка и отказ для каждого."""
+
+    # USD->RUB и USD->EUR; у провайдеров разные, чтобы было видно, кто ответил
+    RATES = {"xhost": {"RUB": 90.0, "EUR": 0.9}, "open_er": {"RUB": 80.0, "EUR": 0.8}}
+
+    def __init__(self) -> None:
+        self.delay = {"xhost": 0.0, "open_er": 0.0}
+        self.fail = {"xhost": False, "open_er": False}
+        self.calls: list[str] = []
+
+    def expected(self, name: str) -> dict[str, float]:
+        r = self.RATES[name]
+        return {"RUB": 1.0, "USD": r["RUB"], "EUR": r["RUB"] / r["EUR"]}
+
+    def answer(self, name: str) -> dict[str, float]:
+        self.calls.append(name)
+        time.sleep(self.delay[name])
+        if self.fail[name]:
+            raise RuntimeError(f"{name}: 503")
+        return self.expected(name)
+
+
+@pytest.fixture
+def stub_rates(monkeypatch):
+    """Подменяет оба провайдера RateProvider без сети."""
+    stub = StubRates()
+    monkeypatch.setattr(RateProvider, "_fetch_xhost", lambda self, key="": stub.answer("xhost"))
+    monkeypatch.setattr(RateProvider, "_fetch_open_er", lambda self: stub.answer("open_er"))
+    return stub
+
+
+@pytest.fixture
+def rates_server(monkeypatch):
+    """Локальный HTTP-сервер вместо обоих провайдеров: проверяет и разбор ответов."""
+    pytest.importorskip("requests")
+    stub = StubRates()
+    paths = {"/latest": "xhost", "/v6/latest/USD": "open_er"}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            name = paths[urlsplit(self.path).path]
+            try:
+                stub.answer(name)
+            except RuntimeError:
+                self.send_error(503)
+                return
+            rates = StubRates.RATES[name]
+            body = json.dumps({"success": True, "result": "success", "rates": rates})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(body.encode())
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{srv.server_address[1]}"
+    monkeypatch.setattr(RateProvider, "_URL_XHOST", f"{url}/latest")
+    monkeypatch.setattr(RateProvider, "_URL_FALL", f"{url}/v6/latest/USD")
+    yield stub
+    srv.shutdown()
+    srv.server_close()
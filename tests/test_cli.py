@@ -0,0 +1,69 @@
+import json
+from datetime import date
+
+import pytest
+
+import cli
+from dataBase import DataBase
+
+
+@pytest.fixture
+def run(tmp_path, capsys):
+    def run(*argv):
+        cli.main(["--db", str(tmp_path / "cli.db"), "--settings", str(tmp_path / "s.json"), *argv])
+        return capsys.readouterr().out
+
+    return run
+
+
+def test_import_and_stats(run, tmp_path):
+    src = tmp_path / "bank.csv"
+    src.write_text(
+        f"Дата;Сумма;Категория\n{date.today():%d.%m.%Y};-1 500,00;Еда\n"
+        f"{date.today():%d.%m.%Y};\"10,000.00\";Зарплата\n",
+        encoding="utf-8",
+    )
+    run("import", str(src))
+    s = json.loads(run("stats", "--period", "week"))
+    assert s["income"] == 10_000 and s["expense"] == 1_500
+    assert s["categories"] == {"Еда": 1_500}
+
+
+def test_import_fx(run, tmp_path):
+    src = tmp_path / "fx.csv"
+    src.write_text("date,USD,EUR\n2024-01-01,90,98\n2024-01-02,91,99\n", encoding="utf-8")
+    assert run("import-fx", str(src)).strip() == "FX rates imported: 4"
+    db = DataBase(tmp_path / "cli.db")
+    assert [r["rate"] for r in db.fx_rates("USD")] == [90, 91]
+    db.close()
+
+
+def test_rebuild_rollup(run, tmp_path):
+    src = tmp_path / "bank.csv"
+    src.write_text("Дата;Сумма;Категория\n01.01.2020;-700;Еда\n01.02.2020;900;Подарок\n")
+    run("import", str(src))
+    before = run("stats", "--period", "all")
+    db = DataBase(tmp_path / "cli.db")
+    db.conn.execute("DELETE FROM MonthlyRollup")
+    db.conn.execute("DELETE FROM BalanceCheckpoint")
+    db.conn.commit()
+    db.close()
+    run("rebuild-rollup")
+    assert run("stats", "--period", "all") == before
+    assert json.loads(before)["income"] == 900
+
+
+def test_gui_options_are_parsed():
+    args = cli.parser().parse_args(["--profile"])
+    assert args.cmd is None and args.profile.name == "finance.prof"
+    assert cli.parser().parse_args([]).profile is None
+
+
+@pytest.mark.parametrize(
+    "argv", [["--bogus"], ["--rebuild-rollup"], ["import-fx"], ["--profile", "x.prof", "stats"]]
+)
+def test_bad_arguments_are_reported(argv, capsys):
+    with pytest.raises(SystemExit) as e:
+        cli.main(argv)
+    assert e.value.code == 2
+    assert "error:" in capsys.readouterr().err
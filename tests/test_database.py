@@ -0,0 +1,88 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def _seed(db, rows=500):
+    rnd = random.Random(1)
+    user_id = db.ensure_default_user()
+    account_id = db.ensure_default_account(user_id)
+    cats = [db.add_category(user_id, f"cat{i}", i % 2) for i in range(6)]
+    start = datetime(2023, 1, 1)
+    db.add_operations_bulk(
+        (
+            account_id,
+            rnd.random() < 0.3,
+            rnd.randrange(100, 100_000) / 100,
+            rnd.choice(cats),
+            start + timedelta(days=rnd.randrange(700)),
+            None,
+        )
+        for _ in range(rows)
+    )
+    return account_id
+
+
+def test_query_plans_use_operation_indexes(db):
+    account_id = _seed(db)
+    plans = db.check_query_plans(account_id)
+    assert set(plans) == {
+        "list_operations", "operation_totals", "category_sums", "monthly_sums", "daily_balance",
+    }
+    assert all(plans.values())
+
+
+def test_query_plans_report_missing_index(db):
+    account_id = _seed(db)
+    db.conn.execute("DROP INDEX idx_operation_account_date")
+    db.conn.execute("DROP INDEX idx_operation_account_type_cat_date")
+    with pytest.raises(RuntimeError, match="list_operations"):
+        db.check_query_plans(account_id)
+
+
+def _commits(db, fn):
+    before = db.commit_count
+    fn()
+    return db.commit_count - before
+
+
+def test_bulk_import_is_one_commit(db):
+    user_id = db.ensure_default_user()
+    account_id = db.ensure_default_account(user_id)
+    cat = db.add_category(user_id, "Еда", 0)
+    ops = [(account_id, 0, 10.5, cat, datetime(2024, 1, d), None) for d in range(1, 29)]
+    assert _commits(db, lambda: db.add_operations_bulk(ops, chunk=5)) == 1
+    assert db.get_account_balance(account_id) == -28 * 1050
+
+
+def test_default_categories_are_one_commit(core):
+    core.db.conn.execute("DELETE FROM Category")
+    core.db.conn.commit()
+    core._cats = None
+    assert _commits(core.db, core._ensure_categories) == 1
+    assert len(core.cats(False)) == 3 and len(core.cats(True)) == 2
+
+
+def test_add_operation_is_one_commit(db):
+    user_id = db.ensure_default_user()
+    account_id = db.ensure_default_account(user_id)
+    assert _commits(
+        db, lambda: db.add_operation(account_id, 1, 100, None, datetime(2024, 5, 1))
+    ) == 1
+
+
+def test_nested_transaction_commits_once_and_rolls_back_savepoint(db):
+    user_id = db.ensure_default_user()
+
+    def work():
+        with db.transaction():
+            db.add_category(user_id, "a", 0)
+            with pytest.raises(ValueError):
+                with db.transaction():
+                    db.add_category(user_id, "b", 0)
+                    raise ValueError
+            db.add_category(user_id, "c", 0)
+
+    assert _commits(db, work) == 1
+    assert sorted(c["name"] for c in db.get_categories(user_id)) == ["a", "c"]
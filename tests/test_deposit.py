@@ -0,0 +1,37 @@
+import pytest
+
+import fincore
+
+
+@pytest.fixture
+def no_numpy(monkeypatch):
+    monkeypatch.setattr(fincore, "HAS_NUMPY", False)
+
+
+@pytest.mark.parametrize(
+    "cap, expected",
+    [
+        ("none", 1030.0),
+        ("monthly", 1030.30),
+        ("quarterly", 1030.0),
+        ("daily", round(1000 * (1 + 0.12 / 365) ** (365 / 4), 2)),
+    ],
+)
+def test_loop_without_numpy(core, no_numpy, cap, expected):
+    assert core.deposit(1000, 12, 3, 0, cap) == pytest.approx(expected, abs=0.01)
+
+
+def test_loop_keeps_bool_cap(core, no_numpy):
+    assert core.deposit(1000, 12, 3, 0, True) == core.deposit(1000, 12, 3, 0, "monthly")
+    assert core.deposit(1000, 12, 3, 0, False) == core.deposit(1000, 12, 3, 0, "none")
+
+
+@pytest.mark.parametrize("cap", ["none", "daily", "monthly", "quarterly"])
+@pytest.mark.parametrize("n", [1, 4, 12, 37])
+def test_loop_matches_closed_form(core, monkeypatch, cap, n):
+    pytest.importorskip("numpy")
+    import deposits
+
+    expected = round(float(deposits.deposit_total(50_000, 9.5, n, 3_000, cap)), 2)
+    monkeypatch.setattr(fincore, "HAS_NUMPY", False)
+    assert core.deposit(50_000, 9.5, n, 3_000, cap) == pytest.approx(expected, abs=0.01)
@@ -0,0 +1,114 @@
+import json
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from exchange import RateProvider
+from variables import DEFAULT_CURRENCY_RATES
+
+CACHED = {"RUB": 1.0, "USD": 70.0, "EUR": 75.0}
+
+
+@pytest.fixture
+def settings(tmp_path):
+    return tmp_path / "settings.json"
+
+
+def _cache(path, rates=CACHED, day=None):
+    day = day or datetime.utcnow()
+    path.write_text(json.dumps({"fx_rates": json.dumps(rates), "fx_date": day.isoformat()}))
+
+
+def _refresh(fx, force=False):
+    """Запустить обновление и дождаться фонового потока."""
+    t = fx.refresh_async(force)
+    assert t is not None
+    t.join(10)
+    assert not t.is_alive()
+
+
+def test_fresh_cache_skips_network(settings, stub_rates):
+    _cache(settings)
+    fx = RateProvider(settings)
+    assert fx.all() == CACHED
+    assert fx.refresh_async() is None
+    assert stub_rates.calls == []
+
+
+def test_refresh_does_not_block_startup(settings, stub_rates):
+    _cache(settings, day=datetime(2020, 1, 1))
+    stub_rates.delay = {"xhost": 1.0, "open_er": 1.0}
+    t0 = time.perf_counter()
+    fx = RateProvider(settings)
+    thread = fx.refresh_async()
+    assert time.perf_counter() - t0 < 0.5
+    # до ответа провайдеров — устаревший кэш, а не курсы по умолчанию
+    assert fx.all() == CACHED
+    thread.join(10)
+    assert fx.all() in (stub_rates.expected("xhost"), stub_rates.expected("open_er"))
+
+
+def test_slow_provider_falls_back_to_the_other(settings, stub_rates):
+    stub_rates.delay["xhost"] = 3.0
+    fx = RateProvider(settings)
+    t0 = time.perf_counter()
+    _refresh(fx, force=True)
+    assert time.perf_counter() - t0 < 2.0
+    assert fx.all() == stub_rates.expected("open_er")
+
+
+@pytest.mark.parametrize("failing, used", [("xhost", "open_er"), ("open_er", "xhost")])
+def test_failing_provider_falls_back_to_the_other(settings, stub_rates, failing, used):
+    stub_rates.fail[failing] = True
+    fx = RateProvider(settings)
+    _refresh(fx, force=True)
+    assert fx.all() == stub_rates.expected(used)
+    # свежие курсы сохранены в кэш и подхватываются следующим запуском
+    again = RateProvider(settings)
+    assert again.all() == stub_rates.expected(used)
+    assert again.refresh_async() is None
+
+
+def test_both_failing_keeps_cached_rates(settings, stub_rates):
+    _cache(settings, day=datetime(2020, 1, 1))
+    stub_rates.fail = {"xhost": True, "open_er": True}
+    fx = RateProvider(settings)
+    got = []
+    fx.subscribe(got.append)
+    _refresh(fx)
+    assert fx.all() == CACHED
+    assert got == []
+    assert sorted(stub_rates.calls) == ["open_er", "xhost"]
+    assert json.loads(json.loads(settings.read_text())["fx_rates"]) == CACHED
+
+
+def test_both_failing_without_cache_uses_defaults(settings, stub_rates):
+    stub_rates.fail = {"xhost": True, "open_er": True}
+    fx = RateProvider(settings)
+    _refresh(fx)
+    assert fx.all() == DEFAULT_CURRENCY_RATES
+
+
+def test_subscribers_get_new_rates(settings, stub_rates):
+    fx = RateProvider(settings)
+    got, threads = [], []
+
+    def listener(rates):
+        got.append(rates)
+        threads.append(threading.current_thread().name)
+
+    fx.subscribe(listener)
+    fx.subscribe(lambda rates: got.append(rates))
+    _refresh(fx, force=True)
+    assert got == [fx.all()] * 2
+    assert fx.all() in (stub_rates.expected("xhost"), stub_rates.expected("open_er"))
+    assert threads == ["fx-refresh"]
+
+
+def test_http_providers(settings, rates_server):
+    rates_server.fail["xhost"] = True
+    fx = RateProvider(settings)
+    _refresh(fx, force=True)
+    assert fx.all() == rates_server.expected("open_er")
@@ -0,0 +1,41 @@
+import csv
+from datetime import date
+
+import pytest
+
+HEADERS = ("Дата", "Сумма", "Категория", "Описание")
+
+
+@pytest.fixture
+def usd_core(core):
+    food = core.cats(False)[0][0]
+    salary = core.cats(True)[0][0]
+    core.add(date(2024, 3, 1), 100, food, False, "кофе")
+    core.add(date(2024, 3, 2), 1234.57, salary, True)
+    core.add(date(2024, 3, 3), 0.3, food, False)
+    core.currency = "USD"
+    return core
+
+
+def _csv_amounts(path):
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f, delimiter=";"))
+    assert tuple(rows[0]) == HEADERS
+    return [float(r[1]) for r in rows[1:]]
+
+
+def test_csv_amounts_in_display_currency(usd_core, tmp_path):
+    path = tmp_path / "ops.csv"
+    assert usd_core.export_operations(str(path), HEADERS) == 3
+    k = usd_core.fx["USD"]
+    assert sorted(_csv_amounts(path)) == sorted(
+        round(v / k, 2) for v in (-100, 1234.57, -0.3)
+    )
+
+
+def test_parquet_amounts_match_csv(usd_core, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    usd_core.export_operations(str(tmp_path / "ops.csv"), HEADERS)
+    usd_core.export_operations(str(tmp_path / "ops.parquet"), HEADERS)
+    amounts = pq.read_table(tmp_path / "ops.parquet").column(HEADERS[1]).to_pylist()
+    assert amounts == _csv_amounts(tmp_path / "ops.csv")
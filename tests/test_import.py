@@ -0,0 +1,109 @@
+from datetime import datetime
+
+import pytest
+
+from dataLoad import _parse_amount, read_operations
+
+
+@pytest.mark.parametrize(
+    "text, value",
+    [
+        ("1234.56", 1234.56),
+        ("1234,56", 1234.56),
+        ("-350", -350.0),
+        ("+1 234,56", 1234.56),
+        ("1\u00a0234,56", 1234.56),
+        ("1\u202f234,56 ₽", 1234.56),
+        ("1,234.56", 1234.56),
+        ("-1.234,56", -1234.56),
+        ("1,234,567.8", 1234567.8),
+        ("1.234.567", 1234567.0),
+        ("$ -12.50", -12.5),
+        ("-$12.50", -12.5),
+        ("-50,00 р.", -50.0),
+        ("1 234,56 руб.", 1234.56),
+        ("$1,234.56", 1234.56),
+        ("\u221250,00", -50.0),
+    ],
+)
+def test_parse_amount(text, value):
+    assert _parse_amount(text) == pytest.approx(value)
+
+
+@pytest.mark.parametrize("text", ["", "  ", "руб.", "—"])
+def test_parse_amount_rejects_text_without_digits(text):
+    with pytest.raises(ValueError):
+        _parse_amount(text)
+
+
+def _write(tmp_path, text, name="ops.csv"):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_csv_with_thousands_separators(tmp_path):
+    path = _write(
+        tmp_path,
+        "Дата;Сумма;Категория;Описание\n"
+        "01.02.2024;\"1,234.56\";Зарплата;аванс\n"
+        "02.02.2024;-1\u00a0234,56;Еда;\n"
+        "03.02.2024;-2.500,00;Еда;ужин\n",
+    )
+    rows = list(read_operations(path))
+    assert [r["amount"] for r in rows] == pytest.approx([1234.56, -1234.56, -2500.0])
+    assert rows[0]["date"] == datetime(2024, 2, 1)
+    assert rows[0]["category"] == "Зарплата" and rows[1]["note"] is None
+
+
+def test_csv_comma_delimited_with_quoted_amounts(tmp_path):
+    path = _write(
+        tmp_path,
+        "date,amount,category,note\n"
+        "2024-02-01,\"1,234.56\",Salary,\n"
+        "2024-02-02,-45.10,Food,lunch\n",
+    )
+    rows = list(read_operations(path))
+    assert [r["amount"] for r in rows] == pytest.approx([1234.56, -45.10])
+
+
+def test_import_thousands_separators_into_core(core, tmp_path):
+    path = _write(tmp_path, "Дата;Сумма;Категория\n01.02.2024;\"1,234.56\";Зарплата\n")
+    assert core.import_operations(str(path)) == 1
+    assert core.balance() == pytest.approx(1234.56)
+
+
+@pytest.mark.parametrize("cell", ["", "н/д"])
+def test_csv_bad_amount_names_the_line(tmp_path, cell):
+    path = _write(
+        tmp_path,
+        f"Дата;Сумма;Категория\n01.02.2024;-50,00 р.;Еда\n02.02.2024;{cell};Еда\n",
+    )
+    rows = read_operations(path)
+    assert next(rows)["amount"] == -50.0
+    with pytest.raises(ValueError, match="строка 3"):
+        next(rows)
+
+
+def test_import_on_writer_connection(core, tmp_path):
+    path = _write(tmp_path, "Дата;Сумма;Категория\n01.02.2024;-100;Кафе\n02.02.2024;250;Подарок\n")
+    with core.db.writer() as db:
+        assert core.import_operations(str(path), db=db) == 2
+    assert core.ops_count() == 2
+    assert "Кафе" in dict(core.cats(False)).values()
+    assert core.balance() == pytest.approx(150)
+
+
+def test_cancelled_import_rolls_back(core, tmp_path):
+    rows = "".join(f"0{d}.02.2024;-{d};Новая{d}\n" for d in range(1, 8))
+    path = _write(tmp_path, "Дата;Сумма;Категория\n" + rows)
+    cats_before = core.cats(False)
+
+    def progress(n):
+        raise InterruptedError("cancelled")
+
+    with core.db.writer() as db:
+        with pytest.raises(InterruptedError):
+            core.import_operations(str(path), progress, db)
+    assert core.ops_count() == 0
+    assert core.cats(False) == cats_before
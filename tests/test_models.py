@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip("PySide6")
+
+from models import OperationsModel  # noqa: E402
+
+
+class FakeCore:
+    def __init__(self, n):
+        self.rows = [
+            {"id": i, "date": "2024-01-01", "type": 0, "amount": 100, "fx": None,
+             "category_id": None, "note": None}
+            for i in range(n)
+        ]
+
+    def ops(self, limit=None, offset=0, db=None, query=""):
+        return self.rows[offset:offset + limit]
+
+    def ops_count(self, db=None):
+        return len(self.rows)
+
+
+class FlakyWorkers:
+    """Выполняет задачи сразу; задачи из ``fail`` завершаются ошибкой."""
+
+    def __init__(self):
+        self.fail = 0
+
+    def submit(self, channel, fn, *args, on_done, on_error=None):
+        if self.fail:
+            self.fail -= 1
+            on_error("disk I/O error")
+        else:
+            on_done(fn(None, *args))
+
+
+def test_failed_page_does_not_stop_paging():
+    workers = FlakyWorkers()
+    model = OperationsModel(FakeCore(1200), lambda v, fx=None: str(v), workers=workers)
+    model.reload()
+    assert model.rowCount() == OperationsModel.PAGE
+
+    workers.fail = 1
+    model.fetchMore()
+    assert model.rowCount() == OperationsModel.PAGE
+    assert model.canFetchMore()
+
+    model.fetchMore()
+    assert model.rowCount() == 2 * OperationsModel.PAGE
+
+
+def test_failed_reload_can_be_retried():
+    workers = FlakyWorkers()
+    model = OperationsModel(FakeCore(10), lambda v, fx=None: str(v), workers=workers)
+    workers.fail = 1
+    model.reload()
+    assert model.rowCount() == 0
+    model.reload()
+    assert model.rowCount() == 10
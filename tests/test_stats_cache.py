@@ -0,0 +1,93 @@
+from datetime import date, timedelta
+
+PERIODS = (7, 30, 365, None)
+
+
+def _fresh(core, days):
+    saved = core._stats
+    core._stats = {}
+    try:
+        return core.stats(days)
+    finally:
+        core._stats = saved
+
+
+def _assert_cache_matches(core):
+    assert core.check_stats_cache() == []
+    for days in PERIODS:
+        assert core.stats(days) == _fresh(core, days)
+
+
+def test_patched_cache_matches_recompute(core):
+    today = date.today()
+    (food, _), (transport, _) = core.cats(False)[:2]
+    salary = core.cats(True)[0][0]
+    core.add(today - timedelta(days=400), 50_000, salary, True)
+    core.add(today - timedelta(days=40), 1_200.5, food, False)
+    for days in PERIODS:
+        core.stats(days)
+
+    ids = [
+        core.add(today, 350, food, False, "обед"),
+        core.add(today - timedelta(days=3), 90, transport, False),
+        core.add(today - timedelta(days=20), 30_000, salary, True),
+        core.add(today - timedelta(days=500), 777, food, False),
+    ]
+    _assert_cache_matches(core)
+
+    core.delete(ids[1])
+    core.delete(ids[3])
+    _assert_cache_matches(core)
+
+    core.currency = "USD"
+    for days in PERIODS:
+        core.stats(days)
+    core.add(today - timedelta(days=1), 250, transport, False)
+    core.delete(ids[0])
+    _assert_cache_matches(core)
+
+    core.currency = "RUB"
+    _assert_cache_matches(core)
+
+
+def test_deleting_last_operation_of_a_day_drops_its_buckets(core):
+    food = core.cats(False)[0][0]
+    core.stats(30)
+    op = core.add(date.today(), 100, food, False)
+    core.delete(op)
+    assert core.check_stats_cache() == []
+    pie, inc, exp, line = core.stats(30)
+    assert not pie and not exp and not line
+
+
+def test_stats_computed_during_import_are_not_installed(core, tmp_path):
+    path = tmp_path / "ops.csv"
+    rows = "".join(f"{date.today():%d.%m.%Y};-{n};Еда\n" for n in range(1, 4))
+    path.write_text("Дата;Сумма;Категория\n" + rows, encoding="utf-8")
+    core.stats(30)
+    during = []
+
+    def progress(n):
+        # фоновый пересчёт посреди вставки: версия и снимок до COMMIT
+        version = core.version
+        with core.db.reader() as db:
+            during.append((version, core.compute_stats(core.border(30), db)))
+
+    with core.db.writer() as db:
+        core.import_operations(str(path), progress, db)
+    assert during
+    assert not any(core.install_stats(30, v, st) for v, st in during)
+    pie, inc, exp, line = core.stats(30)
+    assert sum(exp.values()) == 6
+
+
+def test_failed_import_invalidates_stats(core, tmp_path):
+    path = tmp_path / "ops.csv"
+    path.write_text("Дата;Сумма\n01.01.2024;\n", encoding="utf-8")
+    core.stats(30)
+    version = core.version
+    try:
+        core.import_operations(str(path))
+    except ValueError:
+        pass
+    assert core.version > version and core.cached_stats(30) is None
@@ -1,12 +1,9 @@
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as Canvas
-from matplotlib.figure import Figure
-
 from PySide6.QtCore import QSize, QCoreApplication, QDate
 from PySide6.QtWidgets import (
     QCheckBox, QComboBox, QDateEdit, QDoubleSpinBox, QFormLayout, QGridLayout,
     QGroupBox, QHBoxLayout, QLabel, QLineEdit, QPushButton, QScrollArea,
-    QSizePolicy, QSpacerItem, QSpinBox, QTabWidget, QTableWidget,
-    QTableWidgetItem, QVBoxLayout, QWidget, QHeaderView
+    QSizePolicy, QSpacerItem, QSpinBox, QTabWidget, QTableView,
+    QAbstractItemView, QVBoxLayout, QWidget, QHeaderView
 )
 
 
@@ -36,9 +33,15 @@ class Ui_MainWindow(object):
         layout = QHBoxLayout(self.tab_home)
 
         v_left = QVBoxLayout()
-        self.table = QTableWidget(columnCount=4); self.table.setObjectName("table")
-        for i, h in enumerate(("Дата", "Сумма", "Категория", "Описание")):
-            self.table.setHorizontalHeaderItem(i, QTableWidgetItem(h))
+        self.editSearch = QLineEdit(); self.editSearch.setObjectName("editSearch")
+        self.editSearch.setPlaceholderText("Поиск по описанию…")
+        self.editSearch.setClearButtonEnabled(True)
+        v_left.addWidget(self.editSearch)
+
+        self.table = QTableView(); self.table.setObjectName("table")
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setDefaultSectionSize(24)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         v_left.addWidget(self.table)
 
@@ -89,12 +92,16 @@ class Ui_MainWindow(object):
         self.btnDelete = QPushButton("Удалить");
         self.btnDelete.setObjectName("btnDelete")
 
-        self.btnExport = QPushButton("Экспорт в Excel");
+        self.btnExport = QPushButton("Экспорт…");
         self.btnExport.setObjectName("btnExport")
 
+        self.btnImport = QPushButton("Импорт CSV / OFX");
+        self.btnImport.setObjectName("btnImport")
+
         v_right.addWidget(self.btnAdd)
         v_right.addWidget(self.btnDelete)
         v_right.addWidget(self.btnExport)
+        v_right.addWidget(self.btnImport)
 
         v_right.addItem(QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding))
         layout.addLayout(v_right)
@@ -105,35 +112,59 @@ class Ui_MainWindow(object):
         v = QVBoxLayout(self.tab_analytics)
         self.period_box = QComboBox(); self.period_box.setObjectName("period_box")
         self.period_box.addItems(["Последние 7 дней", "Месяц", "Год", "Весь период"])
-        v.addWidget(self.period_box)
+        self.chkForecast = QCheckBox("Прогноз, мес:"); self.chkForecast.setObjectName("chkForecast")
+        self.spinForecast = QSpinBox(minimum=12, maximum=60, value=24); self.spinForecast.setObjectName("spinForecast")
+        h = QHBoxLayout(); h.addWidget(self.period_box, 1)
+        h.addWidget(self.chkForecast); h.addWidget(self.spinForecast)
+        v.addLayout(h)
 
         scroll = QScrollArea(); scroll.setWidgetResizable(True)
+        self.scrollAnalytics = scroll
         content = QWidget(); scroll.setWidget(content)
         grid = QGridLayout(content)
 
-        self.canvas_pie, self.canvas_bar = Canvas(Figure()), Canvas(Figure())
-        self.canvas_line, self.canvas_donut = Canvas(Figure()), Canvas(Figure())
-        for c in (self.canvas_pie, self.canvas_bar, self.canvas_line, self.canvas_donut):
-            c.figure.subplots()
-
         titles = [
-            ("grpPie", "Расходы по категориям (Pie)", self.canvas_pie),
-            ("grpBar", "Доход / Расход по месяцам (Bar)", self.canvas_bar),
-            ("grpLine", "Баланс со временем (Line)", self.canvas_line),
-            ("grpDonut", "Доходы / Расходы (Donut)", self.canvas_donut),
+            ("grpPie", "Расходы по категориям (Pie)"),
+            ("grpBar", "Доход / Расход по месяцам (Bar)"),
+            ("grpLine", "Баланс со временем (Line)"),
+            ("grpDonut", "Доходы / Расходы (Donut)"),
         ]
-        for idx, (name, title, canvas) in enumerate(titles):
+        for idx, (name, title) in enumerate(titles):
             grp = QGroupBox(title); grp.setObjectName(name)
             setattr(self, name, grp)
-            QVBoxLayout(grp).addWidget(canvas)
+            QVBoxLayout(grp)
             grid.addWidget(grp, idx // 2, idx % 2)
 
         v.addWidget(scroll)
         self.tabs.addTab(self.tab_analytics, "Аналитика")
 
+    def build_charts(self):
+        """Холсты matplotlib создаются при первом открытии «Аналитики»."""
+        from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as Canvas
+        from matplotlib.figure import Figure
+
+        self.canvas_pie, self.canvas_bar = Canvas(Figure()), Canvas(Figure())
+        self.canvas_line, self.canvas_donut = Canvas(Figure()), Canvas(Figure())
+        for grp, c in (
+            (self.grpPie, self.canvas_pie), (self.grpBar, self.canvas_bar),
+            (self.grpLine, self.canvas_line), (self.grpDonut, self.canvas_donut),
+        ):
+            c.figure.subplots()
+            grp.layout().addWidget(c)
+
+    def build_deposit_chart(self):
+        """Тепловая карта вкладов, создаётся при первом расчёте вклада."""
+        from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as Canvas
+        from matplotlib.figure import Figure
+
+        self.canvas_dep_heat = Canvas(Figure())
+        self.canvas_dep_heat.figure.subplots()
+        self.pageDepHeat.layout().addWidget(self.canvas_dep_heat)
+
     def _init_tools_tab(self):
         self.tab_tools = QWidget()
-        v = QVBoxLayout(self.tab_tools)
+        h = QHBoxLayout(self.tab_tools)
+        v = QVBoxLayout(); h.addLayout(v, 2)
 
         self.grpConv = QGroupBox("Конвертер валют"); self.grpConv.setObjectName("grpConv")
         fC = QFormLayout(self.grpConv); self.formConv = fC
@@ -153,10 +184,21 @@ class Ui_MainWindow(object):
         self.spinCreditRate = QDoubleSpinBox(suffix=" %", maximum=100, decimals=2); self.spinCreditRate.setObjectName("spinCreditRate")
         self.spinCreditTerm = QSpinBox(suffix=" мес", maximum=480); self.spinCreditTerm.setObjectName("spinCreditTerm")
         self.btnCreditCalc = QPushButton("Рассчитать платёж"); self.btnCreditCalc.setObjectName("btnCreditCalc")
-        self.lblCreditResult = QLabel("—"); self.lblCreditResult.setObjectName("lblCreditResult")
+        self.lblCreditResult = QLabel("—"); self.lblCreditResult.setObjectName("lblCreditResult"); self.lblCreditResult.setWordWrap(True)
         fCr.addRow("Сумма кредита:", self.spinCreditSum)
         fCr.addRow("Ставка (% год):", self.spinCreditRate)
         fCr.addRow("Срок:", self.spinCreditTerm)
+        self.cmbCreditKind = QComboBox(); self.cmbCreditKind.setObjectName("cmbCreditKind")
+        self.cmbCreditKind.addItems(["Аннуитетный", "Дифференцированный"])
+        self.spinCreditExtra = QDoubleSpinBox(maximum=1e9); self.spinCreditExtra.setObjectName("spinCreditExtra")
+        self.spinCreditExtraMonth = QSpinBox(prefix="№ ", minimum=1, maximum=480); self.spinCreditExtraMonth.setObjectName("spinCreditExtraMonth")
+        self.cmbCreditReduce = QComboBox(); self.cmbCreditReduce.setObjectName("cmbCreditReduce")
+        self.cmbCreditReduce.addItems(["Уменьшить срок", "Уменьшить платёж"])
+        hEx = QHBoxLayout(); hEx.addWidget(self.spinCreditExtra); hEx.addWidget(self.spinCreditExtraMonth)
+        self.wCreditExtra = QWidget(); self.wCreditExtra.setLayout(hEx); hEx.setContentsMargins(0, 0, 0, 0)
+        fCr.addRow("Тип платежа:", self.cmbCreditKind)
+        fCr.addRow("Досрочно (сумма, месяц):", self.wCreditExtra)
+        fCr.addRow("После досрочного:", self.cmbCreditReduce)
         fCr.addRow(self.btnCreditCalc, self.lblCreditResult)
         v.addWidget(self.grpCredit)
 
@@ -166,18 +208,37 @@ class Ui_MainWindow(object):
         self.spinDepRate = QDoubleSpinBox(suffix=" %", maximum=100, decimals=2); self.spinDepRate.setObjectName("spinDepRate")
         self.spinDepTerm = QSpinBox(suffix=" мес", maximum=480); self.spinDepTerm.setObjectName("spinDepTerm")
         self.spinDepMonthly = QDoubleSpinBox(prefix="+ ", maximum=1e9); self.spinDepMonthly.setObjectName("spinDepMonthly")
-        self.chkDepCap = QCheckBox(""); self.chkDepCap.setObjectName("chkDepCap"); self.chkDepCap.setChecked(True)
+        self.cmbDepCap = QComboBox(); self.cmbDepCap.setObjectName("cmbDepCap")
+        self.cmbDepCap.addItems(["Нет", "Ежедневно", "Ежемесячно", "Ежеквартально"]); self.cmbDepCap.setCurrentIndex(2)
         self.btnDepCalc = QPushButton("Рассчитать итог"); self.btnDepCalc.setObjectName("btnDepCalc")
         self.lblDepResult = QLabel("—"); self.lblDepResult.setObjectName("lblDepResult")
         fD.addRow("Начальная сумма:", self.spinDepInit)
         fD.addRow("Ставка (% год):", self.spinDepRate)
         fD.addRow("Срок:", self.spinDepTerm)
         fD.addRow("Ежемесячный взнос:", self.spinDepMonthly)
-        fD.addRow("Капитализация:", self.chkDepCap)
+        fD.addRow("Капитализация:", self.cmbDepCap)
         fD.addRow(self.btnDepCalc, self.lblDepResult)
         v.addWidget(self.grpDeposit)
 
         v.addItem(QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding))
+
+        # график платежей и сравнение сценариев кредита
+        self.tabsCalc = QTabWidget(); self.tabsCalc.setObjectName("tabsCalc")
+        self.tableSchedule = QTableView(); self.tableSchedule.setObjectName("tableSchedule")
+        self.tableScenarios = QTableView(); self.tableScenarios.setObjectName("tableScenarios")
+        for t in (self.tableSchedule, self.tableScenarios):
+            t.setEditTriggers(QAbstractItemView.NoEditTriggers)
+            t.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.tabsCalc.addTab(self.tableSchedule, "График платежей")
+        self.tabsCalc.addTab(self.tableScenarios, "Сравнение сценариев")
+        self.tableDeposit = QTableView(); self.tableDeposit.setObjectName("tableDeposit")
+        self.tableDeposit.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tableDeposit.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.tabsCalc.addTab(self.tableDeposit, "Рост вклада")
+        self.pageDepHeat = QWidget(); self.pageDepHeat.setObjectName("pageDepHeat")
+        QVBoxLayout(self.pageDepHeat)
+        self.tabsCalc.addTab(self.pageDepHeat, "Вклад: ставка × срок")
+        h.addWidget(self.tabsCalc, 3)
         self.tabs.addTab(self.tab_tools, "Инструменты")
 
     def _init_settings_tab(self):
@@ -23,16 +23,28 @@ LANG = {
         f_amount="Сумма:", f_from="Из:", f_to="В:",
 
         loan_sum="Сумма кредита:", loan_rate="Ставка (% год):",
-        loan_term="Срок:",
+        loan_term="Срок:", loan_kind="Тип платежа:",
+        loan_kinds=["Аннуитетный", "Дифференцированный"],
+        loan_extra="Досрочно (сумма, месяц):", loan_reduce="После досрочного:",
+        loan_reduces=["Уменьшить срок", "Уменьшить платёж"],
+        loan_result="{pay} в мес., переплата {over}",
+        loan_result_diff="{first} → {last}, переплата {over}",
+        tab_schedule="График платежей", tab_scenarios="Сравнение сценариев",
+        schedule_cols=["Платёж", "Проценты", "Долг", "Досрочно", "Остаток"],
+        term_months="{n} мес",
 
         dep_init="Начальная сумма:", dep_rate="Ставка (% год):",
         dep_term="Срок:", dep_month="Ежемесячный взнос:",
         lbl_cap="Капитализация:",
+        dep_caps=["Нет", "Ежедневно", "Ежемесячно", "Ежеквартально"],
+        tab_dep_growth="Рост вклада", tab_dep_grid="Вклад: ставка × срок",
+        deposit_cols=["Внесено", "Проценты", "На счёте"],
 
         col_date="Дата", col_sum="Сумма",
         col_cat="Категория", col_note="Описание",
 
         periods=["Последние 7 дней", "Месяц", "Год", "Весь период"],
+        chk_forecast="Прогноз, мес:",
 
         g_pie="Расходы по категориям",
         g_bar="Доход / Расход по месяцам",
@@ -43,6 +55,7 @@ LANG = {
         set_cur="Валюта по умолчанию:",
 
         note_title="Описание",
+        search_ph="Поиск по описанию…",
         msg_del="Удалить запись?",
 
         dlg_cat_title="Новая категория",
@@ -53,7 +66,21 @@ LANG = {
         btn_ok="ОК",
         btn_cancel="Отмена",
 
-        btn_export="Экспорт в Excel",
+        btn_export="Экспорт…",
+        btn_import="Импорт CSV / OFX",
+        import_progress="Импорт операций…",
+        msg_imported="Импортировано операций: {n}",
+        msg_err_import="Ошибка импорта",
+
+        dlg_export_title="Экспорт операций",
+        exp_all_time="Весь период",
+        exp_from="С:", exp_to="По:",
+        exp_cat="Категория:", exp_all_cats="Все категории",
+        export_progress="Экспорт операций…",
+        msg_exported="Выгружено операций: {n}\n{path}",
+
+        diag_title="Диагностика", diag_refresh="Обновить", diag_reset="Сбросить",
+        diag_off="Замеры выключены. Запустите с FINANCE_PROFILE=1 или main.py --profile.",
     ),
 
     "en": dict(
@@ -76,16 +103,28 @@ LANG = {
         f_amount="Amount:", f_from="From:", f_to="To:",
 
         loan_sum="Loan amount:", loan_rate="Rate (%/yr):",
-        loan_term="Term:",
+        loan_term="Term:", loan_kind="Payment type:",
+        loan_kinds=["Annuity", "Differentiated"],
+        loan_extra="Early repayment (sum, month):", loan_reduce="After early repayment:",
+        loan_reduces=["Shorten term", "Lower payment"],
+        loan_result="{pay} per month, overpayment {over}",
+        loan_result_diff="{first} → {last}, overpayment {over}",
+        tab_schedule="Payment schedule", tab_scenarios="Scenario comparison",
+        schedule_cols=["Payment", "Interest", "Principal", "Early", "Balance"],
+        term_months="{n} mo",
 
         dep_init="Initial amount:", dep_rate="Rate (%/yr):",
         dep_term="Term:", dep_month="Monthly add:",
         lbl_cap="Capitalization:",
+        dep_caps=["None", "Daily", "Monthly", "Quarterly"],
+        tab_dep_growth="Deposit growth", tab_dep_grid="Deposit: rate × term",
+        deposit_cols=["Paid in", "Interest", "Balance"],
 
         col_date="Date", col_sum="Amount",
         col_cat="Category", col_note="Note",
 
         periods=["Last 7 days", "Month", "Year", "All time"],
+        chk_forecast="Forecast, months:",
 
         g_pie="Expenses by category",
         g_bar="Income / Expense by month",
@@ -96,6 +135,7 @@ LANG = {
         set_cur="Default currency:",
 
         note_title="Note",
+        search_ph="Search notes…",
         msg_del="Delete record?",
 
         dlg_cat_title="New category",
@@ -106,6 +146,20 @@ LANG = {
         btn_ok="OK",
         btn_cancel="Cancel",
 
-        btn_export="Export to Excel",
+        btn_export="Export…",
+        btn_import="Import CSV / OFX",
+        import_progress="Importing operations…",
+        msg_imported="Operations imported: {n}",
+        msg_err_import="Import error",
+
+        dlg_export_title="Export operations",
+        exp_all_time="All time",
+        exp_from="From:", exp_to="To:",
+        exp_cat="Category:", exp_all_cats="All categories",
+        export_progress="Exporting operations…",
+        msg_exported="Operations exported: {n}\n{path}",
+
+        diag_title="Diagnostics", diag_refresh="Refresh", diag_reset="Reset",
+        diag_off="Profiling is off. Run with FINANCE_PROFILE=1 or main.py --profile.",
     ),
 }
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import logging
+from itertools import count
+from typing import Any, Callable
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+from dataBase import DataBase
+
+logger = logging.getLogger(__name__)
+
+
+class _Signals(QObject):
+    done = Signal(str, int, object)
+    failed = Signal(str, int, str)
+
+
+class _Task(QRunnable):
+    def __init__(
+        self, workers: DbWorkers, channel: str, ticket: int, fn, args, write: bool
+    ) -> None:
+        super().__init__()
+        self._workers = workers
+        self._channel = channel
+        self.ticket = ticket
+        self._fn = fn
+        self._args = args
+        self._write = write
+        self.signals = _Signals()
+
+    def run(self) -> None:
+        if self._workers.is_stale(self._channel, self.ticket):
+            self.signals.failed.emit(self._channel, self.ticket, "cancelled")
+            return
+        db = self._workers.db
+        try:
+            with db.writer() if self._write else db.reader() as view:
+                res = self._fn(view, *self._args)
+        except Exception as e:
+            logger.exception("worker task %s failed", self._channel)
+            self.signals.failed.emit(self._channel, self.ticket, str(e))
+        else:
+            self.signals.done.emit(self._channel, self.ticket, res)
+
+
+class DbWorkers(QObject):
+    """Пул фоновых потоков для запросов к БД.
+
+    Задачи читают базу через соединения только для чтения из
+    ``DataBase.reader()``; задача с ``write=True`` получает отдельное
+    пишущее соединение ``DataBase.writer()``. Задачи группируются по каналам
+    («stats», «totals», …): новая задача в канале отменяет ещё не начатую
+    предыдущую, а результаты устаревших задач отбрасываются. Для базы в
+    памяти задачи выполняются сразу в вызывающем потоке.
+    """
+
+    busy_changed = Signal(bool)
+    # (канал, сколько сделано) — задачи сообщают о ходе работы из своего потока
+    progress = Signal(str, int)
+
+    def __init__(self, db: DataBase, parent=None, max_threads: int = 2) -> None:
+        super().__init__(parent)
+        self.db = db
+        self._sync = str(db.path) == ":memory:"
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        self._tickets = count(1)
+        self._latest: dict[str, int] = {}
+        self._pending: dict[str, _Task] = {}
+        self._tasks: dict[int, tuple[_Task, Callable, Callable | None]] = {}
+
+    def is_stale(self, channel: str, ticket: int) -> bool:
+        return self._latest.get(channel) != ticket
+
+    def busy(self) -> bool:
+        return bool(self._tasks)
+
+    def submit(
+        self,
+        channel: str,
+        fn: Callable[..., Any],
+        *args,
+        on_done: Callable[[Any], None],
+        on_error: Callable[[str], None] | None = None,
+        write: bool = False,
+    ) -> int:
+        """Выполнить ``fn(db, *args)`` в фоне и передать результат в ``on_done``."""
+        ticket = next(self._tickets)
+        self._latest[channel] = ticket
+
+        if self._sync:
+            try:
+                on_done(fn(self.db, *args))
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(str(e))
+            return ticket
+
+        old = self._pending.pop(channel, None)
+        if old is not None and self._pool.tryTake(old):
+            self._tasks.pop(old.ticket, None)
+
+        was_busy = self.busy()
+        task = _Task(self, channel, ticket, fn, args, write)
+        task.setAutoDelete(False)
+        task.signals.done.connect(self._on_done)
+        task.signals.failed.connect(self._on_failed)
+        self._pending[channel] = task
+        self._tasks[ticket] = (task, on_done, on_error)
+        self._pool.start(task)
+        if not was_busy:
+            self.busy_changed.emit(True)
+        return ticket
+
+    def cancel(self, channel: str) -> None:
+        self._latest.pop(channel, None)
+
+    def _finish(self, channel: str, ticket: int):
+        entry = self._tasks.pop(ticket, None)
+        pending = self._pending.get(channel)
+        if pending is not None and pending.ticket == ticket:
+            del self._pending[channel]
+        if not self.busy():
+            self.busy_changed.emit(False)
+        if entry is None or self.is_stale(channel, ticket):
+            return None
+        return entry[1:]
+
+    @Slot(str, int, object)
+    def _on_done(self, channel: str, ticket: int, res) -> None:
+        cbs = self._finish(channel, ticket)
+        if cbs is not None:
+            cbs[0](res)
+
+    @Slot(str, int, str)
+    def _on_failed(self, channel: str, ticket: int, err: str) -> None:
+        cbs = self._finish(channel, ticket)
+        if cbs is not None and cbs[1] is not None:
+            cbs[1](err)
+
+    def shutdown(self) -> None:
+        self._latest.clear()
+        self._pool.clear()
+        self._pool.waitForDone()